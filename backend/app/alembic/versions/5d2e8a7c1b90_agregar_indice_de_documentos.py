@@ -0,0 +1,50 @@
+"""Agregar índice de documentos de los pacientes
+
+Revision ID: 5d2e8a7c1b90
+Revises: c41f0e9b7d2a
+Create Date: 2026-10-18 14:22:41.073512
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2e8a7c1b90"
+down_revision: Union[str, None] = "c41f0e9b7d2a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # El índice se llena desde el disco con `python -m app.reconcile_documents`
+    op.create_table(
+        "patient_documents",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("num_document", sa.String(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("checksum", sa.String(length=64), nullable=False),
+        sa.Column("uploaded_by", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "num_document", "kind", "filename", name="uq_patient_documents_file"
+        ),
+    )
+    op.create_index(
+        "ix_patient_documents_kind_num_document",
+        "patient_documents",
+        ["kind", "num_document"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_patient_documents_kind_num_document", table_name="patient_documents"
+    )
+    op.drop_table("patient_documents")
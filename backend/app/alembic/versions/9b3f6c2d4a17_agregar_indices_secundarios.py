@@ -0,0 +1,60 @@
+"""Agregar índices secundarios
+
+Revision ID: 9b3f6c2d4a17
+Revises: 5d2e8a7c1b90
+Create Date: 2026-10-18 16:05:12.448390
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b3f6c2d4a17"
+down_revision: Union[str, None] = "5d2e8a7c1b90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Nombre, tabla, columnas y condición del índice parcial
+INDEXES: list[tuple[str, str, list[str], str | None]] = [
+    ("ix_user_roles_active_num_document", "user_roles", ["num_document"], "is_active"),
+    ("ix_user_roles_rol_num_document", "user_roles", ["rol", "num_document"], None),
+    (
+        "ix_hospitalizations_active_patient",
+        "hospitalizations",
+        ["id_patient"],
+        "last_day IS NULL",
+    ),
+    ("ix_medical_consults_day", "medical_consults", ["day"], None),
+    ("ix_medical_consults_id_doctor", "medical_consults", ["id_doctor"], None),
+    ("ix_medical_consults_id_patient", "medical_consults", ["id_patient"], None),
+]
+
+
+def upgrade() -> None:
+    # Se crean sin bloquear las escrituras sobre las tablas, lo cual no se puede hacer dentro de una transacción
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where is not None else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
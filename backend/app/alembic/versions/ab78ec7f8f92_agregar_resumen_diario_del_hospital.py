@@ -0,0 +1,99 @@
+"""Agregar resumen diario del hospital
+
+Revision ID: ab78ec7f8f92
+Revises: a698f22123fe
+Create Date: 2026-10-18 09:12:41.305117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ab78ec7f8f92"
+down_revision: Union[str, None] = "a698f22123fe"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_hospital_stats",
+        sa.Column("day", sa.DATE(), autoincrement=False, nullable=False),
+        sa.Column(
+            "admissions",
+            sa.INTEGER(),
+            server_default=sa.text("0"),
+            autoincrement=False,
+            nullable=False,
+        ),
+        sa.Column(
+            "discharges",
+            sa.INTEGER(),
+            server_default=sa.text("0"),
+            autoincrement=False,
+            nullable=False,
+        ),
+        sa.Column(
+            "beds_in_use",
+            sa.INTEGER(),
+            server_default=sa.text("0"),
+            autoincrement=False,
+            nullable=False,
+        ),
+        sa.Column(
+            "total_beds",
+            sa.INTEGER(),
+            server_default=sa.text("0"),
+            autoincrement=False,
+            nullable=False,
+        ),
+        sa.Column(
+            "patient_days",
+            sa.INTEGER(),
+            server_default=sa.text("0"),
+            autoincrement=False,
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("day", name="pk_daily_hospital_stats"),
+    )
+
+    # Llenar el resumen con el historial existente (ver `crud_daily_stats.backfill`)
+    op.execute(
+        """
+        INSERT INTO daily_hospital_stats
+            (day, admissions, discharges, beds_in_use, total_beds, patient_days)
+        SELECT
+            day,
+            admissions,
+            discharges,
+            SUM(admissions - discharges) OVER (ORDER BY day),
+            (SELECT COUNT(*) FROM beds),
+            patient_days
+        FROM (
+            SELECT
+                day,
+                SUM(admissions) AS admissions,
+                SUM(discharges) AS discharges,
+                SUM(patient_days) AS patient_days
+            FROM (
+                SELECT entry_day AS day, 1 AS admissions, 0 AS discharges, 0 AS patient_days
+                FROM hospitalizations
+                UNION ALL
+                SELECT last_day, 0, 1, last_day - entry_day
+                FROM hospitalizations
+                WHERE last_day IS NOT NULL
+                UNION ALL
+                SELECT CURRENT_DATE, 0, 0, 0
+            ) AS events
+            GROUP BY day
+        ) AS daily
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_hospital_stats")
@@ -0,0 +1,74 @@
+"""Agregar servicio a las hospitalizaciones
+
+Revision ID: c41f0e9b7d2a
+Revises: ab78ec7f8f92
+Create Date: 2026-10-18 11:03:27.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c41f0e9b7d2a"
+down_revision: Union[str, None] = "ab78ec7f8f92"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "hospitalizations",
+        sa.Column("id_speciality", sa.INTEGER(), autoincrement=False, nullable=True),
+    )
+    op.create_foreign_key(
+        "fk_hospitalizations_id_speciality",
+        "hospitalizations",
+        "specialities",
+        ["id_speciality"],
+        ["id"],
+        onupdate="CASCADE",
+        ondelete="SET NULL",
+    )
+
+    # Atribuir las hospitalizaciones existentes a la primera especialidad del doctor
+    op.execute(
+        """
+        UPDATE hospitalizations AS h
+        SET id_speciality = (
+            SELECT ds.speciality_id
+            FROM doctor_specialities AS ds
+            WHERE ds.doctor_id = h.id_doctor
+            ORDER BY ds.id
+            LIMIT 1
+        )
+        """
+    )
+
+    op.create_index(
+        "ix_hospitalizations_entry_day_speciality",
+        "hospitalizations",
+        ["entry_day", "id_speciality"],
+    )
+    op.create_index(
+        "ix_hospitalizations_last_day_speciality",
+        "hospitalizations",
+        ["last_day", "id_speciality"],
+        postgresql_where=sa.text("last_day IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_hospitalizations_last_day_speciality", table_name="hospitalizations"
+    )
+    op.drop_index(
+        "ix_hospitalizations_entry_day_speciality", table_name="hospitalizations"
+    )
+    op.drop_constraint(
+        "fk_hospitalizations_id_speciality", "hospitalizations", type_="foreignkey"
+    )
+    op.drop_column("hospitalizations", "id_speciality")
@@ -1,23 +1,41 @@
-from collections.abc import Generator
-from typing import Annotated, Any
+from collections.abc import AsyncGenerator, Callable, Coroutine, Generator
+from time import perf_counter
+from typing import Annotated, Any, TypeVar
 from datetime import datetime, date
 
 from pymongo import MongoClient
 from app.core.config import settings
 
 import jwt
-from fastapi import Depends, Request
+from fastapi import Depends, Query, Request, Response
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.types import Message, Scope
 
 from app.core.config import settings
-from app.core.db import SessionLocal
+from app.core.db import AsyncSessionLocal, SessionLocal
+from app.core.audit import (
+    AuditLogWriter,
+    PartitionedCollection,
+    compact_log,
+    filter_headers,
+)
+from app.core.cache import principal_cache
+from app.core.metrics import RequestStats, TimedRoute, request_stats
 
 from app import schemas
-from app.api.exceptions import credentials_exception, unauthorized_exception
+from app.api.exceptions import (
+    credentials_exception,
+    unauthorized_exception,
+    invalid_cursor,
+    file_too_large,
+)
 from app.crud import crud_user
+from app.crud.base import decode_cursor
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -32,11 +50,32 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[Session, Depends(reusable_oauth2)]
 
 
-def get_current_user(db: SessionDep, token: TokenDep) -> schemas.models.UserRoles:
+async def get_current_user(
+    db: AsyncSessionDep, token: TokenDep
+) -> schemas.models.UserRoles:
+    start_time = perf_counter()
+    try:
+        current_user = await authenticate(db, token)
+    finally:
+        stats = request_stats.get()
+        if stats is not None:
+            stats.auth_time += perf_counter() - start_time
+
+    set_log_user(current_user.num_document, current_user.rol)
+    return current_user
+
+
+async def authenticate(db: AsyncSession, token: str) -> schemas.models.UserRoles:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -47,16 +86,28 @@ def get_current_user(db: SessionDep, token: TokenDep) -> schemas.models.UserRole
     except (ValidationError, InvalidTokenError):
         raise credentials_exception
 
+    # Los usuarios ya validados se guardan por un tiempo para no consultar la base de datos en cada petición.
+    # Los cambios de `crud_admin` sobre un usuario lo eliminan de la caché
+    key = (token_data.number_document, token_data.rol)
+    current_user = principal_cache.get(key)
+    if current_user is not None:
+        return current_user
+
     user_search = schemas.UserSearch(
         num_document=token_data.number_document, rol=token_data.rol
     )
 
-    user = crud_user.get_user_rol(user_search, db)
+    user = await db.run_sync(
+        lambda session: crud_user.get_user_rol(user_search, session)
+    )
 
     if user is None:
         raise credentials_exception
 
-    return schemas.models.UserRoles.model_validate(user)
+    current_user = schemas.models.UserRoles.model_validate(user)
+    principal_cache.set(key, current_user)
+
+    return current_user
 
 
 CurrentUser = Annotated[schemas.models.UserRoles, Depends(get_current_user)]
@@ -97,33 +148,166 @@ Doctor = Annotated[schemas.models.UserRoles, Depends(get_current_doctor)]
 Patient = Annotated[schemas.models.UserRoles, Depends(get_current_patient)]
 NonPatient = Annotated[schemas.models.UserRoles, Depends(get_current_nonpatient)]
 
+
+def get_pagination(
+    limit: Annotated[int, Query(ge=1, le=settings.MAX_PAGE_SIZE)] = settings.PAGE_SIZE,
+    after: str | None = None,
+    paginate: bool = True,
+) -> schemas.Pagination | None:
+    """
+    Obtiene los parámetros de la paginación por cursor de los listados. Con `paginate=false` se mantiene el
+    comportamiento sin paginar, devolviendo todos los elementos.
+    """
+    if not paginate:
+        return None
+
+    try:
+        key = decode_cursor(after) if after is not None else None
+    except ValueError:
+        raise invalid_cursor
+
+    return schemas.Pagination(limit=limit, after=key)
+
+
+PaginationDep = Annotated[schemas.Pagination | None, Depends(get_pagination)]
+
+# Espacio para los encabezados y separadores de multipart además del archivo
+MULTIPART_OVERHEAD = 64 * 1024  # Bytes
+
+Endpoint = TypeVar("Endpoint", bound=Callable[..., Any])
+
+
+def max_upload_size(
+    limit: int | Callable[[Request], int],
+) -> Callable[[Endpoint], Endpoint]:
+    """
+    Indica el tamaño máximo del archivo que recibe una ruta de un router con `UploadRoute`.
+
+    Args:
+        limit (int | Callable[[fastapi.Request], int]): Tamaño máximo en bytes, o una función que lo obtiene
+            de la petición (p. ej. según un parámetro de la URL).
+    """
+
+    def decorator(endpoint: Endpoint) -> Endpoint:
+        endpoint.max_upload_size = limit  # type: ignore[attr-defined]
+        return endpoint
+
+    return decorator
+
+
+class UploadRoute(TimedRoute):
+    """
+    Ruta que rechaza con `413` los cuerpos que superan el tamaño indicado con `max_upload_size`, antes de que
+    Starlette los guarde en un archivo temporal para el `UploadFile`: primero según `Content-Length` y, si no
+    viene o es falso, a medida que se reciben los bloques del cuerpo. Las rutas sin límite no cambian.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        limit = getattr(self.endpoint, "max_upload_size", None)
+        if limit is None:
+            return handler
+
+        async def limited_handler(request: Request) -> Response:
+            max_size = limit(request) if callable(limit) else limit
+            max_size += MULTIPART_OVERHEAD
+
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and int(length) > max_size:
+                raise file_too_large
+
+            received = 0
+
+            async def receive() -> Message:
+                nonlocal received
+                message = await request.receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > max_size:
+                        raise file_too_large
+                return message
+
+            return await handler(Request(request.scope, receive))
+
+        return limited_handler
+
+
 client = MongoClient(str(settings.MONGO_URI))
 db = client[settings.MONGO_DB]
-collection = db["api_logs"]
+collection = PartitionedCollection(db, "api_logs")
+
+audit_log = AuditLogWriter(
+    collection,
+    max_queue_size=settings.MONGO_LOG_QUEUE_SIZE,
+    batch_size=settings.MONGO_LOG_BATCH_SIZE,
+    flush_interval=settings.MONGO_LOG_FLUSH_INTERVAL,
+    put_timeout=settings.MONGO_LOG_PUT_TIMEOUT,
+)
+
+
+def set_log_user(username: str, rol: schemas.Roles) -> None:
+    """
+    Indica el usuario de la petición actual. Solo las peticiones con usuario se guardan en el historial de la
+    API; `get_current_user` lo indica en todas las rutas autenticadas.
+
+    Args:
+        username (str): Número de documento del usuario.
+        rol (schemas.Roles): Rol del usuario.
+    """
+    stats = request_stats.get()
+    if stats is not None:
+        stats.username, stats.rol = username, rol
+
+
+def log_body(body: dict[str, Any]) -> None:
+    """
+    Indica el cuerpo de la petición actual que se guarda en el historial de la API.
+
+    Args:
+        body (dict[str, Any]): Cuerpo de la petición, sin contraseñas.
+    """
+    stats = request_stats.get()
+    if stats is not None:
+        stats.body = body
+
+
+def milliseconds(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+async def log_request(scope: Scope, stats: RequestStats, status_code: int) -> None:
+    """
+    Guarda una petición terminada en el historial de la API. Se llama desde `MetricsMiddleware`.
 
+    Args:
+        scope (starlette.types.Scope): Scope de la petición.
+        stats (RequestStats): Tiempos y datos de la petición.
+        status_code (int): Código de estado de la respuesta.
+    """
+    if stats.username is None:
+        return None
 
-async def log_request(
-    request: Request,
-    response_status: int,
-    process_time: float,
-    body: dict[str, Any] | None,
-    username: str,
-    rol: schemas.Roles,
-) -> None:
+    body = stats.body
     if body is not None:
         for key, value in body.items():
             if isinstance(value, date):
                 body[key] = value.strftime("%Y-%m-%d")
 
+    # Las peticiones se agrupan por la plantilla de la ruta; la URL se reconstruye con los parámetros
+    route = scope.get("route")
     log_data = {
-        "username": username,
-        "rol": rol,
+        "username": stats.username,
+        "rol": stats.rol,
         "timestamp": datetime.now(),
-        "method": request.method,
-        "url": request.url.path,
-        "headers": dict(request.headers),
+        "method": scope["method"],
+        "route": route.path_format if route is not None else scope["path"],
+        "path_params": scope.get("path_params") if route is not None else None,
+        "headers": filter_headers(Headers(scope=scope), settings.MONGO_LOG_HEADERS),
         "body": body,
-        "process_time_ms": round(process_time * 1000, 2),
-        "status_code": response_status,
+        "process_time_ms": milliseconds(stats.process_time),
+        "auth_ms": milliseconds(stats.auth_time),
+        "handler_ms": milliseconds(stats.handler_time),
+        "serialization_ms": milliseconds(stats.serialization_time),
+        "status_code": status_code,
     }
-    collection.insert_one(log_data)
+    await audit_log.log(compact_log(log_data))
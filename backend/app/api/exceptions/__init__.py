@@ -4,6 +4,7 @@ from app.api.exceptions.exceptions import (
     doctor_not_found,
     patient_not_found,
     bad_date_formatting,
+    invalid_cursor,
     bed_not_found,
     patient_already_hospitalized,
     bed_already_used,
@@ -28,5 +29,8 @@ from app.api.exceptions.exceptions import (
     failed_to_save_file,
     failed_to_delete_file,
     failed_to_found_file,
+    history_version_not_found,
     file_extention_not_allowed,
+    invalid_import_file,
+    file_too_large,
 )
@@ -10,6 +10,10 @@ bad_date_formatting = HTTPException(
     status_code=status.HTTP_400_BAD_REQUEST, detail="Mal formato de fecha"
 )
 
+invalid_cursor = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginación inválido"
+)
+
 patient_cannot_be_his_responsable = HTTPException(
     status_code=status.HTTP_400_BAD_REQUEST,
     detail="Paciente no puede ser su propio responsable",
@@ -135,7 +139,22 @@ failed_to_found_file = HTTPException(
     detail="Archivo no encontrado",
 )
 
+history_version_not_found = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND,
+    detail="Versión de la historia clínica no encontrada",
+)
+
 file_extention_not_allowed = HTTPException(
     status_code=status.HTTP_400_BAD_REQUEST,
     detail="La extensión del archivo no está permitida",
 )
+
+invalid_import_file = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="El archivo debe ser CSV o JSON lines codificado en UTF-8",
+)
+
+file_too_large = HTTPException(
+    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    detail="El archivo supera el tamaño máximo permitido",
+)
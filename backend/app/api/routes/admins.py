@@ -1,25 +1,28 @@
-from datetime import date, datetime
-from time import perf_counter
-
-from fastapi import APIRouter, Request, status
-
-from app.api.deps import SessionDep, Admin, collection, log_request
+import asyncio
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import (
+    AsyncSessionDep,
+    Admin,
+    PaginationDep,
+    collection,
+)
 
 from app import schemas
-from app.stats import (
-    get_percent_occupation,
-    get_avg_stay,
-    get_avg_admission,
-    get_avg_discharge,
-)
+from app.api import exceptions
+from app.core.metrics import TimedRoute
+from app.crud import crud_api_log
+from app.stats import get_stats as get_hospital_stats, get_service_stats
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("/stats", summary="Get Statistics About Hospital")
-async def get_stats(
-    request: Request, current_user: Admin, db: SessionDep
-) -> schemas.Stats:
+async def get_stats(current_user: Admin, db: AsyncSessionDep) -> schemas.Stats:
     """
     Obtiene los indicadores estadísiticos del hospital.
 
@@ -28,70 +31,66 @@ async def get_stats(
         2. Promedios de estancia de los pacientes en el hospital.
         3. Cantidad de admisiones y altas por día.
     """
-    start_time = perf_counter()
-    stats = schemas.Stats(
-        percent_occupation=get_percent_occupation(db),
-        avg_stay=get_avg_stay(db),
-        admissions=get_avg_admission(db),
-        discharges=get_avg_discharge(db),
-    )
-    process_time = perf_counter() - start_time
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
+    stats = await db.run_sync(get_hospital_stats)
     return stats
 
 
-@router.get("/api-historial")
-async def get_api_historial(
-    request: Request,
+@router.get("/stats/services", summary="Get Statistics By Service")
+async def get_stats_by_service(
     current_user: Admin,
-    limit: int = -1,
+    db: AsyncSessionDep,
     start_date: date | None = None,
     end_date: date | None = None,
-    method: str | None = None,
-    url: str | None = None,
-) -> list[schemas.ApiHistorial]:
-    """
-    Obtiene el historial de la API guardadas en la base de datos en mongodb.
+) -> list[schemas.ServiceStats]:
     """
-    start_time = perf_counter()
-
-    if limit <= 0:
-        limit = collection.count_documents({})
-
-    date_filter = {}
-
-    if start_date is not None:
-        date_filter["$gte"] = datetime.combine(start_date, datetime.min.time())
-    if end_date is not None:
-        date_filter["$lte"] = datetime.combine(end_date, datetime.max.time())
+    Obtiene los indicadores estadísticos de cada servicio (especialidad) del hospital en un rango de fechas.
 
-    query = {"timestamp": date_filter} if date_filter else {}
+    Para cada servicio se obtiene:
+        1. Cantidad de admisiones en el rango de fechas.
+        2. Cantidad de altas en el rango de fechas.
+        3. Promedio de estancia de los pacientes dados de alta en el rango de fechas.
+    """
+    stats = await db.run_sync(get_service_stats, start_date, end_date)
 
-    if method is not None:
-        query["method"] = method.upper()
-    if url is not None:
-        query["url"] = url
+    return stats
 
-    documents = collection.find(query).limit(limit)
 
-    result: list[schemas.ApiHistorial] = []
-    for document in documents:
-        result.append(
-            schemas.ApiHistorial(
-                username=document["username"],
-                rol=document["rol"],
-                timestamp=document["timestamp"],
-                method=document["method"],
-                url=document["url"],
-                headers=document["headers"],
-                body=document["body"],
-                process_time_ms=document["process_time_ms"],
-                status_code=document["status_code"],
+@router.get(
+    "/api-historial",
+    response_model=schemas.Page[schemas.ApiHistorial] | list[schemas.ApiHistorial],
+)
+async def get_api_historial(
+    current_user: Admin,
+    pagination: PaginationDep,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    method: str | None = None,
+    url: str | None = None,
+    username: str | None = None,
+    format: Literal["json", "ndjson"] = "json",
+) -> (
+    schemas.Page[schemas.ApiHistorial] | list[schemas.ApiHistorial] | StreamingResponse
+):
+    """
+    Obtiene el historial de la API guardado en mongodb, del registro más reciente al más antiguo, paginado por
+    cursor. Con `paginate=false` se obtiene la lista completa. Con `format=ndjson` se descargan todos los
+    registros (desde el cursor `after`, si se envía) en formato JSON lines mientras se consultan.
+    El filtro `url` recibe la plantilla de la ruta, p. ej. `/api/v1/patients/{num_document}`.
+    """
+    query = crud_api_log.build_query(start_date, end_date, method, url, username)
+
+    try:
+        if format == "ndjson":
+            after = pagination.after if pagination is not None else None
+            content = crud_api_log.stream_logs(collection, query, after)
+        else:
+            # pymongo es síncrono, así que la consulta se hace por fuera del event loop
+            logs = await asyncio.to_thread(
+                crud_api_log.get_logs, collection, query, pagination
             )
-        )
+    except ValueError:
+        raise exceptions.invalid_cursor
 
-    process_time = perf_counter() - start_time
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
-    return result
+    if format == "ndjson":
+        return StreamingResponse(content, media_type="application/x-ndjson")
+    return logs if pagination is not None else logs.items
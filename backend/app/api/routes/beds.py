@@ -1,73 +1,98 @@
-from time import perf_counter
+from fastapi import APIRouter, status
+from fastapi.responses import StreamingResponse
 
-from fastapi import APIRouter, status, Request
-
-from app.api.deps import SessionDep, Admin, log_request
+from app.api.deps import AsyncSessionDep, Admin, PaginationDep, log_body
 
 from app import schemas
 from app.api import exceptions
+from app.core.metrics import TimedRoute
 from app.crud import crud_bed
+from app.core.events import bed_board
 
-router = APIRouter(prefix="/beds")
+router = APIRouter(prefix="/beds", route_class=TimedRoute)
 
 
 @router.get("/")
 async def get_beds(
-    request: Request, current_user: Admin, db: SessionDep, all: bool = False
-) -> list[schemas.models.Beds] | list[schemas.BedAll]:
+    current_user: Admin,
+    db: AsyncSessionDep,
+    pagination: PaginationDep,
+    all: bool = False,
+    used: bool | None = None,
+) -> (
+    schemas.Page[schemas.models.Beds]
+    | schemas.Page[schemas.BedAll]
+    | list[schemas.models.Beds]
+    | list[schemas.BedAll]
+):
     """
-    Obtiene un listado con todas las camas del hospital
+    Obtiene un listado con todas las camas del hospital, paginado por cursor. Con `paginate=false` se obtiene la
+    lista completa.
     """
-    start_time = perf_counter()
-    beds = crud_bed.get_beds(db, all)
-    process_time = perf_counter() - start_time
+    beds = await db.run_sync(crud_bed.get_beds, all, used, pagination)
+
+    return beds if pagination is not None else beds.items
+
+
+@router.get("/events", response_class=StreamingResponse)
+async def get_bed_events(current_user: Admin, db: AsyncSessionDep) -> StreamingResponse:
+    """
+    Tablero de camas en tiempo real con server-sent events. Al conectarse se envía el evento `snapshot` con el
+    estado de todas las camas y luego un evento por cada cambio (`added`, `deleted`, `occupied` o `vacated`) con
+    el estado de la cama después del cambio. Un cambio puede llegar aunque ya esté incluido en el `snapshot`, por
+    lo que el cliente solo debe reemplazar el estado de la cama. Si la conexión se cierra, el cliente debe volver
+    a conectarse para recibir de nuevo el estado completo.
+    """
+    # Suscribirse antes de consultar las camas para no perder los cambios que ocurran mientras tanto
+    queue = bed_board.subscribe()
+    try:
+        beds = await db.run_sync(crud_bed.get_beds, True)
+    except BaseException:
+        bed_board.unsubscribe(queue)
+        raise
+
+    # Devolver la conexión al pool ahora y no cuando el cliente se desconecte
+    await db.close()
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
-    return beds
+    return StreamingResponse(
+        bed_board.stream(queue, beds.items),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def add_bed(
-    request: Request, current_user: Admin, db: SessionDep, bed_info: schemas.BedBase
+    current_user: Admin,
+    db: AsyncSessionDep,
+    bed_info: schemas.BedBase,
 ) -> schemas.ApiResponse:
     """
     Agrega una nueva cama al hospital al hospital especificando el cuarto
     """
-    body = bed_info.model_dump()
+    log_body(bed_info.model_dump())
 
-    start_time = perf_counter()
-    out = crud_bed.add_bed(bed_info, db)
-    process_time = perf_counter() - start_time
+    out = await db.run_sync(lambda session: crud_bed.add_bed(bed_info, session))
 
-    log_data = [process_time, body, current_user.num_document, current_user.rol]
     if out == 1:
-        await log_request(request, status.HTTP_409_CONFLICT, *log_data)
         raise exceptions.room_already_with_bed
 
-    await log_request(request, status.HTTP_201_CREATED, *log_data)
     return schemas.ApiResponse(detail="Cama agregada perfectamente")
 
 
 @router.delete("/{room}")
 async def delete_bed(
-    room: str, request: Request, current_user: Admin, db: SessionDep
+    room: str, current_user: Admin, db: AsyncSessionDep
 ) -> schemas.ApiResponse:
     """
     Elimina una cama dentro del hospital que no esté en uso, especificando el cuarto donde esté
     """
-    start_time = perf_counter()
-    out = crud_bed.delete_bed(room, db)
-    process_time = perf_counter() - start_time
+    out = await db.run_sync(lambda session: crud_bed.delete_bed(room, session))
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
     if out == 1:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.bed_not_found
 
     if out == 2:
-        await log_request(request, status.HTTP_409_CONFLICT, *log_data)
         raise exceptions.bed_already_used
 
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return schemas.ApiResponse(detail="Cama eliminada de la habitación")
@@ -1,59 +1,118 @@
-from time import perf_counter
+from datetime import date
 
-from fastapi import APIRouter, status, Request
+from fastapi import APIRouter, status, UploadFile
 
-from app.api.deps import SessionDep, Doctor, Admin, log_request
+from app.api.deps import (
+    AsyncSessionDep,
+    Doctor,
+    Admin,
+    PaginationDep,
+    UploadRoute,
+    log_body,
+    max_upload_size,
+)
 
 from app import schemas
 from app.crud import crud_consultation
 from app.api import exceptions
+from app.core.config import settings
 
-router = APIRouter(prefix="/consultations")
+router = APIRouter(prefix="/consultations", route_class=UploadRoute)
+
+IMPORT_ERRORS = {
+    1: exceptions.patient_not_found,
+    2: exceptions.doctor_not_found,
+    3: exceptions.patient_doctor_same_document,
+}
 
 
 @router.get("/", tags=["admins"])
 async def get_consultations(
-    request: Request, current_user: Admin, db: SessionDep
-) -> list[schemas.Consultation]:
+    current_user: Admin,
+    db: AsyncSessionDep,
+    pagination: PaginationDep,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    num_doc_doctor: str | None = None,
+    num_doc_patient: str | None = None,
+) -> schemas.Page[schemas.Consultation] | list[schemas.Consultation]:
     """
-    Devuelve una lista con el historial de consultas médicas
+    Devuelve el historial de consultas médicas, paginado por cursor. Con `paginate=false` se obtiene la lista
+    completa.
     """
-    start_time = perf_counter()
-    consultations = crud_consultation.get_consultations(db)
-    process_time = perf_counter() - start_time
+    consultations = await db.run_sync(
+        crud_consultation.get_consultations,
+        start_date,
+        end_date,
+        num_doc_doctor,
+        num_doc_patient,
+        pagination,
+    )
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
-    return consultations
+    return consultations if pagination is not None else consultations.items
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def add_consultation(
-    request: Request,
     current_user: Doctor,
-    db: SessionDep,
+    db: AsyncSessionDep,
     consultation_info: schemas.Consultation,
 ) -> schemas.ApiResponse:
     """
     Agrega una nueva consulta médica
     """
-    body = consultation_info.model_dump()
-    start_time = perf_counter()
-    out = crud_consultation.add_consultation(consultation_info, db)
-    process_time = perf_counter() - start_time
+    log_body(consultation_info.model_dump())
+    out = await db.run_sync(
+        lambda session: crud_consultation.add_consultation(consultation_info, session)
+    )
 
-    log_data = [process_time, body, current_user.num_document, current_user.rol]
     if out == 1:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.patient_not_found
 
     if out == 2:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.doctor_not_found
 
     if out == 3:
-        await log_request(request, status.HTTP_409_CONFLICT, *log_data)
         raise exceptions.patient_doctor_same_document
 
-    await log_request(request, status.HTTP_201_CREATED, *log_data)
     return schemas.ApiResponse(detail="Consulta médica agregada")
+
+
+@router.post("/import", tags=["admins"])
+@max_upload_size(settings.MAX_SIZE_IMPORT)
+async def import_consultations(
+    current_user: Admin,
+    db: AsyncSessionDep,
+    file: UploadFile,
+    dry_run: bool = False,
+) -> schemas.ImportResult:
+    """
+    Agrega las consultas médicas de un archivo CSV (con encabezados) o JSON lines, con los mismos campos de
+    `POST /consultations/`. Las consultas se guardan todas en una sola transacción, o ninguna si alguna fila no
+    es válida, en cuyo caso se retornan los errores de cada fila. Con `dry_run=true` solo se validan las filas.
+    """
+    log_body({"filename": file.filename, "dry_run": dry_run})
+
+    out = await crud_consultation.read_import(file, schemas.Consultation)
+    if isinstance(out, int):
+        if out == 1:
+            raise exceptions.file_too_large
+
+        raise exceptions.invalid_import_file
+
+    rows, errors = out
+    # Con filas mal formadas tampoco se guarda ninguna fila, pero se validan las demás
+    invalid = await db.run_sync(
+        lambda session: crud_consultation.import_consultations(
+            rows, session, dry_run or bool(errors)
+        )
+    )
+
+    errors += [
+        schemas.ImportRowError(line=line, detail=IMPORT_ERRORS[code].detail)
+        for line, code in invalid.items()
+    ]
+    errors.sort(key=lambda error: error.line)
+    inserted = 0 if errors or dry_run else len(rows)
+
+    return schemas.ImportResult(inserted=inserted, errors=errors)
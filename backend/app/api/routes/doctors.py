@@ -1,62 +1,52 @@
-from time import perf_counter
+from fastapi import APIRouter, status
 
-from fastapi import APIRouter, status, Request
-
-from app.api.deps import SessionDep, Admin, log_request
+from app.api.deps import AsyncSessionDep, Admin, log_body
 
 from app import schemas
 from app.api import exceptions
+from app.core.metrics import TimedRoute
 from app.crud import crud_doctor
 
-router = APIRouter(prefix="/doctors")
+router = APIRouter(prefix="/doctors", route_class=TimedRoute)
 
 
 @router.get("/")
 async def get_doctors(
-    request: Request, current_user: Admin, db: SessionDep, active: bool = True
+    current_user: Admin, db: AsyncSessionDep, active: bool = True
 ) -> list[schemas.DoctorAll]:
     """
     Obtiene la información de todos los doctores dentro del sistema
     """
-    start_time = perf_counter()
-    doctors = crud_doctor.get_doctors(db, active)
-    process_time = perf_counter() - start_time
+    doctors = await db.run_sync(crud_doctor.get_doctors, active)
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return doctors
 
 
 @router.get("/{num_document}")
 async def get_doctor(
-    request: Request,
     num_document: str,
     current_user: Admin,
-    db: SessionDep,
+    db: AsyncSessionDep,
     active: bool = True,
 ) -> schemas.DoctorAll:
     """
     Obtiene la información esencial de un doctor en particular
     """
-    start_time = perf_counter()
-    doctor = crud_doctor.get_doctor(num_document, db, active)
-    process_time = perf_counter() - start_time
+    doctor = await db.run_sync(
+        lambda session: crud_doctor.get_doctor(num_document, session, active)
+    )
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
     if doctor is None:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.doctor_not_found
 
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return doctor
 
 
 @router.post("/{num_document}", status_code=status.HTTP_201_CREATED)
 async def add_doctor_speciality(
-    request: Request,
     num_document: str,
     current_user: Admin,
-    db: SessionDep,
+    db: AsyncSessionDep,
     speciality: schemas.Speciality,
 ) -> schemas.ApiResponse:
     """
@@ -64,57 +54,48 @@ async def add_doctor_speciality(
     esencial del doctor tuvo que haber sido previamente creada. Además, el campo de `description` dentro de `speciality`
     no es necesario de agregar, únicamente cuando la especialidad no esté creada previamente en la base de datos
     """
-    body = speciality.model_dump()
+    log_body(speciality.model_dump())
 
-    start_time = perf_counter()
-    out = crud_doctor.add_doctor_speciality(num_document, db, speciality)
-    process_time = perf_counter() - start_time
-    log_data = [process_time, body, current_user.num_document, current_user.rol]
+    out = await db.run_sync(
+        lambda session: crud_doctor.add_doctor_speciality(
+            num_document, session, speciality
+        )
+    )
 
     if out == 1:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.doctor_not_found
 
     if out == 2:
-        await log_request(request, status.HTTP_400_BAD_REQUEST, *log_data)
         raise exceptions.create_speciality
 
     if out == 3:
-        await log_request(request, status.HTTP_409_CONFLICT, *log_data)
         raise exceptions.speciality_doctor_found
 
-    await log_request(request, status.HTTP_201_CREATED, *log_data)
     return schemas.ApiResponse(detail="Especialidad agregada al doctor")
 
 
 @router.delete("/{num_document}")
 async def delete_speciality(
-    request: Request,
     num_document: str,
     current_user: Admin,
-    db: SessionDep,
+    db: AsyncSessionDep,
     speciality_name: str,
 ) -> schemas.ApiResponse:
     """
     Elimina la especialidad de un doctor especificando su número de documento.
     """
-    start_time = perf_counter()
     speciality = schemas.SpecialityBase(name=speciality_name)
-    out = crud_doctor.delete_speciality(num_document, speciality, db)
-    process_time = perf_counter() - start_time
+    out = await db.run_sync(
+        lambda session: crud_doctor.delete_speciality(num_document, speciality, session)
+    )
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
     if out == 1:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.doctor_not_found
 
     if out == 2:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.speciality_not_found
 
     if out == 3:
-        await log_request(request, status.HTTP_409_CONFLICT, *log_data)
         raise exceptions.speciality_doctor_not_found
 
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return schemas.ApiResponse(detail="Especialidad borrada del doctor")
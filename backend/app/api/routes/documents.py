@@ -1,206 +1,278 @@
 import os
-from time import perf_counter
-
-from fastapi import APIRouter, status, File, UploadFile, Request
-from fastapi.responses import FileResponse
-
-from app.api.deps import Doctor, NonPatient, log_request
+import asyncio
+from collections.abc import Iterator
+from typing import Annotated
+
+from fastapi import APIRouter, status, File, Query, UploadFile
+from fastapi.responses import Response, StreamingResponse
+
+from app.api.deps import (
+    AsyncSessionDep,
+    Doctor,
+    NonPatient,
+    PaginationDep,
+    UploadRoute,
+    max_upload_size,
+)
 from app.api import exceptions
 
 from app.core.config import settings
-from app.crud import crud_document
+from app.core.db import SessionLocal
+from app.core.responses import DocumentResponse
+from app.crud import crud_document, crud_history
 
 from app import schemas
 
-router = APIRouter(prefix="/documents")
+router = APIRouter(prefix="/documents", route_class=UploadRoute)
 
 
 @router.get("/all/{num_document}")
 async def get_all_documents(
-    num_document: str, request: Request, current_user: NonPatient
+    num_document: str, current_user: NonPatient, db: AsyncSessionDep
 ) -> schemas.AllFiles:
     """
     Obtiene todos los documentos asociados a un paciente
     """
-    start_time = perf_counter()
-    documents = crud_document.get_documents(num_document)
+    documents = await db.run_sync(
+        lambda session: crud_document.get_documents(num_document, session)
+    )
     if documents is None:
         raise exceptions.patient_not_found
-    process_time = perf_counter() - start_time
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return documents
 
 
 @router.get("/all")
-async def get_all(request: Request, current_user: NonPatient) -> list[schemas.AllFiles]:
+async def get_all(
+    current_user: NonPatient,
+    db: AsyncSessionDep,
+    pagination: PaginationDep,
+) -> schemas.Page[schemas.AllFiles] | list[schemas.AllFiles]:
     """
-    Obtiene todos los documentos de todos los pacientes en un archivo .zip
+    Obtiene los documentos de todos los pacientes, paginados por cursor. Con `paginate=false` se obtiene
+    la lista completa.
     """
-    start_time = perf_counter()
-    documents: list[schemas.AllFiles] = []
-    root_path = settings.PATIENT_DOCS_PATH
-    for num_document in os.listdir(root_path):
-        if not os.path.isdir(f"{root_path}/{num_document}"):
-            continue
-        documents.append(crud_document.get_documents(num_document))
+    documents = await db.run_sync(crud_document.get_all_documents, pagination)
 
-    process_time = perf_counter() - start_time
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
-    return documents
+    return documents if pagination is not None else documents.items
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_documents(
+    current_user: NonPatient,
+    num_document: Annotated[list[str] | None, Query()] = None,
+    kind: schemas.KindDocument | None = None,
+) -> StreamingResponse:
+    """
+    Descarga en un archivo .zip los documentos de todos los pacientes, o solo de los pacientes y el tipo de
+    documento indicados. El archivo se genera mientras se envía, sin guardarlo en memoria ni en disco.
+    """
+
+    def content() -> Iterator[bytes]:
+        # La sesión de la petición se cierra antes de terminar de enviar la respuesta
+        with SessionLocal() as session:
+            yield from crud_document.export_zip(session, num_document, kind)
+
+    return StreamingResponse(
+        content(),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="documents.zip"'},
+    )
 
 
 @router.get("/histories/{num_document}", summary="Get Clinical History")
 async def download_history(
-    num_document: str, request: Request, current_user: NonPatient
-) -> FileResponse:
+    num_document: str, current_user: NonPatient, db: AsyncSessionDep
+) -> DocumentResponse:
     """
     Obtiene la historia clínica de un determinado paciente en un archivo .txt
     """
-    start_time = perf_counter()
-    file = crud_document.get_file(num_document, settings.HISTORY_FILENAME)
+    file = await db.run_sync(
+        lambda session: crud_document.get_file(
+            num_document, settings.HISTORY_FILENAME, 0, session
+        )
+    )
     if file is None:
         raise exceptions.patient_not_found
-    process_time = perf_counter() - start_time
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return file
 
 
 @router.get("/histories", summary="Get Clinical Histories")
-async def get_histories(request: Request, current_user: NonPatient) -> list[str]:
+async def get_histories(
+    current_user: NonPatient,
+    db: AsyncSessionDep,
+    pagination: PaginationDep,
+) -> schemas.Page[str] | list[str]:
+    """
+    Obtiene todas las historias clínicas de todos los pacientes, paginadas por cursor. Con `paginate=false` se
+    obtiene la lista completa.
+    """
+    histories = await db.run_sync(crud_document.get_histories, pagination)
+
+    return histories if pagination is not None else histories.items
+
+
+@router.get(
+    "/histories/{num_document}/versions", summary="Get Clinical History Versions"
+)
+async def get_history_versions(
+    num_document: str, current_user: NonPatient
+) -> list[schemas.HistoryVersion]:
+    """
+    Obtiene el listado de versiones anteriores de la historia clínica de un determinado paciente
+    """
+    versions = await asyncio.to_thread(crud_history.get_versions, num_document)
+    if versions is None:
+        raise exceptions.patient_not_found
+
+    return versions
+
+
+@router.get(
+    "/histories/{num_document}/versions/{version}",
+    summary="Get Clinical History Version",
+    response_class=Response,
+)
+async def download_history_version(
+    num_document: str, version: int, current_user: NonPatient
+) -> Response:
     """
-    Obtiene todas las historias clínicas de todos los pacientes
+    Obtiene una versión anterior de la historia clínica de un determinado paciente en un archivo .txt
     """
-    start_time = perf_counter()
-    histories = crud_document.get_histories()
-    process_time = perf_counter() - start_time
+    if crud_history.get_path(num_document) is None:
+        raise exceptions.patient_not_found
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
-    return histories
+    content = await asyncio.to_thread(crud_history.get_version, num_document, version)
+    if content is None:
+        raise exceptions.history_version_not_found
+
+    name, ext = os.path.splitext(settings.HISTORY_FILENAME)
+    filename = f"{name}_{version}{ext}"
+    return Response(
+        content,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/orders/{num_document}")
 async def get_orders(
-    num_document: str, request: Request, current_user: NonPatient
+    num_document: str, current_user: NonPatient, db: AsyncSessionDep
 ) -> schemas.Files:
     """
     Obtiene todas las órdenes médicas de un determinado paciente
     """
-    start_time = perf_counter()
-    orders = crud_document.get_files(num_document, "orders")
+    orders = await db.run_sync(
+        lambda session: crud_document.get_files(num_document, "orders", session)
+    )
     if orders is None:
         raise exceptions.patient_not_found
-    process_time = perf_counter() - start_time
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return orders
 
 
 @router.get("/orders/{num_document}/{filename}")
 async def download_order(
-    num_document: str, filename: str, request: Request, current_user: NonPatient
-) -> FileResponse:
+    num_document: str,
+    filename: str,
+    current_user: NonPatient,
+    db: AsyncSessionDep,
+) -> DocumentResponse:
     """
     Obtiene un archivo de una orden médica de un determinado paciente
     """
-    start_time = perf_counter()
-    file = crud_document.get_file(num_document, filename, 1)
+    file = await db.run_sync(
+        lambda session: crud_document.get_file(num_document, filename, 1, session)
+    )
     if file is None:
-        raise exceptions.patient_not_found
-    process_time = perf_counter() - start_time
+        raise exceptions.failed_to_found_file
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return file
 
 
 @router.get("/results/{num_document}")
 async def get_results(
-    num_document: str, request: Request, current_user: NonPatient
+    num_document: str, current_user: NonPatient, db: AsyncSessionDep
 ) -> schemas.Files:
     """
     Obtiene todos los resultados de los examenes médicos para un determinado paciente
     """
-    start_time = perf_counter()
-    results = crud_document.get_files(num_document, "results")
+    results = await db.run_sync(
+        lambda session: crud_document.get_files(num_document, "results", session)
+    )
     if results is None:
         raise exceptions.patient_not_found
-    process_time = perf_counter() - start_time
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return results
 
 
 @router.get("/results/{num_document}/{filename}")
 async def download_result(
-    num_document: str, filename: str, request: Request, current_user: NonPatient
-) -> FileResponse:
+    num_document: str,
+    filename: str,
+    current_user: NonPatient,
+    db: AsyncSessionDep,
+) -> DocumentResponse:
     """
     Obtiene un archivo de un resultado médico de un determinado paciente
     """
-    start_time = perf_counter()
-    file = crud_document.get_file(num_document, filename, 2)
+    file = await db.run_sync(
+        lambda session: crud_document.get_file(num_document, filename, 2, session)
+    )
     if file is None:
-        raise exceptions.patient_not_found
-    process_time = perf_counter() - start_time
+        raise exceptions.failed_to_found_file
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return file
 
 
 @router.put("/histories/{num_document}", summary="Update Clinical History")
+@max_upload_size(settings.MAX_SIZE_HISTORY)
 async def update_history(
     num_document: str,
-    request: Request,
     current_user: Doctor,
+    db: AsyncSessionDep,
     history: UploadFile = File(...),
 ) -> schemas.ApiResponse:
     """
     Actualiza la historia clínica de un determinado paciente
     """
-    start_time = perf_counter()
     if os.path.splitext(history.filename)[1] not in settings.ALLOWED_EXTENSIONS_HISTORY:
         print(1, history.filename)
         raise exceptions.file_extention_not_allowed
 
-    out = await crud_document.update_history(num_document, history)
-    process_time = perf_counter() - start_time
+    out = await crud_document.update_history(
+        num_document, history, db, current_user.num_document
+    )
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
     if out == 1:
-        await log_request(request, status.HTTP_500_INTERNAL_SERVER_ERROR, *log_data)
         raise exceptions.failed_to_save_historial
     if out == 2:
-        await log_request(request, status.HTTP_500_INTERNAL_SERVER_ERROR, *log_data)
         raise exceptions.failed_to_save_file
     if out == 3:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.patient_not_found
+    if out == 4:
+        raise exceptions.file_too_large
 
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return schemas.ApiResponse(detail="Historia clínica actualizada correctamente")
 
 
 @router.post("/{num_document}", status_code=status.HTTP_201_CREATED)
+@max_upload_size(
+    lambda request: settings.MAX_SIZE_ORDERS
+    if request.query_params.get("kind") == "orders"
+    else settings.MAX_SIZE_RESULTS
+)
 async def add_file(
     num_document: str,
     kind: schemas.KindFiles,
-    request: Request,
     current_user: Doctor,
+    db: AsyncSessionDep,
     file: UploadFile = File(...),
 ) -> schemas.ApiResponse:
     """
     Agrega un documento médico (ya sea orden o resultados de un examen) a un determinado paciente
     """
-    start_time = perf_counter()
     allowed_extensions = (
         settings.ALLOWED_EXTENSIONS_ORDERS
         if kind == "orders"
@@ -210,18 +282,17 @@ async def add_file(
     if os.path.splitext(file.filename)[1] not in allowed_extensions:
         raise exceptions.file_extention_not_allowed
 
-    out = await crud_document.add_file(num_document, kind, file)
-    process_time = perf_counter() - start_time
+    out = await crud_document.add_file(
+        num_document, kind, file, db, current_user.num_document
+    )
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
     if out == 1:
-        await log_request(request, status.HTTP_500_INTERNAL_SERVER_ERROR, *log_data)
-        raise exceptions.failed_to_save_order
+        raise exceptions.failed_to_save_file
     if out == 2:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.patient_not_found
+    if out == 3:
+        raise exceptions.file_too_large
 
-    await log_request(request, status.HTTP_201_CREATED, *log_data)
     return schemas.ApiResponse(detail="Archivo agregado correctamente")
 
 
@@ -230,26 +301,21 @@ async def delete_file(
     num_document: str,
     filename: str,
     kind: schemas.KindFiles,
-    request: Request,
     current_user: NonPatient,
+    db: AsyncSessionDep,
 ) -> schemas.ApiResponse:
     """
     Elimina un archivo médico de un determinado paciente (no incluye la historia clínica)
     """
-    start_time = perf_counter()
-    out = crud_document.delete_file(num_document, filename, kind)
-    process_time = perf_counter() - start_time
+    out = await db.run_sync(
+        lambda session: crud_document.delete_file(num_document, filename, kind, session)
+    )
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
     if out == 1:
-        await log_request(request, status.HTTP_500_INTERNAL_SERVER_ERROR, *log_data)
         raise exceptions.failed_to_found_file
     if out == 2:
-        await log_request(request, status.HTTP_500_INTERNAL_SERVER_ERROR, *log_data)
         raise exceptions.failed_to_delete_file
     if out == 3:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.patient_not_found
 
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return schemas.ApiResponse(detail="Archivo eliminado correctamente")
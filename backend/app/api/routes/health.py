@@ -0,0 +1,39 @@
+from time import perf_counter
+
+from fastapi import APIRouter, Response, status
+
+import sqlalchemy.exc
+from sqlalchemy import text
+
+from app.api.deps import AsyncSessionDep
+
+from app import schemas
+from app.core.db import async_engine, engine
+from app.core.metrics import TimedRoute
+
+router = APIRouter(prefix="/health", route_class=TimedRoute)
+
+
+@router.get("/db")
+async def get_db_health(
+    response: Response, db: AsyncSessionDep
+) -> schemas.DatabaseHealth:
+    """
+    Verifica que la base de datos responda y devuelve el estado de los pools de conexiones: conexiones en uso,
+    en exceso y el tiempo de espera por una conexión.
+    """
+    start_time = perf_counter()
+    try:
+        await db.execute(text("SELECT 1"))
+        db_status = "ok"
+    except (sqlalchemy.exc.OperationalError, sqlalchemy.exc.TimeoutError):
+        db_status = "unavailable"
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    latency = perf_counter() - start_time
+
+    return schemas.DatabaseHealth(
+        status=db_status,
+        latency_ms=round(latency * 1000, 2),
+        api_pool=schemas.PoolStatus(**async_engine.sync_engine.pool.stats()),
+        sync_pool=schemas.PoolStatus(**engine.pool.stats()),
+    )
@@ -1,100 +1,167 @@
-from time import perf_counter
+from datetime import date
 
-from fastapi import APIRouter, status, Request
+from fastapi import APIRouter, status, UploadFile
 
-from app.api.deps import SessionDep, Doctor, Admin, log_request
+from app.api.deps import (
+    AsyncSessionDep,
+    Doctor,
+    Admin,
+    PaginationDep,
+    UploadRoute,
+    log_body,
+    max_upload_size,
+)
 
 from app import schemas
 from app.crud import crud_hospitalization
 from app.api import exceptions
+from app.core.config import settings
 
-router = APIRouter(prefix="/hospitalizations")
+router = APIRouter(prefix="/hospitalizations", route_class=UploadRoute)
+
+IMPORT_ERRORS = {
+    1: exceptions.patient_not_found,
+    2: exceptions.doctor_not_found,
+    3: exceptions.patient_doctor_same_document,
+    4: exceptions.bed_not_found,
+    5: exceptions.bed_already_used,
+    6: exceptions.patient_already_hospitalized,
+    7: exceptions.speciality_doctor_not_found,
+    8: exceptions.bad_date_formatting,
+}
 
 
 @router.get("/", tags=["admins"])
 async def get_hospitalizations(
-    request: Request, current_user: Admin, db: SessionDep
-) -> list[schemas.Hospitalization]:
+    current_user: Admin,
+    db: AsyncSessionDep,
+    pagination: PaginationDep,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    num_doc_doctor: str | None = None,
+    num_doc_patient: str | None = None,
+    active: bool | None = None,
+) -> schemas.Page[schemas.Hospitalization] | list[schemas.Hospitalization]:
     """
-    Devuelve una lista con el historial de hospitalizaciones
+    Devuelve el historial de hospitalizaciones, paginado por cursor. Con `paginate=false` se obtiene la lista
+    completa.
     """
-    start_time = perf_counter()
-    hospitalizations = crud_hospitalization.get_hospitalizations(db)
-    process_time = perf_counter() - start_time
+    hospitalizations = await db.run_sync(
+        crud_hospitalization.get_hospitalizations,
+        start_date,
+        end_date,
+        num_doc_doctor,
+        num_doc_patient,
+        active,
+        pagination,
+    )
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
-    return hospitalizations
+    return hospitalizations if pagination is not None else hospitalizations.items
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def add_hospitalization(
-    request: Request,
     current_user: Doctor,
-    db: SessionDep,
+    db: AsyncSessionDep,
     hospitalization_info: schemas.RegisterHospitalization,
 ) -> schemas.ApiResponse:
     """
     Agrega una nueva hospitalización
     """
-    start_time = perf_counter()
-    out = crud_hospitalization.add_hospitalization(hospitalization_info, db)
-    process_time = perf_counter() - start_time
+    out = await db.run_sync(
+        lambda session: crud_hospitalization.add_hospitalization(
+            hospitalization_info, session
+        )
+    )
 
-    body = hospitalization_info.model_dump()
-    log_data = [process_time, body, current_user.num_document, current_user.rol]
+    log_body(hospitalization_info.model_dump())
     if out == 1:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.patient_not_found
 
     if out == 2:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.doctor_not_found
 
     if out == 3:
-        await log_request(request, status.HTTP_409_CONFLICT, *log_data)
         raise exceptions.patient_doctor_same_document
 
     if out == 4:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.bed_not_found
 
     if out == 5:
-        await log_request(request, status.HTTP_409_CONFLICT, *log_data)
         raise exceptions.bed_already_used
 
     if out == 6:
-        await log_request(request, status.HTTP_409_CONFLICT, *log_data)
         raise exceptions.patient_already_hospitalized
 
-    await log_request(request, status.HTTP_201_CREATED, *log_data)
+    if out == 7:
+        raise exceptions.speciality_doctor_not_found
+
     return schemas.ApiResponse(detail="Hospitalización agregada")
 
 
 @router.put("/{num_doc_patient}")
 async def discharge_hospitalization(
     num_doc_patient: str,
-    request: Request,
     current_user: Doctor,
-    db: SessionDep,
+    db: AsyncSessionDep,
     last_day: schemas.DischargeHospitalization,
 ) -> schemas.ApiResponse:
     """
     Da el alta a un determinado paciente que esté actualmente hospitalizado
     """
-    start_time = perf_counter()
-    out = crud_hospitalization.discharge_hospitalization(num_doc_patient, last_day, db)
-    process_time = perf_counter() - start_time
+    out = await db.run_sync(
+        lambda session: crud_hospitalization.discharge_hospitalization(
+            num_doc_patient, last_day, session
+        )
+    )
 
-    body = last_day.model_dump()
-    log_data = [process_time, body, current_user.num_document, current_user.rol]
+    log_body(last_day.model_dump())
     if out == 1:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.patient_not_found
 
     if out == 2:
-        await log_request(request, status.HTTP_400_BAD_REQUEST, *log_data)
         raise exceptions.bad_date_formatting
 
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return schemas.ApiResponse(detail="Paciente dado de alta del sistema")
+
+
+@router.post("/import", tags=["admins"])
+@max_upload_size(settings.MAX_SIZE_IMPORT)
+async def import_hospitalizations(
+    current_user: Admin,
+    db: AsyncSessionDep,
+    file: UploadFile,
+    dry_run: bool = False,
+) -> schemas.ImportResult:
+    """
+    Agrega las hospitalizaciones de un archivo CSV (con encabezados) o JSON lines, con los mismos campos de
+    `POST /hospitalizations/` y opcionalmente `last_day` para las hospitalizaciones que ya fueron dadas de alta
+    (las cuales no ocupan la cama). Las hospitalizaciones se guardan todas en una sola transacción, o ninguna si
+    alguna fila no es válida, en cuyo caso se retornan los errores de cada fila. Con `dry_run=true` solo se
+    validan las filas.
+    """
+    log_body({"filename": file.filename, "dry_run": dry_run})
+
+    out = await crud_hospitalization.read_import(file, schemas.ImportHospitalization)
+    if isinstance(out, int):
+        if out == 1:
+            raise exceptions.file_too_large
+
+        raise exceptions.invalid_import_file
+
+    rows, errors = out
+    # Con filas mal formadas tampoco se guarda ninguna fila, pero se validan las demás
+    invalid = await db.run_sync(
+        lambda session: crud_hospitalization.import_hospitalizations(
+            rows, session, dry_run or bool(errors)
+        )
+    )
+
+    errors += [
+        schemas.ImportRowError(line=line, detail=IMPORT_ERRORS[code].detail)
+        for line, code in invalid.items()
+    ]
+    errors.sort(key=lambda error: error.line)
+    inserted = 0 if errors or dry_run else len(rows)
+
+    return schemas.ImportResult(inserted=inserted, errors=errors)
@@ -0,0 +1,119 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import audit_log
+from app.core.cache import principal_cache
+from app.core.db import async_engine, engine
+from app.core.events import bed_board
+from app.core.metrics import CallbackMetric, TimedRoute, metrics
+
+router = APIRouter(route_class=TimedRoute)
+
+POOLS = {"api": async_engine.sync_engine.pool, "sync": engine.pool}
+
+
+def pool_stats(*keys: str, scale: float | None = None) -> dict[tuple[str, ...], float]:
+    # Un valor por pool y por cada llave de `MonitoredPool.stats`
+    result = {}
+    for name, pool in POOLS.items():
+        stats = pool.stats()
+        for key in keys:
+            label = (name, key) if len(keys) > 1 else (name,)
+            result[label] = stats[key] * scale if scale is not None else stats[key]
+
+    return result
+
+
+def cache_requests(stats: dict[str, int]) -> dict[tuple[str, ...], float]:
+    return {("hit",): stats["hits"], ("miss",): stats["misses"]}
+
+
+metrics.register(
+    CallbackMetric(
+        "audit_log_queue_size",
+        "Registros del historial de la API pendientes por guardar en mongodb.",
+        lambda: {(): audit_log.queue_size()},
+    )
+)
+metrics.register(
+    CallbackMetric(
+        "audit_log_records_total",
+        "Registros del historial de la API por resultado.",
+        lambda: {
+            (key,): value
+            for key, value in audit_log.stats().items()
+            if key != "queue_size"
+        },
+        ("result",),
+        "counter",
+    )
+)
+metrics.register(
+    CallbackMetric(
+        "principal_cache_requests_total",
+        "Consultas a la caché de usuarios autenticados por resultado.",
+        lambda: cache_requests(principal_cache.stats()),
+        ("result",),
+        "counter",
+    )
+)
+metrics.register(
+    CallbackMetric(
+        "principal_cache_size",
+        "Usuarios en la caché de usuarios autenticados.",
+        lambda: {(): len(principal_cache)},
+    )
+)
+metrics.register(
+    CallbackMetric(
+        "db_pool_connections",
+        "Conexiones de cada pool de Postgresql por estado.",
+        lambda: pool_stats("checked_out", "checked_in", "overflow"),
+        ("pool", "state"),
+    )
+)
+metrics.register(
+    CallbackMetric(
+        "db_pool_checkouts_total",
+        "Conexiones entregadas por cada pool de Postgresql.",
+        lambda: pool_stats("checkouts"),
+        ("pool",),
+        "counter",
+    )
+)
+metrics.register(
+    CallbackMetric(
+        "db_pool_timeouts_total",
+        "Veces que se agotó el tiempo de espera por una conexión de cada pool.",
+        lambda: pool_stats("timeouts"),
+        ("pool",),
+        "counter",
+    )
+)
+metrics.register(
+    CallbackMetric(
+        "db_pool_max_wait_seconds",
+        "Tiempo máximo de espera por una conexión de cada pool.",
+        lambda: pool_stats("max_wait_ms", scale=0.001),
+        ("pool",),
+    )
+)
+metrics.register(
+    CallbackMetric(
+        "bed_board_subscribers",
+        "Clientes conectados al tablero de camas.",
+        lambda: {(): bed_board.subscribers()},
+    )
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Métricas del proceso en el formato de texto de Prometheus: latencia de las peticiones por plantilla de ruta
+    y código de estado, consultas a Postgresql por petición, cola del historial de la API, caché de usuarios
+    autenticados y pools de conexiones.
+    """
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,202 +1,190 @@
-from time import perf_counter
 from typing import Literal
 
-from fastapi import APIRouter, status, Request
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, status
 
-from app.api.deps import SessionDep, Patient, NonPatient, Admin, log_request
+from app.api.deps import (
+    AsyncSessionDep,
+    Patient,
+    NonPatient,
+    Admin,
+    PaginationDep,
+    log_body,
+)
 
 from app import schemas
 from app.api import exceptions
+from app.core.metrics import TimedRoute
+from app.core.responses import DocumentResponse
 from app.crud import crud_patient, crud_document
 
-router = APIRouter(prefix="/patients")
+router = APIRouter(prefix="/patients", route_class=TimedRoute)
 
 
 @router.get("/documents")
-async def get_documents(request: Request, current_user: Patient) -> schemas.AllFiles:
+async def get_documents(current_user: Patient, db: AsyncSessionDep) -> schemas.AllFiles:
     """
     Devuelve todos los documentos asociados del paciente
     """
-    start_time = perf_counter()
-    documents = crud_document.get_documents(current_user.num_document)
-    process_time = perf_counter() - start_time
+    documents = await db.run_sync(
+        lambda session: crud_document.get_documents(current_user.num_document, session)
+    )
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return documents
 
 
 @router.get("/documents/{filename}")
 async def download_document(
-    filename: str, request: Request, current_user: Patient, kind: Literal["0", "1", "2"]
-) -> FileResponse:
+    filename: str,
+    current_user: Patient,
+    kind: Literal["0", "1", "2"],
+    db: AsyncSessionDep,
+) -> DocumentResponse:
     """
     Descarga el archivo deseado por el paciente
     """
-    start_time = perf_counter()
     kind = int(kind)
-    file = crud_document.get_file(current_user.num_document, filename, kind)
-    process_time = perf_counter() - start_time
+    file = await db.run_sync(
+        lambda session: crud_document.get_file(
+            current_user.num_document, filename, kind, session
+        )
+    )
+
+    if file is None:
+        raise exceptions.failed_to_found_file
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return file
 
 
 @router.get("/responsable")
 async def get_patient_info(
-    request: Request, current_user: Patient, db: SessionDep
+    current_user: Patient, db: AsyncSessionDep
 ) -> schemas.PatientAll:
     """
     Devuelve toda la información del paciente, incluyendo la de los responsables
     """
-    start_time = perf_counter()
-    patient = crud_patient.get_patient(current_user.num_document, db)
-    process_time = perf_counter() - start_time
+    patient = await db.run_sync(
+        lambda session: crud_patient.get_patient(current_user.num_document, session)
+    )
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
     if patient is None:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.patient_not_found
 
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return patient
 
 
 @router.get("/")
 async def get_patients(
-    request: Request, current_user: Admin, db: SessionDep, active: bool = True
-) -> list[schemas.PatientAll]:
+    current_user: Admin,
+    db: AsyncSessionDep,
+    pagination: PaginationDep,
+    active: bool = True,
+) -> schemas.Page[schemas.PatientAll] | list[schemas.PatientAll]:
     """
-    Obtiene todos los pacientes que están dentro del sistema
+    Obtiene todos los pacientes que están dentro del sistema, paginados por cursor. Con `paginate=false` se obtiene
+    la lista completa.
     """
-    start_time = perf_counter()
-    patients = crud_patient.get_patients(db, active)
-    process_time = perf_counter() - start_time
+    patients = await db.run_sync(crud_patient.get_patients, active, pagination)
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
-    await log_request(request, status.HTTP_200_OK, *log_data)
-    return patients
+    return patients if pagination is not None else patients.items
 
 
 @router.get("/{num_document}")
 async def get_patient(
     num_document: str,
-    request: Request,
     current_user: NonPatient,
-    db: SessionDep,
+    db: AsyncSessionDep,
     active: bool = True,
 ) -> schemas.PatientAll:
     """
     Obtiene toda la información de un paciente especificando su número de documento
     """
-    start_time = perf_counter()
-    patient = crud_patient.get_patient(num_document, db, active)
-    process_time = perf_counter() - start_time
+    patient = await db.run_sync(
+        lambda session: crud_patient.get_patient(num_document, session, active)
+    )
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
     if patient is None:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.patient_not_found
 
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return patient
 
 
 @router.post("/{num_document}", status_code=status.HTTP_201_CREATED)
 async def add_responsable(
     num_document: str,
-    request: Request,
     current_user: NonPatient,
-    db: SessionDep,
+    db: AsyncSessionDep,
     responsable_info: schemas.ResponsablesInfo,
 ) -> schemas.ApiResponse:
     """
     Agrega información del responsable de un paciente
     """
-    start_time = perf_counter()
-    out = crud_patient.add_responsable(num_document, responsable_info, db)
-    process_time = perf_counter() - start_time
+    out = await db.run_sync(
+        lambda session: crud_patient.add_responsable(
+            num_document, responsable_info, session
+        )
+    )
 
-    body = responsable_info.model_dump()
-    log_data = [process_time, body, current_user.num_document, current_user.rol]
+    log_body(responsable_info.model_dump())
     if out == 1:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.patient_not_found
 
     if out == 2:
-        await log_request(request, status.HTTP_400_BAD_REQUEST, *log_data)
         raise exceptions.patient_cannot_be_his_responsable
 
     if out == 3:
-        await log_request(request, status.HTTP_409_CONFLICT, *log_data)
         raise exceptions.patient_cannot_be_responsable
 
     if out == 4:
-        await log_request(request, status.HTTP_409_CONFLICT, *log_data)
         raise exceptions.responsable_found
 
-    await log_request(request, status.HTTP_201_CREATED, *log_data)
     return schemas.ApiResponse(detail="Información del responsable agregada")
 
 
 @router.put("/{num_document}")
 async def update_responsable(
     num_document: str,
-    request: Request,
     current_user: NonPatient,
-    db: SessionDep,
+    db: AsyncSessionDep,
     updated_info: schemas.ResponsablesInfo,
 ) -> schemas.ApiResponse:
     """
     Actualiza la información del responsable dado un determinado paciente
     """
-    start_time = perf_counter()
-    out = crud_patient.update_patient(num_document, updated_info, db)
-    process_time = perf_counter() - start_time
+    out = await db.run_sync(
+        lambda session: crud_patient.update_patient(num_document, updated_info, session)
+    )
 
-    body = updated_info.model_dump()
-    log_data = [process_time, body, current_user.num_document, current_user.rol]
+    log_body(updated_info.model_dump())
     if out == 1:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.patient_not_found
 
     if out == 2:
-        await log_request(request, status.HTTP_400_BAD_REQUEST, *log_data)
         raise exceptions.patient_cannot_be_his_responsable
 
     if out == 3:
-        await log_request(request, status.HTTP_409_CONFLICT, *log_data)
         raise exceptions.patient_cannot_be_responsable
 
     if out == 4:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.responsable_not_found
 
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return schemas.ApiResponse(detail="Información del responsable actualizada")
 
 
 @router.delete("/{num_document}")
 async def delete_responsable(
-    num_document: str, request: Request, current_user: NonPatient, db: SessionDep
+    num_document: str, current_user: NonPatient, db: AsyncSessionDep
 ) -> schemas.ApiResponse:
     """
     Elimina la información del responsable de un paciente
     """
-    start_time = perf_counter()
-    out = crud_patient.delete_responsable(num_document, db)
-    process_time = perf_counter() - start_time
+    out = await db.run_sync(
+        lambda session: crud_patient.delete_responsable(num_document, session)
+    )
 
-    log_data = [process_time, None, current_user.num_document, current_user.rol]
     if out == 1:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.patient_not_found
 
     if out == 2:
-        await log_request(request, status.HTTP_404_NOT_FOUND, *log_data)
         raise exceptions.responsable_not_found
 
-    await log_request(request, status.HTTP_200_OK, *log_data)
     return schemas.ApiResponse(detail="Información del responsable eliminada")
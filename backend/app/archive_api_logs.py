@@ -0,0 +1,29 @@
+import logging
+
+from app.api.deps import collection
+from app.core.config import settings
+from app.crud import crud_api_log
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    logger.info("Moviendo el historial de la API a las particiones por mes")
+    n_logs = crud_api_log.migrate(collection)
+    logger.info(f"Registros movidos: {n_logs}")
+
+    n_partitions = crud_api_log.create_indexes(collection)
+    logger.info(f"Particiones del historial de la API: {n_partitions}")
+
+    logger.info("Archivando los meses antiguos del historial de la API")
+    files = crud_api_log.archive(
+        collection,
+        settings.API_LOGS_ARCHIVE_PATH,
+        settings.MONGO_LOG_RETENTION_MONTHS,
+    )
+    logger.info(f"Meses archivados: {len(files)}")
+
+
+if __name__ == "__main__":
+    main()
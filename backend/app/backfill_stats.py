@@ -0,0 +1,27 @@
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.crud import crud_daily_stats
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def init() -> int:
+    session: Session = SessionLocal()
+    try:
+        return crud_daily_stats.backfill(session)
+    finally:
+        session.close()
+
+
+def main() -> None:
+    logger.info("Reconstruyendo el resumen diario del hospital")
+    days = init()
+    logger.info(f"Resumen diario del hospital reconstruido: {days} días")
+
+
+if __name__ == "__main__":
+    main()
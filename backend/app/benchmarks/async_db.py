@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from time import perf_counter
+
+import aiosqlite
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import schemas
+from app.core.config import settings
+from app.core.db import BaseModel, MonitoredAsyncQueuePool, MonitoredQueuePool
+from app.crud import crud_user
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Latencia simulada de una consulta típica de la API en Postgres
+delay = 0.02
+user_search = schemas.UserSearch(num_document="123", rol="patient")
+path = os.path.join(tempfile.mkdtemp(), "async_db.sqlite")
+
+
+def slow_statement(statement: str) -> None:
+    # SQLite llama esta función en el hilo que ejecuta la consulta: el ciclo de eventos en la sesión
+    # síncrona y el hilo de aiosqlite en la asíncrona, como el driver de Postgres espera la respuesta
+    if statement.lstrip().upper().startswith("SELECT"):
+        time.sleep(delay)
+
+
+def sync_connect() -> sqlite3.Connection:
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.set_trace_callback(slow_statement)
+    return connection
+
+
+async def async_connect() -> aiosqlite.Connection:
+    connection = await aiosqlite.connect(path)
+    await connection.set_trace_callback(slow_statement)
+    return connection
+
+
+# Los mismos pools que la API para que la concurrencia quede limitada igual
+pool_options = dict(
+    pool_size=settings.POSTGRES_POOL_SIZE, max_overflow=settings.POSTGRES_MAX_OVERFLOW
+)
+engine = create_engine(
+    "sqlite://", creator=sync_connect, poolclass=MonitoredQueuePool, **pool_options
+)
+async_engine = create_async_engine(
+    "sqlite+aiosqlite://",
+    async_creator=async_connect,
+    poolclass=MonitoredAsyncQueuePool,
+    **pool_options,
+)
+SessionLocal = sessionmaker(autoflush=True, bind=engine)
+AsyncSessionLocal = async_sessionmaker(autoflush=True, bind=async_engine)
+
+
+async def sync_request() -> None:
+    # Como lo hacían las rutas: la sesión síncrona bloquea el ciclo de eventos
+    with SessionLocal() as db:
+        crud_user.get_user_rol(user_search, db)
+
+
+async def async_request() -> None:
+    # Como lo hacen las rutas: el mismo código CRUD sobre el driver asíncrono
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(lambda session: crud_user.get_user_rol(user_search, session))
+
+
+async def measure(request, concurrency: int) -> float:
+    start_time = perf_counter()
+    await asyncio.gather(*(request() for _ in range(concurrency)))
+    return perf_counter() - start_time
+
+
+async def run() -> None:
+    # Calentar ambos pools para no medir la creación de las conexiones
+    await measure(sync_request, 5)
+    await measure(async_request, 5)
+
+    for concurrency in (1, 5, 10, 50):
+        sync_time = await measure(sync_request, concurrency)
+        async_time = await measure(async_request, concurrency)
+        logger.info(
+            f"{concurrency} peticiones concurrentes: "
+            f"síncrona {sync_time:.3f} s, asíncrona {async_time:.3f} s "
+            f"(x{sync_time / async_time:.1f})"
+        )
+
+    await async_engine.dispose()
+
+
+def main() -> None:
+    BaseModel.metadata.create_all(engine)
+    try:
+        asyncio.run(run())
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
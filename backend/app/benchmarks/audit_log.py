@@ -0,0 +1,84 @@
+import logging
+from datetime import datetime
+from typing import Any
+
+import bson
+
+from app.core.audit import compact_log, filter_headers
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Cabeceras de una petición típica del frontend
+HEADERS: dict[str, str] = {
+    "host": "localhost:8000",
+    "connection": "keep-alive",
+    "content-length": "96",
+    "sec-ch-ua": '"Chromium";v="128", "Not;A=Brand";v="24", "Google Chrome";v="128"',
+    "accept": "application/json, text/plain, */*",
+    "content-type": "application/json",
+    "authorization": "Bearer " + "x" * 180,
+    "sec-ch-ua-mobile": "?0",
+    "user-agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/128.0.0.0 Safari/537.36"
+    ),
+    "sec-ch-ua-platform": '"Linux"',
+    "origin": "http://localhost:5173",
+    "sec-fetch-site": "same-site",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-dest": "empty",
+    "referer": "http://localhost:5173/",
+    "accept-encoding": "gzip, deflate, br, zstd",
+    "accept-language": "es-CO,es;q=0.9,en;q=0.8",
+}
+
+
+def previous_log(timestamp: datetime) -> dict[str, Any]:
+    # Forma anterior: todas las cabeceras y la URL sin plantilla
+    return {
+        "username": "1234567890",
+        "rol": "doctor",
+        "timestamp": timestamp,
+        "method": "GET",
+        "url": "/api/v1/patients/1098765432",
+        "headers": HEADERS,
+        "body": None,
+        "process_time_ms": 12.34,
+        "status_code": 200,
+    }
+
+
+def current_log(timestamp: datetime) -> dict[str, Any]:
+    return compact_log(
+        {
+            "username": "1234567890",
+            "rol": "doctor",
+            "timestamp": timestamp,
+            "method": "GET",
+            "route": "/api/v1/patients/{num_document}",
+            "path_params": {"num_document": "1098765432"},
+            "headers": filter_headers(HEADERS, settings.MONGO_LOG_HEADERS),
+            "body": None,
+            "process_time_ms": 12.34,
+            "status_code": 200,
+        }
+    )
+
+
+def main() -> None:
+    timestamp = datetime.now()
+    previous = len(bson.encode(previous_log(timestamp)))
+    current = len(bson.encode(current_log(timestamp)))
+
+    logger.info(f"registro anterior: {previous} bytes")
+    logger.info(f"registro compacto: {current} bytes (x{previous / current:.1f} menor)")
+    logger.info(
+        f"1 millón de peticiones: {previous / 2**20 * 1e6 / 1024:.2f} GiB "
+        f"antes, {current / 2**20 * 1e6 / 1024:.2f} GiB ahora"
+    )
+
+
+if __name__ == "__main__":
+    main()
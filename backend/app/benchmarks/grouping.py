@@ -0,0 +1,98 @@
+import datetime
+import logging
+from time import perf_counter
+from typing import Any, Callable
+
+from app.crud.base import CRUDBase
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+crud = CRUDBase()
+
+
+def random_rows(n_users: int, roles_per_user: int = 2) -> list[tuple[Any, ...]]:
+    """
+    Genera filas con la forma de `join_users`, ordenadas por número de documento como las retorna la consulta.
+    """
+    roles = ["admin", "doctor", "patient"]
+    return [
+        (
+            f"{i:09d}",
+            "cc",
+            "Nombre",
+            "Apellido",
+            "M",
+            datetime.date(2000, 1, 1),
+            None,
+            None,
+            None,
+            roles[j],
+            True,
+        )
+        for i in range(n_users)
+        for j in range(roles_per_user)
+    ]
+
+
+def random_doctor_rows(
+    n_doctors: int, specialities_per_doctor: int = 2
+) -> list[tuple[Any, ...]]:
+    """
+    Genera filas con la forma de `join_doctors`, ordenadas por número de documento como las retorna la consulta.
+    """
+    return [
+        row[:-2] + (True, f"especialidad_{j}")
+        for row in random_rows(n_doctors, 1)
+        for j in range(specialities_per_doctor)
+    ]
+
+
+def quadratic_group_users(rows: list[tuple[Any, ...]], rol: bool = False) -> list:
+    # Agrupación anterior: filtra todas las filas por cada número de documento
+    result = []
+    for num_document in set(map(lambda row: row[0], rows)):
+        data = list(filter(lambda row: row[0] == num_document, rows))
+        userbase = crud.create_user_base(data[0])
+        if rol:
+            roles = list(map(lambda row: (row[-2], row[-1]), data))
+            result.append((userbase, roles))
+        else:
+            result.append(userbase)
+
+    return result
+
+
+def measure(function: Callable[..., list], *args: Any) -> float:
+    start_time = perf_counter()
+    function(*args)
+    return perf_counter() - start_time
+
+
+def main() -> None:
+    previous: float | None = None
+    for n_users in (1_000, 10_000, 100_000):
+        rows = random_rows(n_users)
+        elapsed = measure(crud.group_users, rows, True)
+        growth = f"x{elapsed / previous:.1f}" if previous else "-"
+        logger.info(f"group_users: {n_users} usuarios en {elapsed:.3f} s ({growth})")
+        previous = elapsed
+
+    previous = None
+    for n_doctors in (1_000, 10_000, 100_000):
+        rows = random_doctor_rows(n_doctors)
+        elapsed = measure(crud.group_doctors, rows)
+        growth = f"x{elapsed / previous:.1f}" if previous else "-"
+        logger.info(
+            f"group_doctors: {n_doctors} doctores en {elapsed:.3f} s ({growth})"
+        )
+        previous = elapsed
+
+    # Más allá de unos miles de usuarios la agrupación anterior tarda minutos
+    for n_users in (1_000, 5_000):
+        elapsed = measure(quadratic_group_users, random_rows(n_users), True)
+        logger.info(f"agrupación anterior: {n_users} usuarios en {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
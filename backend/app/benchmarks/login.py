@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from time import perf_counter
+
+from app.core.config import settings
+from app.core.security import (
+    get_password_hash,
+    verify_password,
+    verify_password_async,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+password = "contraseña"
+hashed_password = get_password_hash(password)
+
+
+async def inline_login() -> None:
+    # Como se hacía antes: bcrypt dentro del ciclo de eventos
+    verify_password(password, hashed_password)
+
+
+async def offloaded_login() -> None:
+    await verify_password_async(password, hashed_password)
+
+
+async def other_requests(stop: asyncio.Event) -> list[float]:
+    """
+    Simula otras peticiones livianas durante el inicio de sesión masivo y mide cuánto tardan en ser atendidas
+    """
+    latencies: list[float] = []
+    while not stop.is_set():
+        start_time = perf_counter()
+        await asyncio.sleep(0.005)
+        latencies.append(perf_counter() - start_time - 0.005)
+
+    return latencies
+
+
+async def login_storm(login, n_logins: int) -> tuple[float, float, float]:
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(other_requests(stop))
+    await asyncio.sleep(0)
+
+    start_time = perf_counter()
+    await asyncio.gather(*(login() for _ in range(n_logins)))
+    elapsed = perf_counter() - start_time
+
+    stop.set()
+    latencies = sorted(await ticker)
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else elapsed
+
+    return n_logins / elapsed, max(latencies, default=elapsed), p99
+
+
+async def run(n_logins: int = 32) -> None:
+    logger.info(
+        f"{n_logins} inicios de sesión, BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS}, "
+        f"PASSWORD_HASH_WORKERS={settings.PASSWORD_HASH_WORKERS}"
+    )
+    for name, login in (
+        ("en el ciclo de eventos", inline_login),
+        ("en hilos", offloaded_login),
+    ):
+        throughput, max_lag, p99_lag = await login_storm(login, n_logins)
+        logger.info(
+            f"bcrypt {name}: {throughput:.1f} inicios/s, demora de otras peticiones "
+            f"p99 {p99_lag * 1000:.1f} ms, máxima {max_lag * 1000:.1f} ms"
+        )
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
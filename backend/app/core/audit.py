@@ -0,0 +1,438 @@
+import asyncio
+import logging
+import re
+import threading
+from collections import defaultdict
+from collections.abc import Mapping
+from datetime import date, datetime
+from typing import Any
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # Marca para indicarle al proceso de escritura que debe terminar
+
+# Nombre corto de cada campo de los registros del historial (ver `compact_log`)
+LOG_FIELDS: dict[str, str] = {
+    "username": "u",
+    "rol": "r",
+    "timestamp": "t",
+    "method": "m",
+    "route": "p",
+    "path_params": "a",
+    "headers": "h",
+    "body": "b",
+    "process_time_ms": "d",
+    "auth_ms": "da",
+    "handler_ms": "dh",
+    "serialization_ms": "ds",
+    "status_code": "s",
+}
+
+# Cabeceras cuyo valor se oculta aunque estén en la lista de cabeceras permitidas
+REDACTED_HEADERS: set[str] = {"authorization", "cookie", "set-cookie", "x-api-key"}
+REDACTED_FIELDS: set[str] = {"password", "token", "access_token", "refresh_token"}
+REDACTED: str = "[REDACTED]"
+
+# Orden del historial: del registro más reciente al más antiguo
+LOG_SORT: list[tuple[str, int]] = [
+    (LOG_FIELDS["timestamp"], DESCENDING),
+    ("_id", DESCENDING),
+]
+
+# Cada filtro de igualdad va antes del orden para que la consulta no tenga que ordenar en memoria
+LOG_INDEXES: list[IndexModel] = [
+    IndexModel(LOG_SORT, name="timestamp_id"),
+    *(
+        IndexModel(
+            [(LOG_FIELDS[field], ASCENDING), *LOG_SORT], name=f"{field}_timestamp_id"
+        )
+        for field in ("method", "route", "username")
+    ),
+]
+
+
+def filter_headers(headers: Mapping[str, str], allowed: list[str]) -> dict[str, str]:
+    """
+    Args:
+        headers (collections.abc.Mapping[str, str]): Cabeceras de la petición.
+        allowed (list[str]): Cabeceras que se guardan en el historial, sin importar mayúsculas.
+
+    Returns:
+        dict[str, str]: Cabeceras permitidas, con las credenciales ocultas (se conserva el esquema, p. ej.
+            `Bearer`).
+    """
+    allowed = {header.lower() for header in allowed}
+    result: dict[str, str] = {}
+    for key, value in headers.items():
+        key = key.lower()
+        if key not in allowed:
+            continue
+        if key in REDACTED_HEADERS:
+            scheme, _, credentials = value.partition(" ")
+            value = f"{scheme} {REDACTED}" if credentials else REDACTED
+        result[key] = value
+
+    return result
+
+
+def compact_log(log: dict[str, Any]) -> dict[str, Any]:
+    """
+    Convierte un registro del historial a la forma en la que se guarda en mongodb: nombres de campo cortos
+    (`LOG_FIELDS`), sin campos vacíos y con los campos sensibles del cuerpo ocultos. `schemas.ApiHistorial`
+    hace la conversión inversa.
+
+    Args:
+        log (dict[str, Any]): Registro con los nombres de campo de `schemas.ApiHistorial` (además de `_id`).
+
+    Returns:
+        dict[str, Any]: Registro para guardar.
+    """
+    body = log.get("body")
+    if body:
+        log = log | {
+            "body": {
+                key: REDACTED if key in REDACTED_FIELDS else value
+                for key, value in body.items()
+            }
+        }
+
+    document: dict[str, Any] = {"_id": log["_id"]} if "_id" in log else {}
+    for field, key in LOG_FIELDS.items():
+        value = log.get(field)
+        if value is not None and value != {}:
+            document[key] = value
+
+    return document
+
+
+class PartitionedCollection:
+    """
+    Historial de la API particionado en una colección por mes (`{prefix}_YYYYMM`) según la fecha de los
+    registros. Las consultas por rango de fechas solo recorren los meses del rango y los meses antiguos
+    se pueden archivar y eliminar completos (ver `crud_api_log.archive`), por lo que el tamaño de los índices
+    en uso no crece con el historial.
+
+    Implementa `insert_many` para usarse como la colección de `AuditLogWriter`. Los índices se crean la primera
+    vez que el proceso escribe en cada partición.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        prefix: str = "api_logs",
+        indexes: list[IndexModel] | None = None,
+    ) -> None:
+        """
+        Args:
+            database (pymongo.database.Database): Base de datos del historial.
+            prefix (str): Prefijo del nombre de las colecciones.
+            indexes (list[pymongo.IndexModel] | None): Índices de cada partición. Por defecto, `LOG_INDEXES`.
+        """
+        self.database = database
+        self.prefix = prefix
+        self.indexes = indexes if indexes is not None else LOG_INDEXES
+        self.pattern = re.compile(rf"^{re.escape(prefix)}_(\d{{4}})(\d{{2}})$")
+
+        self._indexed: set[str] = set()
+        self._lock = threading.Lock()
+
+    def name(self, month: date) -> str:
+        return f"{self.prefix}_{month:%Y%m}"
+
+    def partition(self, month: date) -> Collection:
+        """
+        Args:
+            month (datetime.date): Cualquier día (o fecha y hora) del mes.
+
+        Returns:
+            pymongo.collection.Collection: Colección del mes, con sus índices creados.
+        """
+        name = self.name(month)
+        collection = self.database[name]
+        with self._lock:
+            if name not in self._indexed:
+                collection.create_indexes(self.indexes)
+                self._indexed.add(name)
+
+        return collection
+
+    def months(self) -> list[date]:
+        """
+        Returns:
+            list[datetime.date]: Primer día de cada mes con partición, del más reciente al más antiguo.
+        """
+        names = self.database.list_collection_names(
+            filter={"name": {"$regex": self.pattern.pattern}}
+        )
+        months = [
+            date(int(match[1]), int(match[2]), 1)
+            for match in map(self.pattern.match, names)
+            if match is not None
+        ]
+        return sorted(months, reverse=True)
+
+    def partitions(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> list[Collection]:
+        """
+        Obtiene las particiones que pueden tener registros en un rango de fechas
+
+        Args:
+            start (datetime.datetime | None): Fecha inicial (incluída). Por defecto, sin límite.
+            end (datetime.datetime | None): Fecha final (incluída). Por defecto, sin límite.
+
+        Returns:
+            list[pymongo.collection.Collection]: Particiones, de la más reciente a la más antigua.
+        """
+        return [
+            self.database[self.name(month)]
+            for month in self.months()
+            if (start is None or month >= start.date().replace(day=1))
+            and (end is None or month <= end.date())
+        ]
+
+    def create_indexes(self) -> int:
+        """
+        Crea los índices de todas las particiones en caso de no existir
+
+        Returns:
+            int: Cantidad de particiones.
+        """
+        months = self.months()
+        for month in months:
+            self.partition(month)
+
+        return len(months)
+
+    def insert_many(
+        self, documents: list[dict[str, Any]], ordered: bool = True
+    ) -> None:
+        """
+        Guarda los registros, cada uno en la partición del mes de su fecha
+
+        Args:
+            documents (list[dict[str, Any]]): Registros del historial.
+            ordered (bool): Si es `False`, se intenta guardar todos los registros aunque alguno falle.
+
+        Raises:
+            pymongo.errors.BulkWriteError: Si algún registro no se pudo guardar. Como en pymongo, `nInserted`
+                tiene la cantidad de registros guardados en todas las particiones y el `index` de cada error es
+                la posición del registro en `documents`.
+        """
+        positions: defaultdict[str, list[int]] = defaultdict(list)
+        months: dict[str, date] = {}
+        for i, document in enumerate(documents):
+            timestamp = document[LOG_FIELDS["timestamp"]]
+            name = self.name(timestamp)
+            positions[name].append(i)
+            months[name] = timestamp
+
+        # Sin orden, un error en una partición no impide escribir las demás
+        inserted = 0
+        errors: list[dict[str, Any]] = []
+        for name, batch_positions in positions.items():
+            batch = [documents[i] for i in batch_positions]
+            try:
+                self.partition(months[name]).insert_many(batch, ordered=ordered)
+            except BulkWriteError as e:
+                inserted += e.details.get("nInserted", 0)
+                errors.extend(
+                    error | {"index": batch_positions[error["index"]]}
+                    for error in e.details.get("writeErrors", [])
+                )
+            except PyMongoError as e:
+                # Sin respuesta de mongodb se asume que no se guardó ningún registro de la partición
+                errors.extend(
+                    {"index": i, "code": getattr(e, "code", None), "errmsg": repr(e)}
+                    for i in batch_positions
+                )
+            else:
+                inserted += len(batch)
+                continue
+
+            if ordered:
+                break
+
+        if errors:
+            errors.sort(key=lambda error: error["index"])
+            raise BulkWriteError({"writeErrors": errors, "nInserted": inserted})
+
+
+class AuditLogWriter:
+    """
+    Escritor en segundo plano del historial de la API. Las peticiones únicamente encolan el
+    registro en una cola acotada en memoria y un proceso en segundo plano se encarga de
+    guardarlos en mongodb por lotes (`insert_many`), ya sea cuando se llena el lote o cuando
+    pasa el tiempo máximo de espera. De esta forma, la latencia de las peticiones no depende
+    del estado de mongodb.
+
+    Attributes:
+        enqueued (int): Cantidad de registros encolados.
+        dropped (int): Cantidad de registros descartados porque la cola estaba llena.
+        written (int): Cantidad de registros guardados en mongodb.
+        failed (int): Cantidad de registros que no se pudieron guardar en mongodb.
+    """
+
+    def __init__(
+        self,
+        collection: Collection | PartitionedCollection,
+        max_queue_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        put_timeout: float = 0.0,
+    ) -> None:
+        """
+        Args:
+            collection (pymongo.collection.Collection | PartitionedCollection): Colección donde se guardan los registros.
+            max_queue_size (int): Cantidad máxima de registros pendientes en memoria.
+            batch_size (int): Cantidad de registros a partir de la cual se guarda el lote.
+            flush_interval (float): Tiempo máximo en segundos que espera un lote antes de guardarse.
+            put_timeout (float): Tiempo máximo en segundos que espera una petición cuando la cola
+                está llena antes de descartar el registro. Con `0` se descarta inmediatamente.
+        """
+        self.collection = collection
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+        self.enqueued: int = 0
+        self.dropped: int = 0
+        self.written: int = 0
+        self.failed: int = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def queue_size(self) -> int:
+        """
+        Returns:
+            int: Cantidad de registros pendientes por guardar.
+        """
+        return 0 if self._queue is None else self._queue.qsize()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: Contadores del escritor y el tamaño actual de la cola.
+        """
+        return {
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "queue_size": self.queue_size(),
+        }
+
+    def start(self) -> None:
+        """
+        Inicia el proceso de escritura en segundo plano dentro del event loop actual.
+        """
+        if self.running:
+            return None
+
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Detiene el proceso de escritura guardando antes todos los registros pendientes.
+        """
+        if not self.running:
+            return None
+
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    async def log(self, document: dict[str, Any]) -> bool:
+        """
+        Encola un registro para que sea guardado en segundo plano.
+
+        Args:
+            document (dict[str, Any]): Registro que se guardará en mongodb.
+
+        Returns:
+            bool: `True` si el registro fue encolado (o guardado), `False` si fue descartado.
+        """
+        # Sin el proceso en segundo plano (p. ej. fuera de la aplicación) se guarda directamente
+        if not self.running:
+            await self._write([document])
+            return True
+
+        try:
+            if self.put_timeout > 0:
+                await asyncio.wait_for(self._queue.put(document), self.put_timeout)
+            else:
+                self._queue.put_nowait(document)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            self.dropped += 1
+            return False
+
+        self.enqueued += 1
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            first = await self._queue.get()
+            if first is _STOP:
+                return None
+
+            batch: list[dict[str, Any]] = [first]
+            deadline = loop.time() + self.flush_interval
+            stop = False
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+
+                try:
+                    document = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+                if document is _STOP:
+                    stop = True
+                    break
+                batch.append(document)
+
+            try:
+                await self._write(batch)
+            except Exception:
+                # Un error inesperado (p. ej. un registro que no se puede codificar) no detiene el proceso
+                self.failed += len(batch)
+                logger.exception(f"Guardar {len(batch)} registros de la API falló")
+            if stop:
+                return None
+
+    async def _write(self, batch: list[dict[str, Any]]) -> None:
+        # pymongo es síncrono, así que la escritura se hace por fuera del event loop
+        try:
+            await asyncio.to_thread(self.collection.insert_many, batch, ordered=False)
+        except BulkWriteError as e:
+            # Sin orden se guardan todos los registros válidos; el error dice cuántos fueron
+            written = e.details.get("nInserted", 0)
+            failed = len(batch) - written
+            self.failed += failed
+            self.written += written
+            logger.error(f"Guardar {failed} registros de la API falló: {repr(e)}")
+            return None
+        except PyMongoError as e:
+            self.failed += len(batch)
+            logger.error(f"Guardar {len(batch)} registros de la API falló: {repr(e)}")
+            return None
+
+        self.written += len(batch)
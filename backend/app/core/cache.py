@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable, get_args
+
+from app.core.config import settings
+from app.schemas import Roles
+
+
+class TTLCache:
+    """
+    Caché en memoria con un tamaño máximo y un tiempo de vida por entrada. Cuando se llena, se descarta la
+    entrada usada hace más tiempo (LRU). Es seguro usarla desde varios hilos.
+
+    La caché es propia de cada proceso, por lo que las invalidaciones explícitas solo afectan al proceso que las
+    hace; en los demás la entrada deja de usarse al vencer su tiempo de vida.
+
+    Attributes:
+        hits (int): Cantidad de búsquedas que se encontraron en la caché.
+        misses (int): Cantidad de búsquedas que no se encontraron o ya estaban vencidas.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0) -> None:
+        """
+        Args:
+            maxsize (int): Cantidad máxima de entradas.
+            ttl (float): Tiempo de vida de cada entrada en segundos. Con `0` la caché queda deshabilitada.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Args:
+            key (Hashable): Llave de la entrada.
+
+        Returns:
+            Any | None: Valor guardado, o `None` si no existe o ya venció.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Args:
+            key (Hashable): Llave de la entrada.
+            value (Any): Valor a guardar durante `ttl` segundos.
+        """
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return None
+
+        with self._lock:
+            self._data[key] = (monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """
+        Args:
+            *keys (Hashable): Llaves de las entradas a eliminar.
+        """
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: Aciertos, fallos y cantidad de entradas de la caché.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+# Usuarios autenticados por (número de documento, rol), usada por `get_current_user`
+principal_cache = TTLCache(
+    maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL
+)
+
+
+def invalidate_principal(num_document: str) -> None:
+    """
+    Elimina de la caché de usuarios autenticados todos los roles de un usuario.
+
+    Args:
+        num_document (str): Número de documento del usuario.
+    """
+    principal_cache.invalidate(*((num_document, rol) for rol in get_args(Roles)))
@@ -64,6 +64,19 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
 
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: float = 30.0
+    POSTGRES_POOL_RECYCLE: int = 1800
+    POSTGRES_POOL_PRE_PING: bool = True
+    POSTGRES_STATEMENT_TIMEOUT: int = 0  # Milisegundos. 0 para no tener límite
+
+    AUTH_CACHE_SIZE: int = 1024
+    AUTH_CACHE_TTL: float = 30.0  # Segundos. 0 para deshabilitar la caché
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+
     FIRST_SUPERUSER: str
     FIRST_SUPERUSER_PASSWORD: str
 
@@ -96,12 +109,44 @@ class Settings(BaseSettings):
             port=self.MONGO_PORT,
         )
 
+    PAGE_SIZE: int = 100
+    MAX_PAGE_SIZE: int = 1000
+
+    MONGO_LOG_QUEUE_SIZE: int = 10_000
+    MONGO_LOG_BATCH_SIZE: int = 500
+    MONGO_LOG_FLUSH_INTERVAL: float = 1.0
+    MONGO_LOG_PUT_TIMEOUT: float = 0.0
+    # Cabeceras que se guardan en el historial de la API; las credenciales se guardan ocultas
+    MONGO_LOG_HEADERS: Annotated[list[str] | str, BeforeValidator(split_list)] = [
+        "content-type",
+        "content-length",
+        "x-forwarded-for",
+    ]
+    # Meses del historial de la API que se mantienen en mongodb además del mes actual (0 = todos). Los meses
+    # anteriores se archivan con `app.archive_api_logs` en archivos JSON lines comprimidos
+    MONGO_LOG_RETENTION_MONTHS: int = 6
+    API_LOGS_ARCHIVE_PATH: str = "./api_logs_archive"
+
+    # Tablero de camas en tiempo real. Con "postgres" los cambios se distribuyen entre todos los procesos
+    # de la aplicación con LISTEN/NOTIFY; con "memory" solo llegan a los clientes del mismo proceso
+    BED_EVENTS_BACKEND: Literal["memory", "postgres"] = "memory"
+    BED_EVENTS_CHANNEL: str = "bed_board"
+    BED_EVENTS_QUEUE_SIZE: int = 100  # Cambios pendientes por cliente
+    BED_EVENTS_KEEPALIVE: float = 15.0  # Segundos sin cambios entre comentarios
+
     PATIENT_DOCS_PATH: str = "./patient_docs"
     HISTORY_FILENAME: str = "history.txt"
+    HISTORY_SNAPSHOT_INTERVAL: int = 20  # Versiones entre cada copia completa
 
     ALLOWED_EXTENSIONS_HISTORY: Annotated[list[str] | str, BeforeValidator(split_list)]
     ALLOWED_EXTENSIONS_ORDERS: Annotated[list[str] | str, BeforeValidator(split_list)]
     ALLOWED_EXTENSIONS_RESULTS: Annotated[list[str] | str, BeforeValidator(split_list)]
 
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes leídos y escritos por iteración
+    MAX_SIZE_HISTORY: int = 10 * 1024 * 1024  # Bytes
+    MAX_SIZE_ORDERS: int = 50 * 1024 * 1024  # Bytes
+    MAX_SIZE_RESULTS: int = 500 * 1024 * 1024  # Bytes
+    MAX_SIZE_IMPORT: int = 10 * 1024 * 1024  # Bytes
+
 
 settings = Settings()
@@ -1,10 +1,112 @@
-from sqlalchemy import create_engine
+import threading
+from time import perf_counter
+from typing import Any
+
+import sqlalchemy.exc
+from sqlalchemy import AsyncAdaptedQueuePool, QueuePool, create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.core.config import settings
 
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+class MonitoredPool:
+    """
+    Mixin para los pools de conexiones que lleva la cuenta de las conexiones entregadas, el tiempo que se
+    esperó por ellas (incluyendo abrir una conexión nueva) y las veces que se agotó `pool_timeout`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def connect(self) -> Any:
+        start_time = perf_counter()
+        try:
+            connection = super().connect()
+        except sqlalchemy.exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+
+        wait_time = perf_counter() - start_time
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+        return connection
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Obtiene el estado actual del pool de conexiones.
+
+        Returns:
+            dict[str, Any]: Tamaño del pool, conexiones en uso, en exceso (`max_overflow`) y libres, junto a la
+            cantidad de conexiones entregadas, tiempos agotados y el tiempo de espera promedio y máximo en milisegundos.
+        """
+        with self._stats_lock:
+            avg_wait_time = self.wait_time / self.checkouts if self.checkouts else 0.0
+            return dict(
+                size=self.size(),
+                checked_out=self.checkedout(),
+                overflow=max(self.overflow(), 0),
+                checked_in=self.checkedin(),
+                checkouts=self.checkouts,
+                timeouts=self.timeouts,
+                avg_wait_ms=round(avg_wait_time * 1000, 2),
+                max_wait_ms=round(self.max_wait_time * 1000, 2),
+            )
+
+
+class MonitoredQueuePool(MonitoredPool, QueuePool):
+    pass
+
+
+class MonitoredAsyncQueuePool(MonitoredPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options() -> dict[str, Any]:
+    """
+    Construye las opciones del pool de conexiones y de la conexión a Postgresql a partir de la configuración.
+
+    Returns:
+        dict[str, Any]: Argumentos para `create_engine` y `create_async_engine`.
+    """
+    connect_args: dict[str, Any] = {}
+    if settings.POSTGRES_STATEMENT_TIMEOUT > 0:
+        connect_args["options"] = (
+            f"-c statement_timeout={settings.POSTGRES_STATEMENT_TIMEOUT}"
+        )
+
+    return dict(
+        pool_size=settings.POSTGRES_POOL_SIZE,
+        max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=settings.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=settings.POSTGRES_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=MonitoredQueuePool,
+    **engine_options(),
+)
 SessionLocal = sessionmaker(autoflush=True, bind=engine)
 
+# psycopg 3 tiene un modo asíncrono con el mismo esquema `postgresql+psycopg`
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=MonitoredAsyncQueuePool,
+    **engine_options(),
+)
+AsyncSessionLocal = async_sessionmaker(autoflush=True, bind=async_engine)
+
 BaseModel = declarative_base()
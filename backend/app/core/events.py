@@ -0,0 +1,268 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import suppress
+from typing import Literal
+
+import psycopg
+from psycopg import sql
+from pydantic import ValidationError
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_CLOSED = None  # Marca para indicarle a un cliente que debe terminar la conexión
+STAGED_KEY: str = "bed_events"  # Llave de `Session.info` con los cambios pendientes
+
+
+def format_event(name: str, data: str) -> str:
+    """
+    Args:
+        name (str): Nombre del evento.
+        data (str): Contenido del evento en una sola línea.
+
+    Returns:
+        str: Mensaje con el formato de server-sent events.
+    """
+    return f"event: {name}\ndata: {data}\n\n"
+
+
+class BedBoard:
+    """
+    Distribuye los cambios en las camas del hospital a los clientes conectados al tablero de camas. Cada cliente
+    tiene una cola acotada en memoria; si un cliente no alcanza a leer sus cambios, se desconecta para que vuelva
+    a conectarse y reciba de nuevo el estado completo.
+
+    Las operaciones de `crud` registran los cambios en la sesión con `stage` y estos solo se publican cuando la
+    sesión hace commit; si la transacción se revierte, se descartan. Con el backend `memory` los cambios se
+    distribuyen a los clientes del mismo proceso. Con el backend `postgres` se envían con `NOTIFY` dentro de la
+    misma transacción y cada proceso los recibe con `LISTEN`, de forma que llegan a los clientes de todos los
+    procesos de la aplicación.
+
+    Attributes:
+        published (int): Cantidad de cambios distribuidos a los clientes.
+        disconnected (int): Cantidad de clientes desconectados por no leer sus cambios a tiempo.
+    """
+
+    def __init__(
+        self,
+        backend: Literal["memory", "postgres"] = "memory",
+        channel: str = "bed_board",
+        max_queue_size: int = 100,
+        keepalive: float = 15.0,
+    ) -> None:
+        """
+        Args:
+            backend (Literal["memory", "postgres"]): Forma en la que se distribuyen los cambios.
+            channel (str): Canal de Postgresql usado con el backend `postgres`.
+            max_queue_size (int): Cantidad máxima de cambios pendientes por cliente.
+            keepalive (float): Tiempo en segundos sin cambios tras el cual se envía un comentario al cliente.
+        """
+        self.backend = backend
+        self.channel = channel
+        self.max_queue_size = max_queue_size
+        self.keepalive = keepalive
+
+        self._subscribers: set[asyncio.Queue] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+
+        self.published: int = 0
+        self.disconnected: int = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def subscribers(self) -> int:
+        """
+        Returns:
+            int: Cantidad de clientes conectados.
+        """
+        return len(self._subscribers)
+
+    def start(self) -> None:
+        """
+        Asocia el tablero al event loop actual y, con el backend `postgres`, empieza a escuchar el canal.
+        """
+        self._loop = asyncio.get_running_loop()
+        if self.backend == "postgres" and not self.running:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """
+        Deja de escuchar el canal y termina la conexión de todos los clientes.
+        """
+        for queue in list(self._subscribers):
+            self._close(queue)
+
+        if self.running:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """
+        Returns:
+            asyncio.Queue: Cola en la que se recibirán los cambios de las camas.
+        """
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def stage(self, db: Session, bed_event: schemas.BedEvent) -> None:
+        """
+        Registra un cambio en una cama para que se publique cuando la sesión haga commit.
+
+        Args:
+            db (sqlalchemy.orm.Session): Sesión en la que se hizo el cambio.
+            bed_event (schemas.BedEvent): Cambio en la cama.
+        """
+        db.info.setdefault(STAGED_KEY, []).append(bed_event)
+
+    def publish(self, events: list[schemas.BedEvent]) -> None:
+        """
+        Distribuye los cambios a los clientes conectados. Se puede llamar desde cualquier hilo.
+
+        Args:
+            events (list[schemas.BedEvent]): Cambios en las camas.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed() or not events:
+            return None
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            self._dispatch(events)
+            return None
+
+        # Las colas de asyncio no son seguras entre hilos (p. ej. desde `db.run_sync` o una sesión síncrona)
+        with suppress(RuntimeError):
+            loop.call_soon_threadsafe(self._dispatch, events)
+
+    def _dispatch(self, events: list[schemas.BedEvent]) -> None:
+        for queue in list(self._subscribers):
+            try:
+                for bed_event in events:
+                    queue.put_nowait(bed_event)
+            except asyncio.QueueFull:
+                self._close(queue)
+                self.disconnected += 1
+
+        self.published += len(events)
+
+    def _close(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(_CLOSED)
+
+    async def stream(
+        self, queue: asyncio.Queue, snapshot: list[schemas.BedAll]
+    ) -> AsyncIterator[str]:
+        """
+        Genera los mensajes de server-sent events para un cliente: primero el evento `snapshot` con el estado de
+        todas las camas y luego un evento por cada cambio recibido en la cola. Termina la suscripción al cerrarse.
+
+        Args:
+            queue (asyncio.Queue): Cola obtenida con `subscribe` antes de consultar el estado de las camas.
+            snapshot (list[schemas.BedAll]): Estado de todas las camas.
+
+        Returns:
+            AsyncIterator[str]: Mensajes para el cliente.
+        """
+        try:
+            beds = ",".join(bed.model_dump_json() for bed in snapshot)
+            yield format_event("snapshot", f"[{beds}]")
+
+            while True:
+                try:
+                    bed_event = await asyncio.wait_for(queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if bed_event is _CLOSED:
+                    return
+                yield format_event(bed_event.kind, bed_event.bed.model_dump_json())
+        finally:
+            self.unsubscribe(queue)
+
+    def before_commit(self, db: Session) -> None:
+        # NOTIFY es transaccional: los demás procesos solo lo reciben si el commit es exitoso
+        if self.backend != "postgres":
+            return None
+
+        for bed_event in db.info.pop(STAGED_KEY, []):
+            db.execute(
+                select(func.pg_notify(self.channel, bed_event.model_dump_json()))
+            )
+
+    def after_commit(self, db: Session) -> None:
+        events: list[schemas.BedEvent] = db.info.pop(STAGED_KEY, [])
+        if events:
+            self.publish(events)
+
+    def after_rollback(self, db: Session, *args) -> None:
+        db.info.pop(STAGED_KEY, None)
+
+    def _notify(self, payload: str) -> None:
+        # Un mensaje inválido (p. ej. de un proceso con otra versión durante un despliegue) se descarta sin
+        # cerrar la conexión
+        try:
+            bed_event = schemas.BedEvent.model_validate_json(payload)
+        except ValidationError as e:
+            logger.warning(f"Cambio inválido en el canal {self.channel}: {repr(e)}")
+            return None
+
+        self._dispatch([bed_event])
+
+    async def _listen(self) -> None:
+        conninfo = str(settings.SQLALCHEMY_DATABASE_URI).replace("+psycopg", "", 1)
+        listen = sql.SQL("LISTEN {}").format(sql.Identifier(self.channel))
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    conninfo, autocommit=True
+                ) as connection:
+                    await connection.execute(listen)
+                    async for notify in connection.notifies():
+                        self._notify(notify.payload)
+            except psycopg.Error as e:
+                logger.error(f"Escuchar el canal {self.channel} falló: {repr(e)}")
+            except Exception as e:
+                # Cualquier otro error no debe terminar la tarea: sin ella ningún proceso recibe los cambios
+                logger.exception(
+                    f"Error inesperado escuchando el canal {self.channel}: {repr(e)}"
+                )
+
+            # Los clientes pudieron perder cambios mientras no se escuchaba el canal
+            for queue in list(self._subscribers):
+                self._close(queue)
+            await asyncio.sleep(1.0)
+
+
+bed_board = BedBoard(
+    backend=settings.BED_EVENTS_BACKEND,
+    channel=settings.BED_EVENTS_CHANNEL,
+    max_queue_size=settings.BED_EVENTS_QUEUE_SIZE,
+    keepalive=settings.BED_EVENTS_KEEPALIVE,
+)
+
+event.listen(Session, "before_commit", bed_board.before_commit)
+event.listen(Session, "after_commit", bed_board.after_commit)
+event.listen(Session, "after_soft_rollback", bed_board.after_rollback)
@@ -0,0 +1,398 @@
+import asyncio
+import functools
+import threading
+from collections.abc import Awaitable, Callable, Coroutine, Iterable, Iterator
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, TypeVar
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Límites superiores (en segundos) de los buckets de latencia
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+QUERY_BUCKETS: tuple[float, ...] = (0, 1, 2, 5, 10, 20, 50, 100)
+
+LabelValues = tuple[str, ...]
+
+
+def format_labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    """
+    Args:
+        names (collections.abc.Iterable[str]): Nombres de las etiquetas.
+        values (collections.abc.Iterable[Any]): Valores de las etiquetas, en el mismo orden.
+
+    Returns:
+        str: Etiquetas en el formato de texto de Prometheus, p. ej. `{method="GET",status="200"}`.
+    """
+    labels = []
+    for name, value in zip(names, values):
+        value = (
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        labels.append(f'{name}="{value}"')
+
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Histograma con buckets acumulados por combinación de etiquetas, como los de Prometheus. Se puede usar
+    desde varios hilos.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = (*sorted(buckets), float("inf"))
+
+        self._lock = threading.Lock()
+        # Por cada combinación de etiquetas: conteo de cada bucket (no acumulado) y suma de los valores
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *label_values: Any) -> None:
+        key = tuple(map(str, label_values))
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            data = [
+                (key, list(counts), self._sums[key])
+                for key, counts in self._counts.items()
+            ]
+
+        for key, counts, total in sorted(data):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = format_labels(
+                    (*self.labels, "le"), (*key, format_value(bound))
+                )
+                yield f"{self.name}_bucket{labels} {cumulative}"
+
+            labels = format_labels(self.labels, key)
+            yield f"{self.name}_sum{labels} {format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class CallbackMetric:
+    """
+    Métrica cuyo valor se obtiene al momento de exportarla a partir de los contadores que ya lleva otro
+    componente (p. ej. `AuditLogWriter.stats` o `TTLCache.stats`).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        function: Callable[[], dict[LabelValues, float]],
+        labels: tuple[str, ...] = (),
+        type: str = "gauge",
+    ) -> None:
+        """
+        Args:
+            name (str): Nombre de la métrica.
+            documentation (str): Descripción de la métrica.
+            function (collections.abc.Callable[[], dict[tuple[str, ...], float]]): Función que retorna el valor
+                de cada combinación de etiquetas.
+            labels (tuple[str, ...]): Nombres de las etiquetas.
+            type (str): Tipo de la métrica en Prometheus (`gauge` o `counter`).
+        """
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.labels = labels
+        self.type = type
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self.function().items()):
+            labels = format_labels(self.labels, key)
+            yield f"{self.name}{labels} {format_value(value)}"
+
+
+M = TypeVar("M", Histogram, CallbackMetric)
+
+
+class MetricsRegistry:
+    """
+    Registro en memoria de las métricas del proceso, exportadas con el formato de texto de Prometheus.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Histogram | CallbackMetric] = {}
+
+    def register(self, metric: M) -> M:
+        """
+        Raises:
+            ValueError: Si ya hay una métrica con el mismo nombre.
+        """
+        if metric.name in self._metrics:
+            raise ValueError(metric.name)
+
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        Returns:
+            str: Todas las métricas en el formato de texto de Prometheus (versión 0.0.4).
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+
+        return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    """
+    Tiempos, consultas a la base de datos y datos para el historial de la API de una petición. Los tiempos son
+    valores de `perf_counter` o duraciones en segundos. Las fases de una petición son:
+
+    - `auth`: validar el token y obtener el usuario (`get_current_user`).
+    - `handler`: la función de la ruta.
+    - `serialization`: desde que termina la función de la ruta hasta que se empieza a enviar la respuesta
+      (validación con `response_model`, conversión a JSON o manejo de la excepción).
+
+    El resto del tiempo total corresponde a las demás dependencias, leer el cuerpo de la petición y enviar el
+    cuerpo de la respuesta.
+
+    Attributes:
+        queries (int): Cantidad de consultas.
+        db_time (float): Tiempo total de las consultas.
+        start_time (float): Inicio de la petición.
+        auth_time (float): Duración de la fase `auth`.
+        handler_time (float | None): Duración de la fase `handler`, si se llegó a ejecutar la ruta.
+        handler_end (float | None): Fin de la fase `handler`.
+        response_start (float | None): Inicio del envío de la respuesta.
+        end_time (float | None): Fin de la petición.
+        username (str | None): Número de documento del usuario autenticado.
+        rol (str | None): Rol del usuario autenticado.
+        body (dict[str, Any] | None): Cuerpo de la petición que se guarda en el historial de la API.
+    """
+
+    def __init__(self) -> None:
+        self.queries: int = 0
+        self.db_time: float = 0.0
+
+        self.start_time: float = perf_counter()
+        self.auth_time: float = 0.0
+        self.handler_time: float | None = None
+        self.handler_end: float | None = None
+        self.response_start: float | None = None
+        self.end_time: float | None = None
+
+        self.username: str | None = None
+        self.rol: str | None = None
+        self.body: dict[str, Any] | None = None
+
+    @property
+    def process_time(self) -> float:
+        end_time = self.end_time if self.end_time is not None else perf_counter()
+        return end_time - self.start_time
+
+    @property
+    def serialization_time(self) -> float | None:
+        if self.handler_end is None or self.response_start is None:
+            return None
+        return max(self.response_start - self.handler_end, 0.0)
+
+
+# Estadísticas de la petición actual. Las sesiones asíncronas (greenlets de SQLAlchemy) y los hilos de
+# `asyncio.to_thread` y `run_in_threadpool` copian el contexto, por lo que comparten el mismo objeto
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def before_cursor_execute(conn: Any, *args: Any) -> None:
+    conn.info["query_start_time"] = perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def after_cursor_execute(conn: Any, *args: Any) -> None:
+    stats = request_stats.get()
+    start_time = conn.info.pop("query_start_time", None)
+    if stats is None or start_time is None:
+        return None
+
+    stats.queries += 1
+    stats.db_time += perf_counter() - start_time
+
+
+metrics = MetricsRegistry()
+
+request_latency = metrics.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Duración de las peticiones HTTP por plantilla de ruta y código de estado.",
+        ("method", "route", "status"),
+    )
+)
+request_queries = metrics.register(
+    Histogram(
+        "http_request_db_queries",
+        "Cantidad de consultas a Postgresql por petición.",
+        ("method", "route"),
+        QUERY_BUCKETS,
+    )
+)
+request_db_time = metrics.register(
+    Histogram(
+        "http_request_db_duration_seconds",
+        "Tiempo total de las consultas a Postgresql por petición.",
+        ("method", "route"),
+    )
+)
+request_phases = metrics.register(
+    Histogram(
+        "http_request_phase_duration_seconds",
+        "Duración de cada fase de las peticiones HTTP (auth, handler y serialization).",
+        ("method", "route", "phase"),
+    )
+)
+
+
+class TimedRoute(APIRoute):
+    """
+    Ruta que mide la duración de su función (fase `handler` de `RequestStats`). Se usa como `route_class` de
+    los routers de la API.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        call = self.dependant.call
+
+        def record(start_time: float) -> None:
+            stats = request_stats.get()
+            if stats is not None:
+                stats.handler_end = perf_counter()
+                stats.handler_time = stats.handler_end - start_time
+
+        # FastAPI decide si ejecutar la función en un hilo según si es una corrutina, así que se conserva
+        if asyncio.iscoroutinefunction(call):
+
+            @functools.wraps(call)
+            async def timed(*args: Any, **kwargs: Any) -> Any:
+                start_time = perf_counter()
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    record(start_time)
+
+        else:
+
+            @functools.wraps(call)
+            def timed(*args: Any, **kwargs: Any) -> Any:
+                start_time = perf_counter()
+                try:
+                    return call(*args, **kwargs)
+                finally:
+                    record(start_time)
+
+        self.dependant.call = timed
+        return super().get_route_handler()
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición HTTP completa (dependencias, la ruta y el envío de la respuesta)
+    junto a sus consultas a la base de datos y sus fases (ver `RequestStats`), y las agrega en `metrics` por
+    plantilla de ruta (p. ej. `/api/v1/patients/{num_document}`) para no crear una serie por cada URL. Las
+    peticiones que no corresponden a ninguna ruta se agrupan como `unmatched`.
+
+    Al terminar cada petición se llama `log_request`, si se indica, con el resultado.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        log_request: Callable[[Scope, RequestStats, int], Awaitable[None]]
+        | None = None,
+    ) -> None:
+        """
+        Args:
+            app (starlette.types.ASGIApp): Aplicación.
+            log_request (collections.abc.Callable[[Scope, RequestStats, int], Awaitable[None]] | None): Función
+                que recibe el scope, las estadísticas y el código de estado de cada petición terminada.
+        """
+        self.app = app
+        self.log_request = log_request
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                stats.response_start = perf_counter()
+            await send(message)
+
+        token = request_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stats.end_time = perf_counter()
+            request_stats.reset(token)
+
+            # FastAPI guarda la ruta encontrada en el scope
+            route = getattr(scope.get("route"), "path_format", "unmatched")
+            method = scope["method"]
+            request_latency.observe(stats.process_time, method, route, status_code)
+            request_queries.observe(stats.queries, method, route)
+            request_db_time.observe(stats.db_time, method, route)
+
+            phases = {
+                "auth": stats.auth_time if stats.username is not None else None,
+                "handler": stats.handler_time,
+                "serialization": stats.serialization_time,
+            }
+            for phase, value in phases.items():
+                if value is not None:
+                    request_phases.observe(value, method, route, phase)
+
+            if self.log_request is not None:
+                await self.log_request(scope, stats, status_code)
@@ -0,0 +1,181 @@
+import os
+import re
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+
+import anyio
+from fastapi.responses import FileResponse
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class DocumentResponse(FileResponse):
+    """
+    Respuesta para descargar un documento de un paciente. A diferencia de `FileResponse`, el ETag es el checksum
+    del contenido calculado al subir el archivo, de forma que es un ETag fuerte, y la respuesta atiende las
+    peticiones condicionales (`If-None-Match` e `If-Modified-Since`) con `304 Not Modified` y las peticiones
+    con un único rango de bytes (`Range`, opcionalmente con `If-Range`) con `206 Partial Content`. Las peticiones
+    con varios rangos se responden con el archivo completo.
+    """
+
+    def __init__(
+        self, path: str, filename: str, checksum: str, created_at: datetime
+    ) -> None:
+        super().__init__(path, media_type="application/octet-stream", filename=filename)
+        self.last_modified = created_at.replace(microsecond=0)
+        self.headers["etag"] = f'"{checksum}"'
+        self.headers["last-modified"] = formatdate(
+            self.last_modified.timestamp(), usegmt=True
+        )
+        self.headers["accept-ranges"] = "bytes"
+
+    def etag_matches(self, value: str, weak: bool = True) -> bool:
+        if value.strip() == "*":
+            return True
+
+        etag = self.headers["etag"]
+        for tag in value.split(","):
+            tag = tag.strip()
+            if weak and tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == etag:
+                return True
+
+        return False
+
+    def modified_since(self, value: str) -> bool:
+        try:
+            since = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return True
+
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        return self.last_modified.astimezone() > since
+
+    def is_not_modified(self, headers: Headers) -> bool:
+        # If-Modified-Since se ignora cuando la petición incluye If-None-Match
+        if "if-none-match" in headers:
+            return self.etag_matches(headers["if-none-match"])
+        if "if-modified-since" in headers:
+            return not self.modified_since(headers["if-modified-since"])
+
+        return False
+
+    def get_range(self, headers: Headers, size: int) -> tuple[int, int] | None:
+        """
+        Obtiene el rango de bytes solicitado en la petición
+
+        Args:
+            headers (starlette.datastructures.Headers): Encabezados de la petición
+            size (int): Tamaño del archivo
+
+        Returns:
+            tuple[int, int] | None: Inicio y fin (incluido) del rango o None si se debe enviar el archivo completo
+
+        Raises:
+            ValueError: Si el rango no se puede satisfacer
+        """
+        if "range" not in headers:
+            return None
+
+        # El rango solo aplica si el archivo no ha cambiado desde que el cliente lo obtuvo
+        if_range = headers.get("if-range")
+        if if_range is not None:
+            if if_range.startswith('"') or if_range.startswith("W/"):
+                if not self.etag_matches(if_range, weak=False):
+                    return None
+            elif self.modified_since(if_range):
+                return None
+
+        match = RANGE_PATTERN.match(headers["range"].strip())
+        if match is None:
+            return None
+
+        start, end = match.groups()
+        if not start and not end:
+            return None
+        if not start:
+            # Últimos `end` bytes
+            start, end = max(size - int(end), 0), size - 1
+        else:
+            start, end = int(start), min(int(end), size - 1) if end else size - 1
+
+        if start >= size or start > end:
+            raise ValueError(headers["range"])
+
+        return start, end
+
+    async def send_empty(
+        self, send: Send, status_code: int, headers: list[tuple[bytes, bytes]]
+    ) -> None:
+        await send(
+            {"type": "http.response.start", "status": status_code, "headers": headers}
+        )
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        headers = Headers(scope=scope)
+        validators = [
+            (key, value)
+            for key, value in self.raw_headers
+            if key in (b"etag", b"last-modified")
+        ]
+
+        if scope["method"].upper() in ("GET", "HEAD") and self.is_not_modified(headers):
+            await self.send_empty(send, 304, validators)
+            return
+
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+        except FileNotFoundError:
+            raise RuntimeError(f"File at path {self.path} does not exist.")
+        size = stat_result.st_size
+
+        try:
+            byte_range = self.get_range(headers, size)
+        except ValueError:
+            content_range = (b"content-range", f"bytes */{size}".encode())
+            await self.send_empty(send, 416, validators + [content_range])
+            return
+
+        if byte_range is None:
+            self.stat_result = stat_result
+            self.set_stat_headers(stat_result)
+            await super().__call__(scope, receive, send)
+            return
+
+        start, end = byte_range
+        self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        self.headers["content-length"] = str(end - start + 1)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 206,
+                "headers": self.raw_headers,
+            }
+        )
+
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        remaining = end - start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": remaining > 0 and bool(chunk),
+                    }
+                )
+                if not chunk:
+                    break
@@ -1,12 +1,31 @@
+import asyncio
+import weakref
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Any, TypeVar
 
 import jwt
 from passlib.context import CryptContext
+from sqlalchemy.util import await_only
 
 from app.core.config import settings
 from app.schemas import Roles
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt libera el GIL, por lo que varios hilos sí calculan hashes en paralelo
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+# Cupos de `password_executor` por ciclo de eventos: las demás peticiones esperan sin encolar trabajo en el pool
+_password_slots: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, asyncio.Semaphore
+] = weakref.WeakKeyDictionary()
+
+T = TypeVar("T")
 
 
 def create_access_token(
@@ -57,3 +76,70 @@ def get_password_hash(password: str) -> str:
         str: Hash encriptado de la contraseña.
     """
     return pwd_context.hash(password)
+
+
+async def run_password_job(function: Callable[..., T], *args: Any) -> T:
+    """
+    Ejecuta un cálculo de bcrypt en los hilos de `password_executor`. Como máximo hay `PASSWORD_HASH_WORKERS`
+    cálculos en el pool por ciclo de eventos; los demás esperan su turno sin ocupar la cola del pool, por lo que
+    una petición cancelada mientras espera no llega a calcular el hash.
+
+    Args:
+        function (Callable[..., T]): Función síncrona que calcula el hash.
+        *args (Any): Argumentos de la función.
+
+    Returns:
+        T: Resultado de la función.
+    """
+    loop = asyncio.get_running_loop()
+    slots = _password_slots.get(loop)
+    if slots is None:
+        slots = _password_slots[loop] = asyncio.Semaphore(
+            settings.PASSWORD_HASH_WORKERS
+        )
+
+    async with slots:
+        return await loop.run_in_executor(password_executor, function, *args)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Igual que `verify_password`, pero se ejecuta con `run_password_job` para no bloquear el ciclo de eventos
+    mientras se calcula el hash.
+
+    Args:
+        plain_password (str): Contraseña en texto plano a verificar.
+        hashed_password (str): Contraseña encriptada (hash) con la que se comparará.
+
+    Returns:
+        bool: True si las contraseñas coinciden, False en caso contrario.
+    """
+    return await run_password_job(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Igual que `get_password_hash`, pero se ejecuta con `run_password_job` para no bloquear el ciclo de eventos
+    mientras se calcula el hash.
+
+    Args:
+        password (str): Contraseña en texto plano a encriptar.
+
+    Returns:
+        str: Hash encriptado de la contraseña.
+    """
+    return await run_password_job(get_password_hash, password)
+
+
+def get_password_hash_run_sync(password: str) -> str:
+    """
+    Igual que `get_password_hash_async`, pero para el código síncrono que se ejecuta con `AsyncSession.run_sync`,
+    p. ej. las operaciones CRUD, de forma que el hash solo se calcula cuando la operación ya validó los datos.
+
+    Args:
+        password (str): Contraseña en texto plano a encriptar.
+
+    Returns:
+        str: Hash encriptado de la contraseña.
+    """
+    return await_only(get_password_hash_async(password))
@@ -4,5 +4,8 @@ from app.crud.admins import crud_admin
 from app.crud.doctors import crud_doctor
 from app.crud.patients import crud_patient
 from app.crud.documents import crud_document
+from app.crud.histories import crud_history
 from app.crud.consultations import crud_consultation
 from app.crud.hospitalizations import crud_hospitalization
+from app.crud.daily_stats import crud_daily_stats
+from app.crud.api_logs import crud_api_log
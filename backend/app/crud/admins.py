@@ -1,21 +1,27 @@
 import os
 import datetime
+from collections.abc import Callable
 from typing import Literal
 
 from app import models, schemas
 from app.crud.users import CRUDUsers
 
+from app.core.cache import invalidate_principal
 from app.core.config import settings
 from app.core.security import get_password_hash
 
 import sqlalchemy.exc
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 
 class CRUDAdmins(CRUDUsers):
     def create_user(
-        self, new_user: schemas.UserCreate, db: Session, admins: bool = False
+        self,
+        new_user: schemas.UserCreate,
+        db: Session,
+        admins: bool = False,
+        hash_password: Callable[[str], str] = get_password_hash,
     ) -> Literal[0, 1, 2, 3, 4]:
         """
         Crea un nuevo usuario en el sistema. Esta operación es únicamente reservada para los administradores del sistema,
@@ -29,6 +35,8 @@ class CRUDAdmins(CRUDUsers):
             new_admin (UserCreate): Información del nuevo administrador.
             db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
             admins (bool): Válida si se quiere agregar la información de algún administrador.
+            hash_password (Callable[[str], str]): Función que calcula el hash de la contraseña, solo cuando los datos ya
+                son válidos. Por defecto, `get_password_hash`; las rutas usan `get_password_hash_run_sync`.
 
         Returns:
             int: Retorna un entero simbolizando el estado de la respuesta. Estos son los posibles estados de la respuesta:
@@ -78,11 +86,12 @@ class CRUDAdmins(CRUDUsers):
             new_user_rol = models.UserRoles(
                 num_document=new_user.num_document,
                 rol=new_user.rol,
-                password=get_password_hash(new_user.password),
+                password=hash_password(new_user.password),
                 is_active=True,
             )
             db.add(new_user_rol)
             db.commit()
+            invalidate_principal(new_user.num_document)
 
             return 0
 
@@ -92,6 +101,7 @@ class CRUDAdmins(CRUDUsers):
 
         user_rol.is_active = True
         db.commit()
+        invalidate_principal(new_user.num_document)
         db.refresh(user_rol)
 
         return 0
@@ -102,6 +112,7 @@ class CRUDAdmins(CRUDUsers):
         updated_info: schemas.UserUpdateAll,
         db: Session,
         admins: bool = False,
+        hash_password: Callable[[str], str] = get_password_hash,
     ) -> Literal[0, 1, 2, 3, 4, 5]:
         """
         Actualiza la información completa de cualquier usuario dentro del sistema sin importar su estado actual (activo o no).
@@ -111,6 +122,8 @@ class CRUDAdmins(CRUDUsers):
             updated_info (UserUpdateAll): Información que se quiere actualizar.
             db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
             admins (bool): Válida si se quiere actualizar la información de algún administrador.
+            hash_password (Callable[[str], str]): Función que calcula el hash de la nueva contraseña, solo cuando los datos ya
+                son válidos. Por defecto, `get_password_hash`; las rutas usan `get_password_hash_run_sync`.
 
         Returns:
             int: Retorna un entero simbolizando el estado de la respuesta. Los posibles estados de respuesta son:
@@ -170,16 +183,34 @@ class CRUDAdmins(CRUDUsers):
             user_info.email = updated_info.email
 
         if updated_info.password is not None:
-            user_rol.password = get_password_hash(updated_info.password)
+            user_rol.password = hash_password(updated_info.password)
 
+        # El índice de los documentos del paciente cambia en la misma transacción que su número de documento;
+        # la carpeta se renombra después de guardar los cambios
+        rename_documents = (
+            updated_info.num_document is not None and user_search.rol == "patient"
+        )
         try:
+            if rename_documents:
+                db.execute(
+                    update(models.PatientDocuments)
+                    .where(
+                        models.PatientDocuments.num_document == user_search.num_document
+                    )
+                    .values(num_document=updated_info.num_document)
+                )
             db.commit()
             db.refresh(user_info)
             db.refresh(user_rol)
         except sqlalchemy.exc.IntegrityError:
+            db.rollback()
             return 3
 
-        if updated_info.num_document is not None and user_search.rol == "patient":
+        invalidate_principal(user_search.num_document)
+        if updated_info.num_document is not None:
+            invalidate_principal(updated_info.num_document)
+
+        if rename_documents:
             old_path = os.path.join(
                 settings.PATIENT_DOCS_PATH, user_search.num_document
             )
@@ -230,6 +261,7 @@ class CRUDAdmins(CRUDUsers):
 
         db.commit()
         db.refresh(user)
+        invalidate_principal(user_search.num_document)
 
         return 0
 
@@ -0,0 +1,351 @@
+import gzip
+import os
+from collections.abc import Iterator
+from datetime import date, datetime
+from typing import Any
+
+from bson import ObjectId, json_util
+from bson.errors import InvalidId
+from pymongo.errors import BulkWriteError
+
+from app import schemas
+from app.core.audit import (
+    LOG_FIELDS,
+    LOG_SORT,
+    PartitionedCollection,
+    compact_log,
+    filter_headers,
+)
+from app.core.config import settings
+from app.crud.base import CRUDBase
+
+
+DUPLICATE_KEY: int = 11000  # Código de error de mongodb para `_id` repetido
+
+
+def subtract_months(month: date, months: int) -> date:
+    """
+    Args:
+        month (datetime.date): Fecha de referencia.
+        months (int): Cantidad de meses a restar.
+
+    Returns:
+        datetime.date: Primer día del mes resultante.
+    """
+    index = month.year * 12 + month.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class CRUDApiLogs(CRUDBase):
+    """
+    Consultas sobre el historial de la API guardado en mongodb, particionado por mes con `PartitionedCollection`.
+    Los métodos son síncronos (pymongo), por lo que desde las rutas se deben ejecutar en un hilo aparte.
+    """
+
+    def create_indexes(self, collection: PartitionedCollection) -> int:
+        """
+        Crea los índices de todas las particiones del historial de la API en caso de no existir
+
+        Args:
+            collection (PartitionedCollection): Historial de la API.
+
+        Returns:
+            int: Cantidad de particiones.
+        """
+        return collection.create_indexes()
+
+    def build_query(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        method: str | None = None,
+        url: str | None = None,
+        username: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Construye el filtro del historial de la API
+
+        Args:
+            start_date (datetime.date | None): Día inicial de los registros (incluído). Por defecto, sin límite.
+            end_date (datetime.date | None): Día final de los registros (incluído). Por defecto, sin límite.
+            method (str | None): Método HTTP de las peticiones. Por defecto, cualquier método.
+            url (str | None): Plantilla de la ruta de las peticiones, p. ej. `/api/v1/patients/{num_document}`.
+                Por defecto, cualquier ruta.
+            username (str | None): Número de documento del usuario que hizo las peticiones. Por defecto, cualquier usuario.
+
+        Returns:
+            dict[str, Any]: Filtro para `find`.
+        """
+        query: dict[str, Any] = {}
+
+        date_filter = {}
+        if start_date is not None:
+            date_filter["$gte"] = datetime.combine(start_date, datetime.min.time())
+        if end_date is not None:
+            date_filter["$lte"] = datetime.combine(end_date, datetime.max.time())
+        if date_filter:
+            query[LOG_FIELDS["timestamp"]] = date_filter
+
+        if method is not None:
+            query[LOG_FIELDS["method"]] = method.upper()
+        if url is not None:
+            query[LOG_FIELDS["route"]] = url
+        if username is not None:
+            query[LOG_FIELDS["username"]] = username
+
+        return query
+
+    def parse_cursor(self, after: str | int) -> tuple[datetime, ObjectId]:
+        """
+        Args:
+            after (str | int): Llave del último registro de la página anterior, ya decodificada del cursor.
+
+        Returns:
+            tuple[datetime.datetime, bson.ObjectId]: Fecha e `_id` del registro.
+
+        Raises:
+            ValueError: Si la llave no corresponde a un registro del historial.
+        """
+        try:
+            timestamp, _id = after.split("|")
+            return datetime.fromisoformat(timestamp), ObjectId(_id)
+        except (AttributeError, InvalidId, TypeError, ValueError):
+            raise ValueError(after)
+
+    def find(
+        self,
+        collection: PartitionedCollection,
+        query: dict[str, Any],
+        after: str | int | None = None,
+        limit: int | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Busca los registros del historial, del más reciente al más antiguo. Las particiones se recorren en el
+        mismo orden y solo las que están dentro del rango de fechas del filtro y anteriores al cursor.
+
+        Args:
+            collection (PartitionedCollection): Historial de la API.
+            query (dict[str, Any]): Filtro construido con `build_query`.
+            after (str | int | None): Llave del último registro ya obtenido. Por defecto, desde el más reciente.
+            limit (int | None): Cantidad máxima de registros. Por defecto, todos.
+            batch_size (int): Cantidad de registros que se traen de mongodb por lote.
+
+        Returns:
+            collections.abc.Iterator[dict[str, Any]]: Registros tal como se guardan (ver `compact_log`).
+
+        Raises:
+            ValueError: Si el cursor no es válido. Se lanza antes de consultar mongodb.
+        """
+        field = LOG_FIELDS["timestamp"]
+        start = query.get(field, {}).get("$gte")
+        end = query.get(field, {}).get("$lte")
+
+        if after is not None:
+            timestamp, _id = self.parse_cursor(after)
+            end = timestamp if end is None else min(end, timestamp)
+            condition = {
+                "$or": [
+                    {field: {"$lt": timestamp}},
+                    {field: timestamp, "_id": {"$lt": _id}},
+                ]
+            }
+            query = {"$and": [query, condition]} if query else condition
+
+        def documents() -> Iterator[dict[str, Any]]:
+            remaining = limit
+            for partition in collection.partitions(start, end):
+                if remaining == 0:
+                    return
+
+                cursor = partition.find(query, batch_size=batch_size)
+                cursor = cursor.sort(LOG_SORT)
+                if remaining is not None:
+                    cursor = cursor.limit(remaining)
+
+                for document in cursor:
+                    yield document
+                    if remaining is not None:
+                        remaining -= 1
+
+        return documents()
+
+    def get_logs(
+        self,
+        collection: PartitionedCollection,
+        query: dict[str, Any],
+        pagination: schemas.Pagination | None = None,
+    ) -> schemas.Page[schemas.ApiHistorial]:
+        """
+        Obtiene el historial de la API, del registro más reciente al más antiguo, paginado por cursor
+
+        Args:
+            collection (PartitionedCollection): Historial de la API.
+            query (dict[str, Any]): Filtro construido con `build_query`.
+            pagination (schemas.Pagination | None): Paginación por registro. Por defecto, se obtienen todos los registros.
+
+        Returns:
+            schemas.Page[schemas.ApiHistorial]: Registros del historial.
+
+        Raises:
+            ValueError: Si el cursor de la paginación no es válido.
+        """
+        after, limit = None, None
+        if pagination is not None:
+            after = pagination.after
+            limit = pagination.limit + 1 if pagination.limit is not None else None
+
+        documents = list(self.find(collection, query, after, limit))
+        return self.create_page(
+            [schemas.ApiHistorial(**document) for document in documents],
+            [f"{x[LOG_FIELDS['timestamp']].isoformat()}|{x['_id']}" for x in documents],
+            pagination,
+        )
+
+    def stream_logs(
+        self,
+        collection: PartitionedCollection,
+        query: dict[str, Any],
+        after: str | int | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Genera el historial de la API en formato JSON lines (un registro por línea), del más reciente al más
+        antiguo, sin cargar todos los registros en memoria
+
+        Args:
+            collection (PartitionedCollection): Historial de la API.
+            query (dict[str, Any]): Filtro construido con `build_query`.
+            after (str | int | None): Llave del último registro ya obtenido. Por defecto, desde el más reciente.
+
+        Returns:
+            collections.abc.Iterator[bytes]: Líneas del archivo.
+
+        Raises:
+            ValueError: Si el cursor no es válido. Se lanza al crear el generador, antes de consultar mongodb.
+        """
+        documents = self.find(collection, query, after)
+        return (
+            schemas.ApiHistorial(**document).model_dump_json().encode() + b"\n"
+            for document in documents
+        )
+
+    def migrate(self, collection: PartitionedCollection, name: str = "api_logs") -> int:
+        """
+        Mueve los registros de la colección sin particionar que usaban las versiones anteriores del sistema a
+        las particiones de cada mes, con la forma compacta de `compact_log`, y la elimina. Si se interrumpe, se
+        puede volver a ejecutar.
+
+        Args:
+            collection (PartitionedCollection): Historial de la API.
+            name (str): Nombre de la colección sin particionar.
+
+        Returns:
+            int: Cantidad de registros movidos.
+        """
+        if name not in collection.database.list_collection_names():
+            return 0
+
+        moved = 0
+        batch: list[dict[str, Any]] = []
+        for document in collection.database[name].find(batch_size=1000):
+            batch.append(self.compact_legacy(document))
+            if len(batch) == 1000:
+                moved += self.insert_new(collection, batch)
+                batch = []
+        moved += self.insert_new(collection, batch)
+
+        collection.database.drop_collection(name)
+        return moved
+
+    def compact_legacy(self, document: dict[str, Any]) -> dict[str, Any]:
+        """
+        Args:
+            document (dict[str, Any]): Registro de una versión anterior, con los nombres de campo de
+                `schemas.ApiHistorial`, la URL sin plantilla y todas las cabeceras.
+
+        Returns:
+            dict[str, Any]: Registro compacto, con la URL como ruta y solo las cabeceras permitidas.
+        """
+        headers = document.get("headers") or {}
+        return compact_log(
+            document
+            | {
+                "route": document["url"],
+                "headers": filter_headers(headers, settings.MONGO_LOG_HEADERS),
+            }
+        )
+
+    def insert_new(
+        self, collection: PartitionedCollection, documents: list[dict[str, Any]]
+    ) -> int:
+        if not documents:
+            return 0
+
+        try:
+            collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # Los registros movidos antes de una interrupción ya existen en la partición
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != DUPLICATE_KEY for error in errors):
+                raise
+            return e.details["nInserted"]
+
+        return len(documents)
+
+    def archive(
+        self,
+        collection: PartitionedCollection,
+        path: str,
+        retention_months: int,
+        today: date | None = None,
+    ) -> list[str]:
+        """
+        Archiva los meses del historial más antiguos que el periodo de retención: cada partición se guarda en
+        un archivo JSON lines comprimido (`{path}/{partición}.jsonl.gz`, en Extended JSON de mongodb para poder
+        restaurarlo con `mongoimport`) y luego se elimina de mongodb.
+
+        Args:
+            collection (PartitionedCollection): Historial de la API.
+            path (str): Carpeta de los archivos.
+            retention_months (int): Cantidad de meses que se mantienen en mongodb, además del mes actual.
+                Con `0` no se archiva ningún mes.
+            today (datetime.date | None): Fecha de referencia. Por defecto, la fecha actual.
+
+        Returns:
+            list[str]: Rutas de los archivos creados.
+        """
+        if retention_months <= 0:
+            return []
+
+        limit = subtract_months(today or date.today(), retention_months)
+        os.makedirs(path, exist_ok=True)
+
+        archived: list[str] = []
+        for month in collection.months():
+            if month >= limit:
+                continue
+
+            name = collection.name(month)
+            filename = f"{path}/{name}.jsonl.gz"
+            partition = collection.database[name]
+
+            # El archivo solo toma su nombre final cuando está completo
+            count = 0
+            with gzip.open(f"{filename}.tmp", "wt", encoding="utf-8") as f:
+                for document in partition.find(batch_size=1000).sort("_id"):
+                    f.write(json_util.dumps(document) + "\n")
+                    count += 1
+
+            if count != partition.count_documents({}):
+                # Llegaron registros mientras se archivaba; se vuelve a intentar en la siguiente ejecución
+                os.remove(f"{filename}.tmp")
+                continue
+
+            os.replace(f"{filename}.tmp", filename)
+            collection.database.drop_collection(name)
+            archived.append(filename)
+
+        return archived
+
+
+crud_api_log: CRUDApiLogs = CRUDApiLogs()
@@ -1,13 +1,185 @@
+import base64
+import binascii
+import csv
+import io
+import itertools
+import json
+import os
 import re
-from typing import Literal, Any
+from collections.abc import Sequence
+from operator import itemgetter
+from typing import Literal, Any, TypeVar
 
 from app import models, schemas
+from app.core.config import settings
 
-from sqlalchemy import select
+from fastapi import UploadFile
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Select, String, any_, false, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session, aliased
 
+T = TypeVar("T", bound=BaseModel)
+
+IMPORT_FORMATS: tuple[str, ...] = (".csv", ".jsonl", ".ndjson")
+
+
+def encode_cursor(key: str | int) -> str:
+    """
+    Codifica la llave del último elemento de una página en un cursor opaco para la siguiente página.
+
+    Args:
+        key (str | int): Llave por la que se ordena el listado.
+
+    Returns:
+        str: Cursor en base64 (url-safe).
+    """
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str | int:
+    """
+    Decodifica un cursor generado por `encode_cursor`.
+
+    Args:
+        cursor (str): Cursor recibido en el parámetro `after`.
+
+    Returns:
+        str | int: Llave del último elemento de la página anterior.
+
+    Raises:
+        ValueError: Si el cursor no es válido.
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError):
+        raise ValueError(cursor)
+
+    if isinstance(key, bool) or not isinstance(key, str | int):
+        raise ValueError(cursor)
+
+    return key
+
+
+def parse_rows(
+    content: bytes, filename: str, model: type[T]
+) -> tuple[list[tuple[int, T]], list[schemas.ImportRowError]]:
+    """
+    Lee las filas de un archivo CSV (con encabezados) o JSON lines y las valida con un modelo. En los archivos
+    CSV, las celdas vacías toman el valor por defecto del campo.
+
+    Args:
+        content (bytes): Contenido del archivo.
+        filename (str): Nombre del archivo. Su extensión indica el formato.
+        model (type[pydantic.BaseModel]): Modelo con el que se valida cada fila.
+
+    Returns:
+        tuple[list[tuple[int, pydantic.BaseModel]], list[schemas.ImportRowError]]: Filas válidas con la línea
+        donde se encuentran y errores de las filas no válidas.
+
+    Raises:
+        ValueError: Si el formato del archivo no es soportado o no está codificado en UTF-8.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in IMPORT_FORMATS:
+        raise ValueError(filename)
+
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError(filename)
+
+    if extension == ".csv":
+        reader = csv.DictReader(io.StringIO(text, newline=""))
+        records = (
+            (reader.line_num, {k: v for k, v in row.items() if k and v})
+            for row in reader
+        )
+    else:
+        records = (
+            (line, data)
+            for line, data in enumerate(text.splitlines(), 1)
+            if data.strip()
+        )
+
+    rows: list[tuple[int, T]] = []
+    errors: list[schemas.ImportRowError] = []
+    for line, record in records:
+        try:
+            if isinstance(record, str):
+                rows.append((line, model.model_validate_json(record)))
+            else:
+                rows.append((line, model.model_validate(record)))
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(map(str, error['loc'])) or 'fila'}: {error['msg']}"
+                for error in e.errors()
+            )
+            errors.append(schemas.ImportRowError(line=line, detail=detail))
+
+    return rows, errors
+
 
 class CRUDBase:
+    def paginate(
+        self, stmt: Select, key: Any, pagination: schemas.Pagination | None
+    ) -> Select:
+        """
+        Aplica la paginación por cursor (keyset) a una consulta: ordena por la llave, filtra los elementos
+        posteriores al cursor y trae un elemento de más para saber si existe una página siguiente.
+
+        Args:
+            stmt (sqlalchemy.Select): Consulta del listado.
+            key (Any): Columna única por la cual se ordena y pagina el listado.
+            pagination (schemas.Pagination | None): Parámetros de la paginación. Si es `None`, no se pagina.
+
+        Returns:
+            sqlalchemy.Select: Consulta ordenada y paginada.
+        """
+        stmt = stmt.order_by(key)
+        if pagination is None:
+            return stmt
+
+        if pagination.after is not None:
+            # Un cursor de otro listado no tiene el mismo tipo de llave
+            if isinstance(pagination.after, key.type.python_type):
+                stmt = stmt.where(key > pagination.after)
+            else:
+                stmt = stmt.where(false())
+
+        if pagination.limit is not None:
+            stmt = stmt.limit(pagination.limit + 1)
+
+        return stmt
+
+    def create_page(
+        self,
+        items: list[Any],
+        keys: list[str | int],
+        pagination: schemas.Pagination | None,
+    ) -> schemas.Page:
+        """
+        Construye la página a partir de los resultados de una consulta paginada con `paginate`.
+
+        Args:
+            items (list[Any]): Elementos obtenidos, posiblemente con un elemento de más.
+            keys (list[str | int]): Llaves de los elementos en el mismo orden.
+            pagination (schemas.Pagination | None): Parámetros de la paginación.
+
+        Returns:
+            schemas.Page: Página con los elementos y el cursor de la siguiente página.
+        """
+        if pagination is None or pagination.limit is None:
+            return schemas.Page(items=items)
+
+        limit = pagination.limit
+        if len(items) <= limit:
+            return schemas.Page(items=items)
+
+        return schemas.Page(
+            items=items[:limit], next_cursor=encode_cursor(keys[limit - 1])
+        )
+
     def join_users(self, active: bool = True):
         stmt = select(
             models.UsersInfo.num_document,
@@ -55,6 +227,33 @@ class CRUDBase:
             email=data[8],
         )
 
+    def group_users(
+        self, rows: Sequence[Any], rol: bool = False
+    ) -> list[schemas.UserBase] | list[schemas.UserAll]:
+        """
+        Agrupa las filas de `join_users` (una por cada rol) en un usuario por número de documento. Las filas
+        deben venir ordenadas por número de documento, de forma que se recorren una sola vez.
+
+        Args:
+            rows (Sequence[Any]): Filas de la consulta ordenadas por número de documento.
+            rol (bool): Si `rol=True`, se retornan `schemas.UserAll` con todos los roles del usuario. Por defecto `rol=False`.
+
+        Returns:
+            list[schemas.UserBase] | list[schemas.UserAll]: Usuarios en el mismo orden de las filas.
+        """
+        result: list[schemas.UserBase | schemas.UserAll] = []
+        for _, group in itertools.groupby(rows, key=itemgetter(0)):
+            data = list(group)
+            userbase = self.create_user_base(data[0])
+
+            if rol:
+                roles = [(row[-2], row[-1]) for row in data]
+                result.append(schemas.UserAll(**userbase.model_dump(), roles=roles))
+            else:
+                result.append(userbase)
+
+        return result
+
     def join_doctors(self, active: bool = True):
         stmt = (
             select(
@@ -83,6 +282,29 @@ class CRUDBase:
 
         return stmt
 
+    def group_doctors(self, rows: Sequence[Any]) -> list[schemas.DoctorAll]:
+        """
+        Agrupa las filas de `join_doctors` (una por cada especialidad) en un doctor por número de documento. Las
+        filas deben venir ordenadas por número de documento, de forma que se recorren una sola vez.
+
+        Args:
+            rows (Sequence[Any]): Filas de la consulta ordenadas por número de documento.
+
+        Returns:
+            list[schemas.DoctorAll]: Doctores con sus especialidades, en el mismo orden de las filas.
+        """
+        result: list[schemas.DoctorAll] = []
+        for _, group in itertools.groupby(rows, key=itemgetter(0)):
+            data = list(group)
+            userbase = self.create_user_base(data[0])
+            specialities = [schemas.SpecialityBase(name=x[-1]) for x in data if x[-1]]
+
+            result.append(
+                schemas.DoctorAll(**userbase.model_dump(), specialities=specialities)
+            )
+
+        return result
+
     def join_patients(self, active: bool = True):
         stmt = (
             select(
@@ -148,6 +370,83 @@ class CRUDBase:
 
         return patient, doctor
 
+    async def read_import(
+        self, file: UploadFile, model: type[T]
+    ) -> tuple[list[tuple[int, T]], list[schemas.ImportRowError]] | Literal[1, 2]:
+        """
+        Lee un archivo subido para importar sus filas, validándolas con `parse_rows`
+
+        Args:
+            file (fastapi.UploadFile): Archivo CSV o JSON lines.
+            model (type[pydantic.BaseModel]): Modelo con el que se valida cada fila.
+
+        Returns:
+            tuple[list[tuple[int, pydantic.BaseModel]], list[schemas.ImportRowError]] | int: Filas válidas y errores
+            de las filas no válidas. En caso de error, retorna un entero con el estado de la respuesta:
+                - 1: El archivo supera `settings.MAX_SIZE_IMPORT`.
+                - 2: Formato de archivo no soportado o no codificado en UTF-8.
+        """
+        content = await file.read(settings.MAX_SIZE_IMPORT + 1)
+        if len(content) > settings.MAX_SIZE_IMPORT:
+            return 1
+
+        try:
+            return parse_rows(content, file.filename or "", model)
+        except ValueError:
+            return 2
+
+    def get_appointment_users(
+        self, appointments: Sequence[schemas.BaseAppointment], db: Session
+    ) -> dict[tuple[str, str], int]:
+        """
+        Obtiene en una sola consulta los pacientes y doctores activos de varias citas
+
+        Args:
+            appointments (Sequence[schemas.BaseAppointment]): Citas con los números de documento.
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+
+        Returns:
+            dict[tuple[str, str], int]: ID de cada usuario por número de documento y rol (`patient` o `doctor`).
+        """
+        documents = {info.num_doc_patient for info in appointments}
+        documents |= {info.num_doc_doctor for info in appointments}
+        if not documents:
+            return {}
+
+        # Un solo parámetro con el arreglo, sin importar la cantidad de documentos
+        stmt = select(
+            models.UserRoles.num_document, models.UserRoles.rol, models.UserRoles.id
+        ).where(
+            models.UserRoles.num_document
+            == any_(literal(list(documents), ARRAY(String))),
+            models.UserRoles.rol.in_(["patient", "doctor"]),
+            models.UserRoles.is_active == True,
+        )
+
+        return {(row[0], row[1]): row[2] for row in db.execute(stmt)}
+
+    def valid_appointment_users(
+        self, info: schemas.BaseAppointment, users: dict[tuple[str, str], int]
+    ) -> Literal[1, 2, 3] | tuple[int, int]:
+        """
+        Realiza las mismas validaciones de `valid_basic_appointment` con los usuarios de `get_appointment_users`
+
+        Returns:
+            int | tuple[int, int]: ID del paciente y del doctor, o el estado de `valid_basic_appointment`.
+        """
+        if info.num_doc_patient == info.num_doc_doctor:
+            return 3
+
+        patient = users.get((info.num_doc_patient, "patient"))
+        if patient is None:
+            return 1
+
+        doctor = users.get((info.num_doc_doctor, "doctor"))
+        if doctor is None:
+            return 2
+
+        return patient, doctor
+
     def get_user_rol(
         self, user_search: schemas.UserSearch, db: Session, active: bool = True
     ) -> models.UserRoles | None:
@@ -2,6 +2,8 @@ from typing import Literal
 
 from app import models, schemas
 from app.crud.base import CRUDBase
+from app.crud.daily_stats import crud_daily_stats
+from app.core.events import bed_board
 
 import sqlalchemy.exc
 from sqlalchemy import select
@@ -10,37 +12,59 @@ from sqlalchemy.orm import Session
 
 class CRUDBeds(CRUDBase):
     def get_beds(
-        self, db: Session, all: bool = False
-    ) -> list[schemas.models.Beds] | list[schemas.BedAll]:
+        self,
+        db: Session,
+        all: bool = False,
+        used: bool | None = None,
+        pagination: schemas.Pagination | None = None,
+    ) -> schemas.Page[schemas.models.Beds] | schemas.Page[schemas.BedAll]:
         """
-        Obtiene un listado con todas las camas del hospital
+        Obtiene un listado con todas las camas del hospital, ordenadas por su habitación
 
         Args:
             db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
             all (bool): Especifica si además quiere que se muestre la información acerca del uso de la cama.
                 Por defecto, `all=False`.
+            used (bool | None): Si `used=True`, solo las camas en uso. Si `used=False`, solo las camas libres.
+                Por defecto, todas.
+            pagination (schemas.Pagination | None): Paginación por habitación. Por defecto, se obtienen todas las camas.
         Returns:
-            list: Retorna una lista de las camas, dependiendo del paramétro `all` se retornará una lista de `schemas.models.Beds` (cuando `all=False`) o
+            schemas.Page: Retorna las camas, dependiendo del paramétro `all` serán `schemas.models.Beds` (cuando `all=False`) o
                 `schemas.BedAll` (cuando `all=True`).
         """
+        stmt = self.join_beds() if all else select(models.Beds)
+
+        if used is not None:
+            in_use = (
+                select(models.BedsUsed.id)
+                .where(models.BedsUsed.id_bed == models.Beds.id)
+                .correlate(models.Beds)
+            )
+            stmt = stmt.where(in_use.exists() if used else ~in_use.exists())
+
+        stmt = self.paginate(stmt, models.Beds.room, pagination)
+
         if not all:
-            return list(
-                map(
-                    lambda bed: schemas.models.Beds.model_validate(bed),
-                    db.query(models.Beds).all(),
-                )
+            beds = db.scalars(stmt).all()
+            return self.create_page(
+                list(map(lambda bed: schemas.models.Beds.model_validate(bed), beds)),
+                [bed.room for bed in beds],
+                pagination,
             )
 
-        stmt = self.join_beds()
         results = db.execute(stmt).all()
 
-        return list(
-            map(
-                lambda row: schemas.BedAll(
-                    room=row[0], num_doc_patient=row[1], num_doc_doctor=row[2]
-                ),
-                results,
-            )
+        return self.create_page(
+            list(
+                map(
+                    lambda row: schemas.BedAll(
+                        room=row[0], num_doc_patient=row[1], num_doc_doctor=row[2]
+                    ),
+                    results,
+                )
+            ),
+            [row[0] for row in results],
+            pagination,
         )
 
     def add_bed(self, bed_info: schemas.BedBase, db: Session) -> Literal[0, 1]:
@@ -58,10 +82,17 @@ class CRUDBeds(CRUDBase):
         """
         try:
             db.add(models.Beds(room=bed_info.room))
-            db.commit()
+            db.flush()
         except sqlalchemy.exc.IntegrityError:
+            db.rollback()
             return 1
 
+        crud_daily_stats.register_beds(1, db)
+        bed_board.stage(
+            db, schemas.BedEvent(kind="added", bed=schemas.BedAll(room=bed_info.room))
+        )
+        db.commit()
+
         return 0
 
     def delete_bed(self, room: str, db: Session) -> Literal[0, 1, 2]:
@@ -90,6 +121,10 @@ class CRUDBeds(CRUDBase):
             return 2
 
         db.delete(bed)
+        crud_daily_stats.register_beds(-1, db)
+        bed_board.stage(
+            db, schemas.BedEvent(kind="deleted", bed=schemas.BedAll(room=room))
+        )
         db.commit()
 
         return 0
@@ -1,22 +1,36 @@
+import datetime
 from typing import Literal
 
 from app import models, schemas
 from app.crud.base import CRUDBase
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session, aliased
 
 
 class CRUDConsultatations(CRUDBase):
-    def get_consultations(self, db: Session) -> list[schemas.Consultation]:
+    def get_consultations(
+        self,
+        db: Session,
+        start_date: datetime.date | None = None,
+        end_date: datetime.date | None = None,
+        num_doc_doctor: str | None = None,
+        num_doc_patient: str | None = None,
+        pagination: schemas.Pagination | None = None,
+    ) -> schemas.Page[schemas.Consultation]:
         """
-        Obtiene una lista con el historial de consultas médicas en el hospital
+        Obtiene el historial de consultas médicas en el hospital, en el orden en el que fueron registradas
 
         Args:
             db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+            start_date (datetime.date | None): Día inicial de las consultas (incluído). Por defecto, sin límite.
+            end_date (datetime.date | None): Día final de las consultas (incluído). Por defecto, sin límite.
+            num_doc_doctor (str | None): Número de documento del doctor de las consultas. Por defecto, cualquier doctor.
+            num_doc_patient (str | None): Número de documento del paciente de las consultas. Por defecto, cualquier paciente.
+            pagination (schemas.Pagination | None): Paginación por registro. Por defecto, se obtienen todas las consultas.
 
         Returns:
-            list[schemas.Consultation]: Retorna una lista con todas las consultas médicas
+            schemas.Page[schemas.Consultation]: Retorna las consultas médicas que cumplen con los filtros
         """
         doctor = aliased(models.UserRoles)
         patient = aliased(models.UserRoles)
@@ -27,14 +41,25 @@ class CRUDConsultatations(CRUDBase):
                 doctor.num_document,
                 models.MedicalConsults.area,
                 models.MedicalConsults.day,
+                models.MedicalConsults.id,
             )
             .join(doctor, doctor.id == models.MedicalConsults.id_doctor)
             .join(patient, patient.id == models.MedicalConsults.id_patient)
         )
 
+        if start_date is not None:
+            stmt = stmt.where(models.MedicalConsults.day >= start_date)
+        if end_date is not None:
+            stmt = stmt.where(models.MedicalConsults.day <= end_date)
+        if num_doc_doctor is not None:
+            stmt = stmt.where(doctor.num_document == num_doc_doctor)
+        if num_doc_patient is not None:
+            stmt = stmt.where(patient.num_document == num_doc_patient)
+
+        stmt = self.paginate(stmt, models.MedicalConsults.id, pagination)
         result = db.execute(stmt).all()
 
-        return list(
+        consultations = list(
             map(
                 lambda row: schemas.Consultation(
                     num_doc_patient=row[0],
@@ -46,6 +71,8 @@ class CRUDConsultatations(CRUDBase):
             )
         )
 
+        return self.create_page(consultations, [row[4] for row in result], pagination)
+
     def add_consultation(
         self, consultation_info: schemas.Consultation, db: Session
     ) -> Literal[0, 1, 2, 3]:
@@ -81,5 +108,46 @@ class CRUDConsultatations(CRUDBase):
 
         return 0
 
+    def import_consultations(
+        self,
+        rows: list[tuple[int, schemas.Consultation]],
+        db: Session,
+        dry_run: bool = False,
+    ) -> dict[int, Literal[1, 2, 3]]:
+        """
+        Agrega varias consultas médicas en una sola transacción. Los pacientes y doctores se obtienen en una sola
+        consulta y las filas se validan en memoria; si alguna fila no es válida, no se guarda ninguna.
+
+        Args:
+            rows (list[tuple[int, schemas.Consultation]]): Consultas médicas con la línea del archivo en la que se encuentran.
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+            dry_run (bool): Si `dry_run=True`, solo se validan las filas. Por defecto, `dry_run=False`.
+
+        Returns:
+            dict[int, int]: Estado de las filas no válidas por línea, con los mismos estados de `add_consultation`.
+        """
+        users = self.get_appointment_users([info for _, info in rows], db)
+
+        errors: dict[int, Literal[1, 2, 3]] = {}
+        consultations: list[dict] = []
+        for line, info in rows:
+            if isinstance(out := self.valid_appointment_users(info, users), int):
+                errors[line] = out
+                continue
+
+            patient, doctor = out
+            consultations.append(
+                dict(id_patient=patient, id_doctor=doctor, area=info.area, day=info.day)
+            )
+
+        if errors or dry_run or not consultations:
+            db.rollback()
+            return errors
+
+        db.execute(insert(models.MedicalConsults), consultations)
+        db.commit()
+
+        return errors
+
 
 crud_consultation: CRUDConsultatations = CRUDConsultatations()
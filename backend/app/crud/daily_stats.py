@@ -0,0 +1,207 @@
+import datetime
+
+from app import models
+
+from sqlalchemy import Select, delete, func, literal, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+
+class CRUDDailyStats:
+    """
+    Mantiene la tabla `daily_hospital_stats`, la cual tiene un registro por día con las admisiones, altas,
+    camas en uso, total de camas y días de estancia. Salvo `backfill`, ninguno de estos métodos hace `commit`, de
+    forma que las actualizaciones queden en la misma transacción de la operación que las origina.
+
+    Las camas en uso de un día son los pacientes hospitalizados al final de ese día, es decir, los que
+    ingresaron ese día o antes y no han sido dados de alta hasta ese día (incluído).
+    """
+
+    def ensure_day(self, day: datetime.date, db: Session) -> None:
+        """
+        Crea el registro de un día en caso de no existir. Las camas en uso y el total de camas se toman del
+        día anterior más cercano que tenga registro, puesto que no cambian en los días sin movimientos.
+
+        Args:
+            day (datetime.date): Día del registro.
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+        """
+        stats = models.DailyHospitalStats
+        if db.get(stats, day) is not None:
+            return None
+
+        previous = db.execute(
+            select(stats.beds_in_use, stats.total_beds)
+            .where(stats.day < day)
+            .order_by(stats.day.desc())
+            .limit(1)
+        ).first()
+        beds_in_use, total_beds = previous if previous is not None else (0, 0)
+
+        db.execute(
+            insert(stats)
+            .values(
+                day=day,
+                admissions=0,
+                discharges=0,
+                beds_in_use=beds_in_use,
+                total_beds=total_beds,
+                patient_days=0,
+            )
+            .on_conflict_do_nothing(index_elements=[stats.day])
+        )
+
+    def register_admission(
+        self, entry_day: datetime.date, db: Session, count: int = 1
+    ) -> None:
+        """
+        Registra una nueva hospitalización.
+
+        Args:
+            entry_day (datetime.date): Día de ingreso del paciente.
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+            count (int): Cantidad de hospitalizaciones con el mismo día de ingreso. Por defecto, `count=1`.
+        """
+        stats = models.DailyHospitalStats
+        self.ensure_day(entry_day, db)
+
+        db.execute(
+            update(stats)
+            .where(stats.day == entry_day)
+            .values(admissions=stats.admissions + count)
+        )
+        db.execute(
+            update(stats)
+            .where(stats.day >= entry_day)
+            .values(beds_in_use=stats.beds_in_use + count)
+        )
+
+    def register_discharge(
+        self, entry_day: datetime.date, last_day: datetime.date, db: Session
+    ) -> None:
+        """
+        Registra el alta de una hospitalización.
+
+        Args:
+            entry_day (datetime.date): Día de ingreso del paciente.
+            last_day (datetime.date): Día en el que se le dio de alta al paciente.
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+        """
+        stats = models.DailyHospitalStats
+        self.ensure_day(last_day, db)
+
+        db.execute(
+            update(stats)
+            .where(stats.day == last_day)
+            .values(
+                discharges=stats.discharges + 1,
+                patient_days=stats.patient_days + (last_day - entry_day).days,
+            )
+        )
+        db.execute(
+            update(stats)
+            .where(stats.day >= last_day)
+            .values(beds_in_use=stats.beds_in_use - 1)
+        )
+
+    def register_beds(self, delta: int, db: Session) -> None:
+        """
+        Registra el cambio en la cantidad de camas del hospital a partir del día actual.
+
+        Args:
+            delta (int): Cantidad de camas agregadas (positivo) o eliminadas (negativo).
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+        """
+        stats = models.DailyHospitalStats
+        today = datetime.date.today()
+        self.ensure_day(today, db)
+
+        db.execute(
+            update(stats)
+            .where(stats.day >= today)
+            .values(total_beds=stats.total_beds + delta)
+        )
+
+    def backfill_query(self) -> Select:
+        """
+        Construye la consulta que calcula los registros diarios a partir de todo el historial de hospitalizaciones.
+        Como las camas no guardan su fecha de creación, el total de camas de cada día es el total actual.
+
+        Returns:
+            sqlalchemy.Select: Consulta con las columnas de la tabla `daily_hospital_stats`.
+        """
+        hospitalizations = models.Hospitalizations
+
+        events = union_all(
+            select(
+                hospitalizations.entry_day.label("day"),
+                literal(1).label("admissions"),
+                literal(0).label("discharges"),
+                literal(0).label("patient_days"),
+            ),
+            select(
+                hospitalizations.last_day,
+                literal(0),
+                literal(1),
+                hospitalizations.last_day - hospitalizations.entry_day,
+            ).where(hospitalizations.last_day.is_not(None)),
+            # Siempre debe existir el registro del día actual para las camas del hospital
+            select(func.current_date(), literal(0), literal(0), literal(0)),
+        ).subquery()
+
+        daily = (
+            select(
+                events.c.day,
+                func.sum(events.c.admissions).label("admissions"),
+                func.sum(events.c.discharges).label("discharges"),
+                func.sum(events.c.patient_days).label("patient_days"),
+            )
+            .group_by(events.c.day)
+            .subquery()
+        )
+
+        n_beds = select(func.count()).select_from(models.Beds).scalar_subquery()
+
+        return select(
+            daily.c.day,
+            daily.c.admissions,
+            daily.c.discharges,
+            func.sum(daily.c.admissions - daily.c.discharges).over(
+                order_by=daily.c.day
+            ),
+            n_beds,
+            daily.c.patient_days,
+        )
+
+    def backfill(self, db: Session) -> int:
+        """
+        Reconstruye completamente la tabla `daily_hospital_stats` desde el historial de hospitalizaciones.
+
+        Args:
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+
+        Returns:
+            int: Cantidad de días registrados.
+        """
+        stats = models.DailyHospitalStats
+
+        db.execute(delete(stats))
+        db.execute(
+            insert(stats).from_select(
+                [
+                    stats.day,
+                    stats.admissions,
+                    stats.discharges,
+                    stats.beds_in_use,
+                    stats.total_beds,
+                    stats.patient_days,
+                ],
+                self.backfill_query(),
+            )
+        )
+        db.commit()
+
+        return db.query(stats).count()
+
+
+crud_daily_stats: CRUDDailyStats = CRUDDailyStats()
@@ -31,14 +31,7 @@ class CRUDDoctors(CRUDBase):
         if not query:
             return None
 
-        userbase: schemas.UserBase = self.create_user_base(query[0])
-        specialities_list: list[schemas.SpecialityBase] = [
-            schemas.SpecialityBase(name=x[-1]) for x in query if x[-1]
-        ]
-
-        return schemas.DoctorAll(
-            **userbase.model_dump(), specialities=specialities_list
-        )
+        return self.group_doctors(query)[0]
 
     def get_doctors(self, db: Session, active: bool = True) -> list[schemas.DoctorAll]:
         """
@@ -52,24 +45,11 @@ class CRUDDoctors(CRUDBase):
             list[schemas.DoctorAll]: Se retorna una lista con la información esencial de los doctores
             y sus especialidades (incluye subespecialidades).
         """
-        stmt = self.join_doctors(active)
-        query = db.execute(stmt).all()
-        results: list[schemas.DoctorAll] = []
-        num_documents: set[str] = set(map(lambda row: row[0], query))
-        for num_document in num_documents:
-            data = list(filter(lambda row: row[0] == num_document, query))
-            userbase: schemas.UserBase = self.create_user_base(data[0])
-            specialities_list: list[schemas.SpecialityBase] = [
-                schemas.SpecialityBase(name=x[-1]) for x in data if x[-1]
-            ]
-
-            results.append(
-                schemas.DoctorAll(
-                    **userbase.model_dump(), specialities=specialities_list
-                )
-            )
+        stmt = self.join_doctors(active).order_by(
+            models.UsersInfo.num_document, models.Specialities.name
+        )
 
-        return results
+        return self.group_doctors(db.execute(stmt).all())
 
     def get_speciality_doctor(
         self, speciality: str, db: Session, active: bool = True
@@ -85,13 +65,20 @@ class CRUDDoctors(CRUDBase):
         Returns:
             list[schemas.DoctorAll]: Retorna una lista con todos los doctores que tengan esa especialidad especificada.
         """
-        stmt = self.join_doctors(active).where(models.Specialities.name == speciality)
-        query = db.execute(stmt).all()
-        num_documents = set(map(lambda row: row[0], query))
+        # Se traen todas las especialidades de los doctores que tengan la especificada
+        speciality_doctors = (
+            select(models.DoctorSpecialities.doctor_id)
+            .join(models.Specialities)
+            .where(models.Specialities.name == speciality)
+            .correlate(None)
+        )
+        stmt = (
+            self.join_doctors(active)
+            .where(models.UserRoles.id.in_(speciality_doctors))
+            .order_by(models.UsersInfo.num_document, models.Specialities.name)
+        )
 
-        return [
-            self.get_doctor(num_document, db, active) for num_document in num_documents
-        ]
+        return self.group_doctors(db.execute(stmt).all())
 
     def get_specialities(self, db: Session) -> list[schemas.Speciality]:
         """
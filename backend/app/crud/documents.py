@@ -1,23 +1,191 @@
 import os
-import shutil
+import asyncio
+import hashlib
+import tempfile
+import zipfile
 from pathlib import Path
 
-from app import schemas
+from app import models, schemas
 from app.core.config import settings
+from app.core.responses import DocumentResponse
+from app.crud.base import CRUDBase
+from app.crud.histories import crud_history
 
 from fastapi import UploadFile
-from fastapi.responses import FileResponse
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from datetime import datetime
-from typing import Literal
+from collections.abc import Iterator, Sequence
+from typing import Any, Literal
+
+
+class ZipStream:
+    """
+    Destino de escritura para `zipfile.ZipFile` que guarda los bytes escritos únicamente hasta que se
+    consumen con `pop`. Como no permite `seek`, el archivo .zip se escribe con descriptores de datos
+    después de cada archivo y nunca se necesita tener el archivo completo en memoria o en disco.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class CRUDDocuments(CRUDBase):
+    """
+    Operaciones sobre los documentos de los pacientes. Los archivos se guardan en `settings.PATIENT_DOCS_PATH`
+    y cada uno tiene un registro en la tabla `patient_documents`, la cual se mantiene al agregar o eliminar
+    archivos y es la que se consulta para los listados, sin recorrer el disco.
+    """
+
+    async def save_upload(
+        self, file: UploadFile, path: str, max_size: int
+    ) -> tuple[int, str] | None:
+        """
+        Guarda un archivo subido en disco por bloques de `settings.UPLOAD_CHUNK_SIZE` bytes, sin cargarlo
+        completamente en memoria. El contenido se escribe en un archivo temporal dentro del mismo directorio
+        de destino, el cual se renombra atómicamente al terminar, de forma que nunca quede un archivo a medio
+        escribir en `path`. Las operaciones sobre el disco se ejecutan en un hilo aparte para no bloquear el
+        event loop.
+
+        Cuando se llama, Starlette ya recibió el archivo completo en un archivo temporal, así que `max_size`
+        solo evita escribir un archivo grande en el destino. Las rutas rechazan antes los cuerpos de más con
+        `UploadRoute` y `max_upload_size`.
+
+        Args:
+            file (fastapi.UploadFile): Archivo subido por el usuario
+            path (str): Ruta final del archivo
+            max_size (int): Tamaño máximo en bytes permitido para el archivo
+
+        Returns:
+            tuple[int, str] | None: Tamaño en bytes y hash SHA-256 del archivo guardado o None si supera el
+            tamaño máximo, en cuyo caso no se guarda nada.
+
+        Raises:
+            OSError: Si ocurre un error escribiendo el archivo. El archivo temporal se elimina.
+        """
+        if file.size is not None and file.size > max_size:
+            return None
+
+        fd, tmp_path = await asyncio.to_thread(
+            tempfile.mkstemp, dir=os.path.dirname(path), prefix=".upload-"
+        )
+        checksum = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+
+                def write(chunk: bytes) -> None:
+                    tmp.write(chunk)
+                    checksum.update(chunk)
+
+                size = 0
+                while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_size:
+                        break
+                    await asyncio.to_thread(write, chunk)
+
+            if size > max_size:
+                await asyncio.to_thread(os.remove, tmp_path)
+                return None
+
+            await asyncio.to_thread(os.replace, tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return size, checksum.hexdigest()
+
+    def file_checksum(self, path: str) -> tuple[int, str]:
+        """
+        Calcula el tamaño y el hash SHA-256 de un archivo leyéndolo por bloques
+
+        Args:
+            path (str): Ruta del archivo
 
+        Returns:
+            tuple[int, str]: Tamaño en bytes y hash SHA-256 del archivo
+        """
+        checksum = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            while chunk := f.read(settings.UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                checksum.update(chunk)
+
+        return size, checksum.hexdigest()
+
+    def index_file(
+        self,
+        num_document: str,
+        kind: schemas.KindDocument,
+        filename: str,
+        size: int,
+        checksum: str,
+        db: Session,
+        uploaded_by: str | None = None,
+        created_at: datetime | None = None,
+        commit: bool = True,
+    ) -> None:
+        """
+        Agrega o actualiza el registro de un archivo en el índice de documentos
+
+        Args:
+            num_document (str): Número de documento del paciente
+            kind (typing.Literal["history", "orders", "results"]): Tipo de documento
+            filename (str): Nombre del archivo
+            size (int): Tamaño en bytes del archivo
+            checksum (str): Hash SHA-256 del contenido del archivo
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql
+            uploaded_by (str | None): Número de documento del usuario que subió el archivo. Si es `None` y el
+            archivo ya estaba registrado, se conserva el valor anterior.
+            created_at (datetime | None): Fecha en la que se subió el archivo. Por defecto, la fecha actual.
+            commit (bool): Indica si se hace `commit` de la transacción. Por defecto `commit=True`.
+        """
+        documents = models.PatientDocuments
+        values = dict(
+            size=size, checksum=checksum, created_at=created_at or datetime.now()
+        )
+        updated = (
+            values if uploaded_by is None else values | {"uploaded_by": uploaded_by}
+        )
+
+        db.execute(
+            insert(documents)
+            .values(
+                num_document=num_document,
+                kind=kind,
+                filename=filename,
+                uploaded_by=uploaded_by,
+                **values,
+            )
+            .on_conflict_do_update(constraint="uq_patient_documents_file", set_=updated)
+        )
+        if commit:
+            db.commit()
 
-class CRUDDocuments:
     def get_file(
-        self, num_document: str, filename: str, kind: Literal[0, 1, 2] = 0
-    ) -> FileResponse | None:
+        self, num_document: str, filename: str, kind: Literal[0, 1, 2], db: Session
+    ) -> DocumentResponse | None:
         """
-        Obtiene un archivo de un paciente dado su número de documento y nombre
+        Obtiene un archivo de un paciente dado su número de documento y nombre. El archivo debe estar registrado
+        en el índice de documentos, del cual se toma el checksum para el ETag de la respuesta.
 
         Args:
             num_document (str): Número de documento del paciente al que se quiere consultar
@@ -26,50 +194,167 @@ class CRUDDocuments:
                 - 0: Archivo de la historia clínica del paciente.
                 - 1: Archivo de las órdenes médicas del paciente.
                 - 2: Archivo de los resultados médicos del paciente.
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql
 
         Returns:
-            fastapi.responses.FileResponse | None: Retorna un archivo con el contenido del archivo solicitado
-            o None si no existe el paciente
+            app.core.responses.DocumentResponse | None: Retorna un archivo con el contenido del archivo solicitado
+            o None si no existe el paciente o el archivo
         """
-        patient_path: str = f"{settings.PATIENT_DOCS_PATH}/{num_document}"
-        if not os.path.isdir(patient_path):
+        kind_document: schemas.KindDocument = ("history", "orders", "results")[kind]
+
+        documents = models.PatientDocuments
+        document = db.execute(
+            select(documents.checksum, documents.created_at)
+            .where(documents.num_document == num_document)
+            .where(documents.kind == kind_document)
+            .where(documents.filename == filename)
+        ).first()
+        if document is None:
             return None
 
+        patient_path: str = f"{settings.PATIENT_DOCS_PATH}/{num_document}"
         if kind == 0:
             path: str = f"{patient_path}/{filename}"
-        elif kind == 1:
-            path: str = f"{patient_path}/orders/{filename}"
         else:
-            path: str = f"{patient_path}/results/{filename}"
+            path: str = f"{patient_path}/{kind_document}/{filename}"
 
-        return FileResponse(
-            path, media_type="application/octet-stream", filename=filename
-        )
+        if not os.path.isfile(path):
+            return None
 
-    def get_documents(self, num_document: str) -> schemas.AllFiles | None:
+        return DocumentResponse(path, filename, *document)
+
+    def group_documents(self, rows: Sequence[Any]) -> list[schemas.AllFiles]:
+        """
+        Agrupa los registros (número de documento, tipo y nombre) del índice de documentos por paciente,
+        conservando el orden de la consulta
+        """
+        documents: dict[str, schemas.AllFiles] = {}
+        for num_document, kind, filename in rows:
+            if num_document not in documents:
+                documents[num_document] = schemas.AllFiles(
+                    num_document=num_document,
+                    history=self.get_history(num_document),
+                    orders=[],
+                    results=[],
+                )
+            if kind != "history":
+                getattr(documents[num_document], kind).append(filename)
+
+        return list(documents.values())
+
+    def get_documents(self, num_document: str, db: Session) -> schemas.AllFiles | None:
         """
         Obtiene todos los nombre de los documentos asociados a un paciente dado su número
         de documento
 
         Args:
             num_document (str): Número de documento del paciente al que se quiere consultar
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql
 
         Returns:
             schemas.AllFiles: Retorna un listado de archivos con todos los documentos
             asociados al paciente
         """
-        if not os.path.isdir(f"{settings.PATIENT_DOCS_PATH}/{num_document}"):
-            return None
+        documents = models.PatientDocuments
+        stmt = (
+            select(documents.num_document, documents.kind, documents.filename)
+            .where(documents.num_document == num_document)
+            .order_by(documents.kind, documents.filename)
+        )
+        result = self.group_documents(db.execute(stmt).all())
+
+        return result[0] if result else None
+
+    def get_all_documents(
+        self, db: Session, pagination: schemas.Pagination | None = None
+    ) -> schemas.Page[schemas.AllFiles]:
+        """
+        Obtiene todos los documentos de todos los pacientes del hospital, ordenados por su número de documento
+
+        Args:
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql
+            pagination (schemas.Pagination | None): Paginación por número de documento del paciente. Por defecto, se
+            obtienen todos los pacientes.
+
+        Returns:
+            schemas.Page[schemas.AllFiles]: Página con los documentos de cada paciente
+        """
+        documents = models.PatientDocuments
+        stmt = select(documents.num_document, documents.kind, documents.filename)
 
-        history = self.get_history(num_document)
-        orders = self.get_files(num_document, "orders").filenames
-        results = self.get_files(num_document, "results").filenames
+        if pagination is not None:
+            # Se pagina por paciente y no por cada uno de sus documentos
+            page_stmt = select(documents.num_document).distinct()
+            page_stmt = self.paginate(page_stmt, documents.num_document, pagination)
+            stmt = stmt.where(documents.num_document.in_(db.scalars(page_stmt).all()))
 
-        return schemas.AllFiles(
-            num_document=num_document, history=history, orders=orders, results=results
+        stmt = stmt.order_by(documents.num_document, documents.kind, documents.filename)
+        result = self.group_documents(db.execute(stmt).all())
+
+        return self.create_page(
+            result, [files.num_document for files in result], pagination
         )
 
-    def get_history(self, num_document: str) -> str | None:
+    def export_zip(
+        self,
+        db: Session,
+        num_documents: list[str] | None = None,
+        kind: schemas.KindDocument | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Genera por partes un archivo .zip con los documentos de los pacientes, leyendo cada archivo por bloques
+        de `settings.UPLOAD_CHUNK_SIZE` bytes. Los registros del índice también se leen por lotes, por lo que la
+        memoria utilizada no depende de la cantidad de pacientes ni del tamaño de los archivos. Dentro del .zip,
+        los documentos quedan en la carpeta del número de documento de cada paciente.
+
+        Args:
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+            Debe permanecer abierta mientras se consume el generador.
+            num_documents (list[str] | None): Pacientes que se desean exportar. Por defecto, todos los pacientes.
+            kind (typing.Literal["history", "orders", "results"] | None): Tipo de documento que se desea exportar.
+            Por defecto, todos los tipos.
+
+        Returns:
+            collections.abc.Iterator[bytes]: Partes consecutivas del archivo .zip
+        """
+        documents = models.PatientDocuments
+        stmt = select(documents.num_document, documents.kind, documents.filename)
+        if num_documents:
+            stmt = stmt.where(documents.num_document.in_(num_documents))
+        if kind is not None:
+            stmt = stmt.where(documents.kind == kind)
+        stmt = stmt.order_by(
+            documents.num_document, documents.kind, documents.filename
+        ).execution_options(yield_per=settings.PAGE_SIZE)
+
+        stream = ZipStream()
+        with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for num_document, file_kind, filename in db.execute(stmt):
+                folder = "" if file_kind == "history" else f"{file_kind}/"
+                path = f"{settings.PATIENT_DOCS_PATH}/{num_document}/{folder}{filename}"
+                try:
+                    info = zipfile.ZipInfo.from_file(
+                        path, f"{num_document}/{folder}{filename}"
+                    )
+                    src = open(path, "rb")
+                except FileNotFoundError:
+                    # El índice está desactualizado, ver `reconcile`
+                    continue
+
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with src, archive.open(info, "w") as dest:
+                    while chunk := src.read(settings.UPLOAD_CHUNK_SIZE):
+                        dest.write(chunk)
+                        if data := stream.pop():
+                            yield data
+
+                if data := stream.pop():
+                    yield data
+
+        if data := stream.pop():
+            yield data
+
+    def get_history(self, num_document: str) -> str:
         """
         Obtiene la historia clínica de un paciente dado su número de documento
 
@@ -80,31 +365,36 @@ class CRUDDocuments:
             str: Retorna el nombre del archivo correspondiente a la historia
             clínica del paciente
         """
-        patient_path: str = f"{settings.PATIENT_DOCS_PATH}/{num_document}"
-        if not os.path.isdir(patient_path):
-            return None
-
-        return f"{patient_path}/{settings.HISTORY_FILENAME}"
+        return (
+            f"{settings.PATIENT_DOCS_PATH}/{num_document}/{settings.HISTORY_FILENAME}"
+        )
 
-    def get_histories(self) -> list[str]:
+    def get_histories(
+        self, db: Session, pagination: schemas.Pagination | None = None
+    ) -> schemas.Page[str]:
         """
         Obtiene todas las historias clínicas de los pacientes dentro del hospital
 
+        Args:
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql
+            pagination (schemas.Pagination | None): Paginación por número de documento del paciente. Por defecto, se
+            obtienen todas las historias clínicas.
+
         Returns:
-            list[str]: Retorna una lista con todos las historias clínicas
+            schemas.Page[str]: Retorna una página con todos las historias clínicas
             de los pacientes dentro del hospital
         """
-        histories: list[str] = []
-        for num_document in os.listdir(settings.PATIENT_DOCS_PATH):
-            patient_path: str = f"{settings.PATIENT_DOCS_PATH}/{num_document}"
-            if not os.path.isdir(patient_path):
-                continue
-            histories.append(f"{patient_path}/{settings.HISTORY_FILENAME}")
+        documents = models.PatientDocuments
+        stmt = select(documents.num_document).where(documents.kind == "history")
+        stmt = self.paginate(stmt, documents.num_document, pagination)
+
+        num_documents = db.scalars(stmt).all()
+        histories = [self.get_history(num_document) for num_document in num_documents]
 
-        return histories
+        return self.create_page(histories, num_documents, pagination)
 
     def get_files(
-        self, num_document: str, kind: schemas.KindFiles
+        self, num_document: str, kind: schemas.KindFiles, db: Session
     ) -> schemas.Files | None:
         """
         Obtiene el nombre de todos los archivos de un tipo de documento dentro del hospital
@@ -115,19 +405,28 @@ class CRUDDocuments:
             kind (Literal["orders", "results"]): Indica qué tipo de archivo se desea obtener. Los valores posibles son:
                 - "orders": Archivo de las órdenes médicas del paciente.
                 - "results": Archivo de los resultados médicos del paciente.
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql
 
         Returns:
             list[str] | None: Retorna una lista con los nombres de los archivos del tipo de documento solicitado
             o None si no existe el paciente
         """
-        patient_path: str = f"{settings.PATIENT_DOCS_PATH}/{num_document}"
-        if not os.path.isdir(patient_path):
+        documents = models.PatientDocuments
+        # La historia clínica indica que el paciente existe aunque no tenga archivos
+        stmt = (
+            select(documents.kind, documents.filename)
+            .where(documents.num_document == num_document)
+            .where(documents.kind.in_(["history", kind]))
+            .order_by(documents.filename)
+        )
+        rows = db.execute(stmt).all()
+        if not rows:
             return None
 
-        filenames: list[str] = [file for file in os.listdir(f"{patient_path}/{kind}")]
+        filenames: list[str] = [filename for x, filename in rows if x == kind]
         return schemas.Files(num_document=num_document, filenames=filenames, kind=kind)
 
-    def add_history(self, num_document: str) -> None:
+    def add_history(self, num_document: str, db: Session) -> None:
         """
         Crea la historia clínica de un paciente complemetamente vacía. Este método únicamente
         se invoca cuando se agrega un nuevo paciente dentro del sistema.
@@ -135,6 +434,7 @@ class CRUDDocuments:
         Args:
             num_document (str): Número de documento del paciente al que se le quiere crear
             la historia clínica
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql
 
         Returns:
             None: Crea la historia clínica de un paciente como un archivo txt vacío. En caso
@@ -152,49 +452,83 @@ class CRUDDocuments:
         os.mkdir(f"{patient_path}/results")  # Agregar carpeta de resultados médicos
         Path(f"{patient_path}/{settings.HISTORY_FILENAME}").touch()
 
+        checksum = hashlib.sha256(b"").hexdigest()
+        self.index_file(
+            num_document, "history", settings.HISTORY_FILENAME, 0, checksum, db
+        )
+
     async def update_history(
-        self, num_document: str, history: UploadFile
-    ) -> Literal[0, 1, 2, 3]:
+        self,
+        num_document: str,
+        history: UploadFile,
+        db: AsyncSession,
+        uploaded_by: str | None = None,
+    ) -> Literal[0, 1, 2, 3, 4]:
         """
         Actualiza la historia clínica de un paciente. Cuando se actualiza la historia clínica
         se crea guarda la versión actualizada en el archivo 'history.txt' del paciente y la
-        versión anterior se guarda en la carpeta `./patient_docs/{num_document}/histories`.
+        versión anterior se guarda en el almacén de versiones del paciente (ver `CRUDHistories`).
 
         Args:
             num_document (str): Número de documento del paciente al que se le quiere actualizar
             la historia clínica
             history (fastapi.UploadFile): Archivo actualizado con la historia clínica del paciente
+            db (sqlalchemy.ext.asyncio.AsyncSession): Sesión de la base de datos para actualizar el índice de documentos
+            uploaded_by (str | None): Número de documento del usuario que actualizó la historia clínica
 
         Returns:
-            typing.Literal[0, 1, 2]: Retorna un número entero simbolizando el estado de la respuesta. Estos son los
+            typing.Literal[0, 1, 2, 3, 4]: Retorna un número entero simbolizando el estado de la respuesta. Estos son los
             los posibles resultados:
                 - 0: Resultado exitoso.
                 - 1: Error guardando el historial de la historia clínica.
                 - 2: Error al actualizar la historia clínica.
                 - 3: Paciente no encontrado.
+                - 4: El archivo supera el tamaño máximo permitido.
         """
-        # Mover archivo de la historia clínica en los historiales del paciente
         patient_path: str = f"{settings.PATIENT_DOCS_PATH}/{num_document}"
         if not os.path.isdir(patient_path):
             return 3
 
-        history_path: str = f"{patient_path}/histories"
         history_filename: str = f"{patient_path}/{settings.HISTORY_FILENAME}"
-        update_filename: str = (
-            f'{history_path}/{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.txt'
-        )
 
+        # Recibir la nueva versión en un archivo temporal antes de tocar la historia actual
+        new_filename: str = f"{history_filename}.new"
         try:
-            shutil.copyfile(history_filename, update_filename)
+            saved = await self.save_upload(
+                history, new_filename, settings.MAX_SIZE_HISTORY
+            )
         except Exception as e:
-            print(f"Copiar archivo en {update_filename} falló: {repr(e)}")
+            print(
+                f"Actualizar archivo de la historia clínica del paciente falló: {repr(e)}"
+            )
+            return 2
+
+        if saved is None:
+            return 4
+
+        # Guardar la versión actual de la historia clínica en los historiales del paciente
+        try:
+            await asyncio.to_thread(
+                crud_history.archive_file, num_document, history_filename
+            )
+        except Exception as e:
+            print(f"Guardar versión de la historia clínica falló: {repr(e)}")
+            await asyncio.to_thread(os.remove, new_filename)
             return 1
 
         # Actualizar archivo de la historia clínica del paciente
         try:
-            with open(history_filename, "wb") as f:
-                content = await history.read()
-                f.write(content)
+            await asyncio.to_thread(os.replace, new_filename, history_filename)
+            await db.run_sync(
+                lambda session: self.index_file(
+                    num_document,
+                    "history",
+                    settings.HISTORY_FILENAME,
+                    *saved,
+                    session,
+                    uploaded_by,
+                )
+            )
         except Exception as e:
             print(
                 f"Actualizar archivo de la historia clínica del paciente falló: {repr(e)}"
@@ -204,8 +538,13 @@ class CRUDDocuments:
         return 0
 
     async def add_file(
-        self, num_document: str, kind: schemas.KindFiles, file: UploadFile
-    ) -> Literal[0, 1, 2]:
+        self,
+        num_document: str,
+        kind: schemas.KindFiles,
+        file: UploadFile,
+        db: AsyncSession,
+        uploaded_by: str | None = None,
+    ) -> Literal[0, 1, 2, 3]:
         """
         Agrega un archivo de una orden médica o resultado médico a un determinado paciente
 
@@ -216,33 +555,52 @@ class CRUDDocuments:
                 - "orders": Archivo de las órdenes médicas del paciente.
                 - "results": Archivo de los resultados médicos del paciente.
             file (fastapi.UploadFile): Archivo del paciente
+            db (sqlalchemy.ext.asyncio.AsyncSession): Sesión de la base de datos para actualizar el índice de documentos
+            uploaded_by (str | None): Número de documento del usuario que subió el archivo
 
         Returns:
-            typing.Literal[0, 1]: Retorna un número entero simbolizando el estado de la respuesta. Estos son los
+            typing.Literal[0, 1, 2, 3]: Retorna un número entero simbolizando el estado de la respuesta. Estos son los
             los posibles resultados:
                 - 0: Resultado exitoso.
                 - 1: Error guardando el archivo.
                 - 2: Paciente no encontrado.
+                - 3: El archivo supera el tamaño máximo permitido.
         """
         patient_path: str = f"{settings.PATIENT_DOCS_PATH}/{num_document}"
         if not os.path.isdir(patient_path):
             return 2
         name, ext = os.path.splitext(file.filename)
-        filename = f"{patient_path}/{kind}/{name}"
-        filename += f'_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}{ext}'
+        filename = f'{name}_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}{ext}'
+        path = f"{patient_path}/{kind}/{filename}"
+
+        max_size = (
+            settings.MAX_SIZE_ORDERS if kind == "orders" else settings.MAX_SIZE_RESULTS
+        )
 
         try:
-            with open(filename, "wb") as f:
-                content = await file.read()
-                f.write(content)
+            saved = await self.save_upload(file, path, max_size)
         except Exception as e:
             print(f"Agregar archivo de {kind} del paciente falló: {repr(e)}")
             return 1
 
+        if saved is None:
+            return 3
+
+        try:
+            await db.run_sync(
+                lambda session: self.index_file(
+                    num_document, kind, filename, *saved, session, uploaded_by
+                )
+            )
+        except Exception as e:
+            print(f"Agregar archivo de {kind} al índice falló: {repr(e)}")
+            await asyncio.to_thread(os.remove, path)
+            return 1
+
         return 0
 
     def delete_file(
-        self, num_document: str, filename: str, kind: schemas.KindFiles
+        self, num_document: str, filename: str, kind: schemas.KindFiles, db: Session
     ) -> Literal[0, 1, 2, 3]:
         """
         Elimina un archivo médico de un determinado paciente (no incluye la historia clínica)
@@ -253,9 +611,10 @@ class CRUDDocuments:
             kind (typing.Literal["orders", "results"]): Indica qué tipo de archivo se desea eliminar. Los valores posibles son:
                 - "orders": Archivo de las órdenes médicas del paciente.
                 - "results": Archivo de los resultados médicos del paciente.
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql
 
         Returns:
-            Literal[0, 1, 2]: Retorna un número entero simbolizando el estado de la respuesta. Estos son los
+            Literal[0, 1, 2, 3]: Retorna un número entero simbolizando el estado de la respuesta. Estos son los
             los posibles resultados:
                 - 0: Resultado exitoso.
                 - 1: Archivo no encontrado.
@@ -265,17 +624,104 @@ class CRUDDocuments:
         patient_path: str = f"{settings.PATIENT_DOCS_PATH}/{num_document}"
         if not os.path.isdir(patient_path):
             return 3
-        filename: str = f"{patient_path}/{kind}/{filename}"
+        path: str = f"{patient_path}/{kind}/{filename}"
+
+        documents = models.PatientDocuments
+        db.execute(
+            delete(documents)
+            .where(documents.num_document == num_document)
+            .where(documents.kind == kind)
+            .where(documents.filename == filename)
+        )
 
         try:
-            os.remove(filename)
+            os.remove(path)
         except FileNotFoundError:
+            db.commit()
             return 1
         except Exception as e:
+            db.rollback()
             print(repr(e))
             return 2
 
+        db.commit()
         return 0
 
+    def reconcile(self, db: Session, full: bool = False) -> int:
+        """
+        Reconstruye el índice de documentos a partir de los archivos en `settings.PATIENT_DOCS_PATH`: agrega los
+        archivos que no estén en el índice y elimina los registros de archivos que ya no existen. Los archivos
+        cuyo tamaño no coincide con el del índice se vuelven a registrar.
+
+        Args:
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql
+            full (bool): Si es `True`, se recalcula el checksum de todos los archivos y no solo de los que no están
+            registrados o cambiaron de tamaño.
+
+        Returns:
+            int: Cantidad de registros agregados, actualizados o eliminados
+        """
+        documents = models.PatientDocuments
+        indexed = {
+            (num_document, kind, filename): (size, checksum)
+            for num_document, kind, filename, size, checksum in db.execute(
+                select(
+                    documents.num_document,
+                    documents.kind,
+                    documents.filename,
+                    documents.size,
+                    documents.checksum,
+                )
+            )
+        }
+
+        root_path = settings.PATIENT_DOCS_PATH
+        on_disk: dict[tuple[str, str, str], str] = {}
+        if os.path.isdir(root_path):
+            for num_document in os.listdir(root_path):
+                patient_path = f"{root_path}/{num_document}"
+                if not os.path.isdir(patient_path):
+                    continue
+
+                key = (num_document, "history", settings.HISTORY_FILENAME)
+                on_disk[key] = f"{patient_path}/{settings.HISTORY_FILENAME}"
+                for kind in ("orders", "results"):
+                    if not os.path.isdir(f"{patient_path}/{kind}"):
+                        continue
+                    for filename in os.listdir(f"{patient_path}/{kind}"):
+                        # Archivos temporales de subidas en curso
+                        if filename.startswith(".upload-"):
+                            continue
+                        on_disk[(num_document, kind, filename)] = (
+                            f"{patient_path}/{kind}/{filename}"
+                        )
+
+        changes = 0
+        for key, path in on_disk.items():
+            if not os.path.isfile(path):
+                continue
+            if not full and key in indexed and indexed[key][0] == os.path.getsize(path):
+                continue
+
+            saved = self.file_checksum(path)
+            if indexed.get(key) == saved:
+                continue
+
+            created_at = datetime.fromtimestamp(os.path.getmtime(path))
+            self.index_file(*key, *saved, db, None, created_at, commit=False)
+            changes += 1
+
+        for num_document, kind, filename in indexed.keys() - on_disk.keys():
+            db.execute(
+                delete(documents)
+                .where(documents.num_document == num_document)
+                .where(documents.kind == kind)
+                .where(documents.filename == filename)
+            )
+            changes += 1
+
+        db.commit()
+        return changes
+
 
 crud_document = CRUDDocuments()
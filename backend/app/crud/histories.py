@@ -0,0 +1,293 @@
+import os
+import json
+import zlib
+import difflib
+import hashlib
+import threading
+
+from app import schemas
+from app.core.config import settings
+
+from datetime import datetime
+
+
+LEGACY_DATE_FORMAT: str = "%Y-%m-%d_%H-%M-%S"
+INDEX_FILENAME: str = "index.json"
+
+
+def make_delta(old: bytes, new: bytes) -> bytes:
+    """
+    Calcula la diferencia entre dos versiones de un archivo de texto, línea por línea. La diferencia es
+    una lista JSON comprimida en la que cada elemento es un rango `[inicio, fin]` de líneas copiadas de
+    la versión anterior o un texto con las líneas nuevas.
+
+    Args:
+        old (bytes): Contenido de la versión anterior
+        new (bytes): Contenido de la nueva versión
+
+    Returns:
+        bytes: Diferencia comprimida que transforma `old` en `new`
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+
+    ops: list[list[int] | str] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j1 < j2:
+            ops.append(b"".join(new_lines[j1:j2]).decode("utf-8", "surrogateescape"))
+
+    return zlib.compress(json.dumps(ops).encode())
+
+
+def apply_delta(old: bytes, delta: bytes) -> bytes:
+    """
+    Aplica una diferencia calculada con `make_delta` sobre la versión anterior de un archivo
+
+    Args:
+        old (bytes): Contenido de la versión anterior
+        delta (bytes): Diferencia comprimida
+
+    Returns:
+        bytes: Contenido de la nueva versión
+    """
+    old_lines = old.splitlines(keepends=True)
+    content: list[bytes] = []
+    for op in json.loads(zlib.decompress(delta)):
+        if isinstance(op, list):
+            content.extend(old_lines[op[0] : op[1]])
+        else:
+            content.append(op.encode("utf-8", "surrogateescape"))
+
+    return b"".join(content)
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class CRUDHistories:
+    """
+    Almacén de versiones de las historias clínicas de los pacientes. Las versiones anteriores de la historia
+    clínica se guardan en la carpeta `./patient_docs/{num_document}/histories` como diferencias comprimidas
+    respecto a la versión anterior, con una copia completa (comprimida) cada `settings.HISTORY_SNAPSHOT_INTERVAL`
+    versiones para que reconstruir una versión nunca requiera aplicar más de ese número de diferencias.
+
+    El listado de versiones se guarda en el archivo `index.json` de la misma carpeta. Estos métodos no son
+    asíncronos, ya que hacen operaciones sobre el disco; desde las rutas se deben ejecutar en un hilo aparte.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+
+    def get_path(self, num_document: str) -> str | None:
+        patient_path: str = f"{settings.PATIENT_DOCS_PATH}/{num_document}"
+        if not os.path.isdir(patient_path):
+            return None
+
+        return f"{patient_path}/histories"
+
+    def read_index(self, history_path: str) -> list[schemas.HistoryVersion]:
+        index_path = f"{history_path}/{INDEX_FILENAME}"
+        if not os.path.exists(index_path):
+            return []
+
+        with open(index_path, "rb") as f:
+            return [schemas.HistoryVersion(**x) for x in json.load(f)]
+
+    def write_index(
+        self, history_path: str, versions: list[schemas.HistoryVersion]
+    ) -> None:
+        data = json.dumps([x.model_dump(mode="json") for x in versions])
+        write_atomic(f"{history_path}/{INDEX_FILENAME}", data.encode())
+
+    def version_filename(self, history_path: str, info: schemas.HistoryVersion) -> str:
+        return f"{history_path}/{info.version:06d}.{info.kind}.z"
+
+    def reconstruct(
+        self, history_path: str, versions: list[schemas.HistoryVersion], version: int
+    ) -> bytes:
+        """
+        Reconstruye una versión a partir de la copia completa más cercana anterior a ella
+
+        Args:
+            history_path (str): Carpeta de historiales del paciente
+            versions (list[schemas.HistoryVersion]): Listado de versiones del paciente
+            version (int): Número de la versión que se desea reconstruir
+
+        Returns:
+            bytes: Contenido de la versión
+
+        Raises:
+            ValueError: Si el contenido reconstruido no coincide con el checksum guardado
+        """
+        start = version
+        while versions[start].kind != "snapshot":
+            start -= 1
+
+        content = b""
+        for info in versions[start : version + 1]:
+            with open(self.version_filename(history_path, info), "rb") as f:
+                data = f.read()
+            if info.kind == "snapshot":
+                content = zlib.decompress(data)
+            else:
+                content = apply_delta(content, data)
+
+        if hashlib.sha256(content).hexdigest() != versions[version].checksum:
+            raise ValueError(f"Versión {version} de {history_path} corrupta")
+
+        return content
+
+    def archive(
+        self, num_document: str, content: bytes, created_at: datetime | None = None
+    ) -> schemas.HistoryVersion | None:
+        """
+        Guarda una versión anterior de la historia clínica de un paciente
+
+        Args:
+            num_document (str): Número de documento del paciente
+            content (bytes): Contenido de la historia clínica que se va a reemplazar
+            created_at (datetime | None): Fecha en la que se reemplazó la versión. Por defecto, la fecha actual.
+
+        Returns:
+            schemas.HistoryVersion | None: Información de la versión guardada o None si no existe el paciente
+        """
+        history_path = self.get_path(num_document)
+        if history_path is None:
+            return None
+
+        with self.lock:
+            versions = self.read_index(history_path)
+            version = len(versions)
+
+            kind: schemas.KindVersion = "snapshot"
+            data = zlib.compress(content)
+            if version % settings.HISTORY_SNAPSHOT_INTERVAL != 0:
+                previous = self.reconstruct(history_path, versions, version - 1)
+                delta = make_delta(previous, content)
+                # Una diferencia más grande que la copia completa no tiene sentido
+                if len(delta) < len(data):
+                    kind, data = "delta", delta
+
+            info = schemas.HistoryVersion(
+                version=version,
+                kind=kind,
+                created_at=created_at or datetime.now(),
+                size=len(content),
+                stored_size=len(data),
+                checksum=hashlib.sha256(content).hexdigest(),
+            )
+            write_atomic(self.version_filename(history_path, info), data)
+            self.write_index(history_path, versions + [info])
+
+        return info
+
+    def archive_file(
+        self, num_document: str, path: str, created_at: datetime | None = None
+    ) -> schemas.HistoryVersion | None:
+        """
+        Guarda el contenido de un archivo como una versión anterior de la historia clínica de un paciente
+
+        Args:
+            num_document (str): Número de documento del paciente
+            path (str): Ruta del archivo con la historia clínica que se va a reemplazar
+            created_at (datetime | None): Fecha en la que se reemplazó la versión. Por defecto, la fecha actual.
+
+        Returns:
+            schemas.HistoryVersion | None: Información de la versión guardada o None si no existe el paciente
+        """
+        with open(path, "rb") as f:
+            content = f.read()
+
+        return self.archive(num_document, content, created_at)
+
+    def get_versions(self, num_document: str) -> list[schemas.HistoryVersion] | None:
+        """
+        Obtiene el listado de versiones anteriores de la historia clínica de un paciente
+
+        Args:
+            num_document (str): Número de documento del paciente
+
+        Returns:
+            list[schemas.HistoryVersion] | None: Listado de versiones, de la más antigua a la más reciente,
+            o None si no existe el paciente
+        """
+        history_path = self.get_path(num_document)
+        if history_path is None:
+            return None
+
+        return self.read_index(history_path)
+
+    def get_version(self, num_document: str, version: int) -> bytes | None:
+        """
+        Reconstruye una versión anterior de la historia clínica de un paciente
+
+        Args:
+            num_document (str): Número de documento del paciente
+            version (int): Número de la versión
+
+        Returns:
+            bytes | None: Contenido de la versión o None si no existe el paciente o la versión
+        """
+        history_path = self.get_path(num_document)
+        if history_path is None:
+            return None
+
+        versions = self.read_index(history_path)
+        if not 0 <= version < len(versions):
+            return None
+
+        return self.reconstruct(history_path, versions, version)
+
+    def migrate(self, num_document: str) -> int:
+        """
+        Convierte las copias completas de la historia clínica (`histories/<fecha>.txt`) guardadas por las
+        versiones anteriores del sistema en versiones del almacén, en orden cronológico, y las elimina.
+        Se debe ejecutar antes de que el paciente tenga versiones nuevas, ya que estas se agregan al final.
+
+        Args:
+            num_document (str): Número de documento del paciente
+
+        Returns:
+            int: Cantidad de archivos convertidos
+        """
+        history_path = self.get_path(num_document)
+        if history_path is None or not os.path.isdir(history_path):
+            return 0
+
+        legacy = sorted(x for x in os.listdir(history_path) if x.endswith(".txt"))
+        for filename in legacy:
+            path = f"{history_path}/{filename}"
+            try:
+                created_at = datetime.strptime(filename[:-4], LEGACY_DATE_FORMAT)
+            except ValueError:
+                created_at = datetime.fromtimestamp(os.path.getmtime(path))
+
+            self.archive_file(num_document, path, created_at)
+            os.remove(path)
+
+        return len(legacy)
+
+    def migrate_all(self) -> int:
+        """
+        Convierte las copias completas de las historias clínicas de todos los pacientes del hospital
+
+        Returns:
+            int: Cantidad de archivos convertidos
+        """
+        if not os.path.isdir(settings.PATIENT_DOCS_PATH):
+            return 0
+
+        return sum(
+            self.migrate(num_document)
+            for num_document in os.listdir(settings.PATIENT_DOCS_PATH)
+        )
+
+
+crud_history = CRUDHistories()
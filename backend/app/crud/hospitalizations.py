@@ -1,23 +1,45 @@
 import datetime
+from collections import Counter
 from typing import Literal
 
 from app import models, schemas
 from app.crud.base import CRUDBase
+from app.crud.daily_stats import crud_daily_stats
+from app.core.events import bed_board
 
-from sqlalchemy import select, null
+import sqlalchemy.exc
+from sqlalchemy import Integer, String, any_, exists, literal, null, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session, aliased
 
 
 class CRUDHospitalizations(CRUDBase):
-    def get_hospitalizations(self, db: Session) -> list[schemas.Hospitalization]:
+    def get_hospitalizations(
+        self,
+        db: Session,
+        start_date: datetime.date | None = None,
+        end_date: datetime.date | None = None,
+        num_doc_doctor: str | None = None,
+        num_doc_patient: str | None = None,
+        active: bool | None = None,
+        pagination: schemas.Pagination | None = None,
+    ) -> schemas.Page[schemas.Hospitalization]:
         """
-        Obtiene una lista con el historial de hospitalizaciones en el hospital
+        Obtiene el historial de hospitalizaciones en el hospital, en el orden en el que fueron registradas
 
         Args:
             db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+            start_date (datetime.date | None): Día de ingreso inicial de las hospitalizaciones (incluído). Por defecto, sin límite.
+            end_date (datetime.date | None): Día de ingreso final de las hospitalizaciones (incluído). Por defecto, sin límite.
+            num_doc_doctor (str | None): Número de documento del doctor que hospitalizó. Por defecto, cualquier doctor.
+            num_doc_patient (str | None): Número de documento del paciente hospitalizado. Por defecto, cualquier paciente.
+            active (bool | None): Si `active=True`, solo las hospitalizaciones sin alta. Si `active=False`, solo las que ya
+                fueron dadas de alta. Por defecto, todas.
+            pagination (schemas.Pagination | None): Paginación por registro. Por defecto, se obtienen todas las hospitalizaciones.
 
         Returns:
-            list[schemas.Hospitalizations]: Retorna una lista con todas las hospitalizaciones
+            schemas.Page[schemas.Hospitalization]: Retorna las hospitalizaciones que cumplen con los filtros
         """
         doctor = aliased(models.UserRoles)
         patient = aliased(models.UserRoles)
@@ -28,14 +50,31 @@ class CRUDHospitalizations(CRUDBase):
                 doctor.num_document,
                 models.Hospitalizations.entry_day,
                 models.Hospitalizations.last_day,
+                models.Hospitalizations.id,
             )
             .join(doctor, doctor.id == models.Hospitalizations.id_doctor)
             .join(patient, patient.id == models.Hospitalizations.id_patient)
         )
 
+        if start_date is not None:
+            stmt = stmt.where(models.Hospitalizations.entry_day >= start_date)
+        if end_date is not None:
+            stmt = stmt.where(models.Hospitalizations.entry_day <= end_date)
+        if num_doc_doctor is not None:
+            stmt = stmt.where(doctor.num_document == num_doc_doctor)
+        if num_doc_patient is not None:
+            stmt = stmt.where(patient.num_document == num_doc_patient)
+        if active is not None:
+            stmt = stmt.where(
+                models.Hospitalizations.last_day.is_(null())
+                if active
+                else models.Hospitalizations.last_day.is_not(null())
+            )
+
+        stmt = self.paginate(stmt, models.Hospitalizations.id, pagination)
         result = db.execute(stmt).all()
 
-        return list(
+        hospitalizations = list(
             map(
                 lambda row: schemas.Hospitalization(
                     num_doc_patient=row[0],
@@ -47,9 +86,63 @@ class CRUDHospitalizations(CRUDBase):
             )
         )
 
+        return self.create_page(
+            hospitalizations, [row[4] for row in result], pagination
+        )
+
+    def get_speciality_id(
+        self, doctor: models.UserRoles, speciality: str | None, db: Session
+    ) -> int | None:
+        """
+        Obtiene el servicio (especialidad) al que se le atribuye una hospitalización del doctor.
+
+        Args:
+            doctor (models.UserRoles): Doctor que hospitaliza al paciente.
+            speciality (str | None): Nombre de la especialidad. Si `speciality=None`, se toma la primera
+                especialidad que se le registró al doctor.
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+
+        Returns:
+            int | None: Identificador de la especialidad. En caso de que el doctor no tenga esa especialidad (o
+            ninguna), se retorna `None`.
+        """
+        stmt = (
+            select(models.DoctorSpecialities.speciality_id)
+            .join(models.Specialities)
+            .where(models.DoctorSpecialities.doctor_id == doctor.id)
+        )
+        if speciality is not None:
+            stmt = stmt.where(models.Specialities.name == speciality)
+
+        return db.execute(stmt.order_by(models.DoctorSpecialities.id).limit(1)).scalar()
+
+    def bed_conflict(
+        self, id_bed: int, id_patient: int, db: Session
+    ) -> Literal[5, 6] | None:
+        """
+        Verifica si la cama ya está en uso o si el paciente ya ocupa una cama. Ambas consultas usan los
+        índices únicos de `beds_used`, por lo que no dependen de la cantidad de camas ocupadas.
+
+        Args:
+            id_bed (int): ID de la cama
+            id_patient (int): ID del paciente
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+
+        Returns:
+            int | None: 5 si la cama está en uso, 6 si el paciente ya está en una cama o None si no hay conflicto
+        """
+        beds_used = models.BedsUsed
+        if db.scalar(select(exists().where(beds_used.id_bed == id_bed))):
+            return 5
+
+        if db.scalar(select(exists().where(beds_used.id_patient == id_patient))):
+            return 6
+
+        return None
+
     def add_hospitalization(
         self, hospitalization_info: schemas.RegisterHospitalization, db: Session
-    ) -> Literal[0, 1, 2, 3, 4, 5, 6]:
+    ) -> Literal[0, 1, 2, 3, 4, 5, 6, 7]:
         """
         Agrega una nueva hospitalización a la base de datos
 
@@ -66,6 +159,7 @@ class CRUDHospitalizations(CRUDBase):
                 - 4: Cama no existente.
                 - 5: Cama en uso.
                 - 6: Paciente ya en cama
+                - 7: El doctor no tiene la especialidad especificada.
         """
         # Realizar las validaciones
         if isinstance(
@@ -75,36 +169,237 @@ class CRUDHospitalizations(CRUDBase):
 
         patient, doctor = out
 
-        bed: models.Beds | None = (
-            db.query(models.Beds)
-            .filter(models.Beds.room == hospitalization_info.room)
-            .first()
+        # Se bloquea la cama hasta el final de la transacción para que las admisiones simultáneas a la
+        # misma cama se atiendan una a la vez
+        bed: models.Beds | None = db.scalar(
+            select(models.Beds)
+            .where(models.Beds.room == hospitalization_info.room)
+            .with_for_update()
         )
         if bed is None:
             return 4
 
-        if (bed.id,) in db.execute(select(models.BedsUsed.id_bed)).all():
-            return 5
+        if (out := self.bed_conflict(bed.id, patient.id, db)) is not None:
+            db.rollback()
+            return out
 
-        if (patient.id,) in db.execute(select(models.BedsUsed.id_patient)).all():
-            return 6
+        speciality_id: int | None = self.get_speciality_id(
+            doctor, hospitalization_info.speciality, db
+        )
+        if speciality_id is None and hospitalization_info.speciality is not None:
+            db.rollback()
+            return 7
 
-        # Ocupar la cama
-        bed_used: models.BedsUsed = models.BedsUsed(
-            id_bed=bed.id, id_patient=patient.id, id_doctor=doctor.id
+        # Ocupar la cama. Las restricciones únicas de `beds_used` garantizan que una cama o un paciente
+        # no queden ocupados dos veces, aunque otra transacción los haya ocupado después de validarlos
+        bed_used: int | None = db.scalar(
+            insert(models.BedsUsed)
+            .values(id_bed=bed.id, id_patient=patient.id, id_doctor=doctor.id)
+            .on_conflict_do_nothing()
+            .returning(models.BedsUsed.id)
         )
-        db.add(bed_used)
+        if bed_used is None:
+            out = self.bed_conflict(bed.id, patient.id, db)
+            db.rollback()
+            return out or 5
 
         # Agregar la hospitalización
         hospitalization: models.Hospitalizations = models.Hospitalizations(
             id_patient=patient.id,
             id_doctor=doctor.id,
             entry_day=hospitalization_info.entry_day,
+            id_speciality=speciality_id,
         )
         db.add(hospitalization)
+        crud_daily_stats.register_admission(hospitalization_info.entry_day, db)
+        bed_board.stage(
+            db,
+            schemas.BedEvent(
+                kind="occupied",
+                bed=schemas.BedAll(
+                    room=bed.room,
+                    num_doc_patient=hospitalization_info.num_doc_patient,
+                    num_doc_doctor=hospitalization_info.num_doc_doctor,
+                ),
+            ),
+        )
         db.commit()
         return 0
 
+    def validate_import(
+        self, rows: list[tuple[int, schemas.ImportHospitalization]], db: Session
+    ) -> tuple[dict[int, Literal[1, 2, 3, 4, 5, 6, 7, 8]], list[dict], list[dict]]:
+        """
+        Valida en memoria las hospitalizaciones de `import_hospitalizations`. Los usuarios, las camas (que quedan
+        bloqueadas hasta el final de la transacción), las camas en uso y las especialidades de los doctores se
+        obtienen con una consulta cada uno.
+
+        Args:
+            rows (list[tuple[int, schemas.ImportHospitalization]]): Hospitalizaciones con la línea del archivo en la que se encuentran.
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+
+        Returns:
+            tuple[dict[int, int], list[dict], list[dict]]: Estado de las filas no válidas por línea, hospitalizaciones y
+            camas ocupadas que se deben agregar.
+        """
+        users = self.get_appointment_users([info for _, info in rows], db)
+
+        rooms = list({info.room for _, info in rows})
+        beds: dict[str, int] = {
+            room: id_bed
+            for room, id_bed in db.execute(
+                select(models.Beds.room, models.Beds.id)
+                .where(models.Beds.room == any_(literal(rooms, ARRAY(String))))
+                .order_by(models.Beds.id)
+                .with_for_update()
+            )
+        }
+
+        patients = [id_user for (_, rol), id_user in users.items() if rol == "patient"]
+        doctors = [id_user for (_, rol), id_user in users.items() if rol == "doctor"]
+        beds_used = models.BedsUsed
+        used = db.execute(
+            select(beds_used.id_bed, beds_used.id_patient).where(
+                or_(
+                    beds_used.id_bed
+                    == any_(literal(list(beds.values()), ARRAY(Integer))),
+                    beds_used.id_patient == any_(literal(patients, ARRAY(Integer))),
+                )
+            )
+        ).all()
+        used_beds = {row[0] for row in used}
+        used_patients = {row[1] for row in used}
+
+        # Especialidades de cada doctor por nombre. `None` es la primera que se le registró
+        specialities: dict[int, dict[str | None, int]] = {}
+        for doctor_id, name, speciality_id in db.execute(
+            select(
+                models.DoctorSpecialities.doctor_id,
+                models.Specialities.name,
+                models.DoctorSpecialities.speciality_id,
+            )
+            .join(models.Specialities)
+            .where(
+                models.DoctorSpecialities.doctor_id
+                == any_(literal(doctors, ARRAY(Integer)))
+            )
+            .order_by(models.DoctorSpecialities.id)
+        ):
+            doctor_specialities = specialities.setdefault(doctor_id, {})
+            doctor_specialities.setdefault(None, speciality_id)
+            doctor_specialities.setdefault(name, speciality_id)
+
+        errors: dict[int, Literal[1, 2, 3, 4, 5, 6, 7, 8]] = {}
+        hospitalizations: list[dict] = []
+        occupied: list[dict] = []
+        for line, info in rows:
+            if isinstance(out := self.valid_appointment_users(info, users), int):
+                errors[line] = out
+                continue
+
+            patient, doctor = out
+            bed = beds.get(info.room)
+            if bed is None:
+                errors[line] = 4
+                continue
+
+            # Las hospitalizaciones con alta no ocupan la cama
+            if info.last_day is None and bed in used_beds:
+                errors[line] = 5
+                continue
+
+            if info.last_day is None and patient in used_patients:
+                errors[line] = 6
+                continue
+
+            speciality_id = specialities.get(doctor, {}).get(info.speciality)
+            if speciality_id is None and info.speciality is not None:
+                errors[line] = 7
+                continue
+
+            if info.last_day is not None and not (
+                info.entry_day <= info.last_day <= datetime.date.today()
+            ):
+                errors[line] = 8
+                continue
+
+            hospitalizations.append(
+                dict(
+                    id_patient=patient,
+                    id_doctor=doctor,
+                    entry_day=info.entry_day,
+                    last_day=info.last_day,
+                    id_speciality=speciality_id,
+                )
+            )
+            if info.last_day is None:
+                # Las siguientes filas del archivo no pueden usar la misma cama ni el mismo paciente
+                used_beds.add(bed)
+                used_patients.add(patient)
+                occupied.append(dict(id_bed=bed, id_patient=patient, id_doctor=doctor))
+
+        return errors, hospitalizations, occupied
+
+    def import_hospitalizations(
+        self,
+        rows: list[tuple[int, schemas.ImportHospitalization]],
+        db: Session,
+        dry_run: bool = False,
+    ) -> dict[int, Literal[1, 2, 3, 4, 5, 6, 7, 8]]:
+        """
+        Agrega varias hospitalizaciones en una sola transacción, validadas con `validate_import`. Si alguna fila
+        no es válida, no se guarda ninguna. Las hospitalizaciones sin `last_day` ocupan la cama.
+
+        Args:
+            rows (list[tuple[int, schemas.ImportHospitalization]]): Hospitalizaciones con la línea del archivo en la que se encuentran.
+            db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+            dry_run (bool): Si `dry_run=True`, solo se validan las filas. Por defecto, `dry_run=False`.
+
+        Returns:
+            dict[int, int]: Estado de las filas no válidas por línea, con los mismos estados de `add_hospitalization` y
+            además:
+                - 8: El día de alta es anterior al de ingreso o posterior al día actual.
+        """
+        errors, hospitalizations, occupied = self.validate_import(rows, db)
+        if errors or dry_run or not hospitalizations:
+            db.rollback()
+            return errors
+
+        if occupied:
+            try:
+                db.execute(insert(models.BedsUsed), occupied)
+            except sqlalchemy.exc.IntegrityError:
+                # Otra transacción hospitalizó a alguno de los pacientes después de validarlos. Al validar de
+                # nuevo se encuentran las filas en conflicto
+                db.rollback()
+                errors = self.validate_import(rows, db)[0]
+                db.rollback()
+                if not errors:
+                    raise
+                return errors
+
+        db.execute(insert(models.Hospitalizations), hospitalizations)
+
+        for entry_day, count in Counter(
+            x["entry_day"] for x in hospitalizations
+        ).items():
+            crud_daily_stats.register_admission(entry_day, db, count)
+        for x in hospitalizations:
+            if x["last_day"] is not None:
+                crud_daily_stats.register_discharge(x["entry_day"], x["last_day"], db)
+
+        for _, info in rows:
+            if info.last_day is None:
+                bed = schemas.BedAll(
+                    room=info.room,
+                    num_doc_patient=info.num_doc_patient,
+                    num_doc_doctor=info.num_doc_doctor,
+                )
+                bed_board.stage(db, schemas.BedEvent(kind="occupied", bed=bed))
+
+        db.commit()
+        return errors
+
     def discharge_hospitalization(
         self,
         num_doc_patient: str,
@@ -160,7 +455,14 @@ class CRUDHospitalizations(CRUDBase):
             .filter(models.BedsUsed.id_patient == patient.id)
             .first()
         )
+        room: str = bed_used.beds.room
         db.delete(bed_used)
+        crud_daily_stats.register_discharge(
+            hospitalization.entry_day, hospitalization.last_day, db
+        )
+        bed_board.stage(
+            db, schemas.BedEvent(kind="vacated", bed=schemas.BedAll(room=room))
+        )
 
         db.commit()
         db.refresh(hospitalization)
@@ -24,27 +24,31 @@ class CRUDPatients(CRUDBase):
         if patient_doc == responsable_doc:
             return 2
 
-        if responsable_doc in list(
-            map(lambda patient: patient.num_document, self.get_patients(db))
-        ):
+        if self.get_patient(responsable_doc, db) is not None:
             return 3
 
         return 0
 
     def get_patients(
-        self, db: Session, active: bool = True
-    ) -> list[schemas.PatientAll]:
+        self,
+        db: Session,
+        active: bool = True,
+        pagination: schemas.Pagination | None = None,
+    ) -> schemas.Page[schemas.PatientAll]:
         """
-        Obtiene todos los pacientes que están dentro del sistema
+        Obtiene todos los pacientes que están dentro del sistema, ordenados por su número de documento
 
         Args:
             db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
             active (bool): Filtra únicamente por los usuarios que estén activos dentro del hospital. Por defecto `active=True`.
+            pagination (schemas.Pagination | None): Paginación por número de documento. Por defecto, se obtienen todos los pacientes.
 
         Returns:
-            list[schemas.PatientAll]: Retorna una lista con la información de todos los pacientes junto a la de sus responsables.
+            schemas.Page[schemas.PatientAll]: Retorna la información de los pacientes junto a la de sus responsables.
         """
-        stmt = self.join_patients(active)
+        stmt = self.paginate(
+            self.join_patients(active), models.UsersInfo.num_document, pagination
+        )
         query = db.execute(stmt).all()
         results: list[schemas.PatientAll] = []
         for row in query:
@@ -56,7 +60,7 @@ class CRUDPatients(CRUDBase):
                 )
             )
 
-        return results
+        return self.create_page(results, [row[0] for row in query], pagination)
 
     def get_patient(
         self, num_document: str, db: Session, active: bool = True
@@ -1,10 +1,18 @@
+from collections.abc import Callable
 from typing import Literal
 
 from app import models, schemas
 from app.crud.base import CRUDBase
 
-from app.core.security import verify_password, get_password_hash
+from app.core.cache import invalidate_principal
+from app.core.security import (
+    verify_password,
+    verify_password_async,
+    get_password_hash,
+)
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 
@@ -35,11 +43,44 @@ class CRUDUsers(CRUDBase):
 
         return schemas.models.UserRoles.model_validate(user)
 
+    async def authenticate_user_async(
+        self, user_login: schemas.UserLogin, db: AsyncSession
+    ) -> schemas.models.UserRoles | None:
+        """
+        Igual que `authenticate_user`, pero con la sesión asíncrona de la API y verificando la contraseña en
+        los hilos de `password_executor`, de forma que bcrypt no bloquee las demás peticiones.
+
+        Args:
+            user_login (schemas.UserLogin): Información de un usuario para entrar al sistema
+            db (sqlalchemy.ext.asyncio.AsyncSession): Sesión asíncrona de la base de datos en Postgresql.
+
+        Returns:
+            schemas.models.UserRoles | None: Retorna un objeto `schemas.models.UserRoles` si el usuario sí fue autenticado
+            correctamente. En caso contrario retorna `None`.
+        """
+        user_search: schemas.UserSearch = schemas.UserSearch(
+            num_document=user_login.num_document, rol=user_login.rol
+        )
+        user: models.UserRoles | None = await db.run_sync(
+            lambda session: self.get_user_rol(user_search, session)
+        )
+
+        if user is None:
+            return None
+        if not await verify_password_async(user_login.password, user.password):
+            return None
+
+        return schemas.models.UserRoles.model_validate(user)
+
     def get_users(
-        self, db: Session, rol: bool = False, active: bool = True
-    ) -> list[schemas.UserBase] | list[schemas.UserAll]:
+        self,
+        db: Session,
+        rol: bool = False,
+        active: bool = True,
+        pagination: schemas.Pagination | None = None,
+    ) -> schemas.Page[schemas.UserBase] | schemas.Page[schemas.UserAll]:
         """
-        Obtiene todos los usuarios dentro del sistema.
+        Obtiene todos los usuarios dentro del sistema, ordenados por su número de documento.
 
         Args:
             db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql
@@ -47,30 +88,33 @@ class CRUDUsers(CRUDBase):
                 Cuando `rol=True`, entonces la función retorna un objeto del tipo `list[UserAll]` y `list[UserInfo]` cuando `rol=False`.
                 Por defecto `rol=False`.
             active (bool): Filtro de solo los usuarios que al menos tengan un rol activo dentro del hospital. Por defecto `active=True`.
+            pagination (schemas.Pagination | None): Paginación por número de documento. Por defecto, se obtienen todos los usuarios.
 
         Returns:
-            list[schemas.UserBase] | list[schemas.UserAll]: Cuando `rol=False`, la función list[schemas.UserBase], en caso de que
-            `rol=True`, entonces se retorna `list[schema.UserAll]`
+            schemas.Page[schemas.UserBase] | schemas.Page[schemas.UserAll]: Cuando `rol=False`, la función retorna los usuarios
+            como `schemas.UserBase`, en caso de que `rol=True`, entonces se retornan como `schemas.UserAll`.
         """
         stmt = self.join_users(active=active)
-        query: list = db.execute(stmt).all()
-        num_documents: set[str] = set(map(lambda row: row[0], query))
-        result: list[schemas.UserBase | schemas.UserAll] = []
 
-        for num_document in num_documents:
-            data_num_document = list(filter(lambda row: row[0] == num_document, query))
-            userbase = self.create_user_base(data_num_document[0])
+        if pagination is not None:
+            # Se pagina por usuario y no por cada uno de sus roles
+            page_stmt = select(models.UserRoles.num_document).distinct()
+            if active:
+                page_stmt = page_stmt.where(models.UserRoles.is_active == True)
 
-            if rol:
-                roles = list(map(lambda row: (row[-2], row[-1]), data_num_document))
-                userall: schemas.UserAll = schemas.UserAll(
-                    **userbase.model_dump(), roles=roles
-                )
-                result.append(userall)
-            else:
-                result.append(userbase)
+            page_stmt = self.paginate(
+                page_stmt, models.UserRoles.num_document, pagination
+            )
+            stmt = stmt.where(
+                models.UsersInfo.num_document.in_(db.scalars(page_stmt).all())
+            )
 
-        return result
+        stmt = stmt.order_by(models.UsersInfo.num_document, models.UserRoles.rol)
+        result = self.group_users(db.execute(stmt).all(), rol)
+
+        return self.create_page(
+            result, [user.num_document for user in result], pagination
+        )
 
     def get_user(
         self, num_document: str, db: Session, rol: bool = False, active: bool = True
@@ -99,18 +143,14 @@ class CRUDUsers(CRUDBase):
         if not query:  # Si está vacía
             return None
 
-        userbase = self.create_user_base(query[0])
-        if rol:
-            roles = list(map(lambda row: (row[-2], row[-1]), query))
-            return schemas.UserAll(**userbase.model_dump(), roles=roles)
-
-        return userbase
+        return self.group_users(query, rol)[0]
 
     def update_basic_info(
         self,
         user_search: schemas.UserSearch,
         updated_info: schemas.UserUpdate,
         db: Session,
+        hash_password: Callable[[str], str] = get_password_hash,
     ) -> Literal[0, 1, 2, 3]:
         """
         Actualiza la información no esencial de cualquier usuario dentro del sistema.
@@ -119,6 +159,8 @@ class CRUDUsers(CRUDBase):
             num_document (str): Número de documento del usuario que se desea encontrar.
             updated_info (schemas.UserUpdate): Información actualizada que se desea actualizar al usuario
             db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+            hash_password (Callable[[str], str]): Función que calcula el hash de la nueva contraseña, solo cuando los datos ya
+                son válidos. Por defecto, `get_password_hash`; las rutas usan `get_password_hash_run_sync`.
 
         Returns:
             int: Retorna un entero simbolizando el estado de la respuesta. Los posibles estados de respuesta son:
@@ -135,9 +177,6 @@ class CRUDUsers(CRUDBase):
         if user_rol is None:
             return 1
 
-        if updated_info.password is not None:
-            user_rol.password = get_password_hash(updated_info.password)
-
         if updated_info.address is not None:
             user_info.address = updated_info.address
 
@@ -155,9 +194,13 @@ class CRUDUsers(CRUDBase):
                 return 2
             user_info.email = updated_info.email
 
+        if updated_info.password is not None:
+            user_rol.password = hash_password(updated_info.password)
+
         db.commit()
         db.refresh(user_info)
         db.refresh(user_rol)
+        invalidate_principal(user_search.num_document)
 
         return 0
 
@@ -1,17 +1,53 @@
+import asyncio
+import logging
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
+from pymongo.errors import PyMongoError
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.api.routes import metrics
+from app.api.deps import audit_log, collection, log_request
 from app.core.config import settings
+from app.core.db import async_engine
+from app.core.events import bed_board
+from app.core.metrics import MetricsMiddleware
+from app.crud import crud_api_log
+
+logger = logging.getLogger(__name__)
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
+async def create_log_indexes() -> None:
+    # Sobre un historial grande la creación de los índices puede tardar, por lo que no se espera a que termine
+    try:
+        await asyncio.to_thread(crud_api_log.create_indexes, collection)
+    except PyMongoError as e:
+        logger.error(f"Crear los índices del historial de la API falló: {repr(e)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    audit_log.start()
+    indexes = asyncio.create_task(create_log_indexes())
+    bed_board.start()
+    yield
+    await bed_board.stop()
+    await indexes
+    # Guardar los registros pendientes del historial de la API antes de apagar
+    await audit_log.stop()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
@@ -27,4 +63,9 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+# Se agrega después de CORS para que mida también las respuestas de CORS. Al terminar cada petición guarda
+# sus tiempos en el historial de la API
+app.add_middleware(MetricsMiddleware, log_request=log_request)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(metrics.router, tags=["metrics"])
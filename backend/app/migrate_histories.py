@@ -0,0 +1,16 @@
+import logging
+
+from app.crud import crud_history
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    logger.info("Convirtiendo los historiales de las historias clínicas")
+    n_files = crud_history.migrate_all()
+    logger.info(f"Historiales convertidos: {n_files} archivos")
+
+
+if __name__ == "__main__":
+    main()
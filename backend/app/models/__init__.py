@@ -7,3 +7,5 @@ from app.models.beds import Beds
 from app.models.beds_used import BedsUsed
 from app.models.medical_consults import MedicalConsults
 from app.models.hospitalizations import Hospitalizations
+from app.models.daily_hospital_stats import DailyHospitalStats
+from app.models.patient_documents import PatientDocuments
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Date, Integer
+
+from app.core.db import BaseModel
+
+
+class DailyHospitalStats(BaseModel):
+    __tablename__ = "daily_hospital_stats"
+
+    day = Column(Date, primary_key=True)
+    admissions = Column(Integer, default=0, nullable=False)
+    discharges = Column(Integer, default=0, nullable=False)
+    beds_in_use = Column(Integer, default=0, nullable=False)  # Al final del día
+    total_beds = Column(Integer, default=0, nullable=False)  # Al final del día
+    # Días de estancia de los pacientes dados de alta ese día
+    patient_days = Column(Integer, default=0, nullable=False)
@@ -3,6 +3,7 @@ import datetime
 from sqlalchemy import (
     Column,
     Date,
+    Index,
     Integer,
     ForeignKey,
 )
@@ -19,6 +20,34 @@ class Hospitalizations(BaseModel):
     id_doctor = Column(Integer, ForeignKey("user_roles.id"), nullable=False)
     entry_day = Column(Date, default=datetime.date.today(), nullable=False)
     last_day = Column(Date, default=None, nullable=True)
+    # Servicio (especialidad) al que se le atribuye la hospitalización
+    id_speciality = Column(
+        Integer,
+        ForeignKey(
+            "specialities.id",
+            name="fk_hospitalizations_id_speciality",
+            onupdate="CASCADE",
+            ondelete="SET NULL",
+        ),
+        nullable=True,
+    )
+
+    # Índices para los reportes por servicio en un rango de fechas
+    __table_args__ = (
+        Index("ix_hospitalizations_entry_day_speciality", entry_day, id_speciality),
+        Index(
+            "ix_hospitalizations_last_day_speciality",
+            last_day,
+            id_speciality,
+            postgresql_where=last_day.is_not(None),
+        ),
+        # Hospitalización activa de un paciente
+        Index(
+            "ix_hospitalizations_active_patient",
+            id_patient,
+            postgresql_where=last_day.is_(None),
+        ),
+    )
 
     patient = relationship(
         "UserRoles",
@@ -36,3 +65,10 @@ class Hospitalizations(BaseModel):
         passive_deletes=True,
         passive_updates=True,
     )
+    speciality = relationship(
+        "Specialities",
+        uselist=False,
+        back_populates="hospitalizations",
+        passive_deletes=True,
+        passive_updates=True,
+    )
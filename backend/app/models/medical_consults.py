@@ -6,6 +6,7 @@ from sqlalchemy import (
     Integer,
     String,
     ForeignKey,
+    Index,
 )
 from sqlalchemy.orm import relationship
 
@@ -21,6 +22,13 @@ class MedicalConsults(BaseModel):
     area = Column(String, nullable=False)
     day = Column(Date, default=datetime.date.today(), nullable=False)
 
+    # Filtros de los listados de consultas por fecha, doctor y paciente
+    __table_args__ = (
+        Index("ix_medical_consults_day", day),
+        Index("ix_medical_consults_id_doctor", id_doctor),
+        Index("ix_medical_consults_id_patient", id_patient),
+    )
+
     patient = relationship(
         "UserRoles",
         uselist=True,
@@ -0,0 +1,35 @@
+import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+
+from app.core.db import BaseModel
+
+
+# Índice de los documentos de los pacientes guardados en `settings.PATIENT_DOCS_PATH`
+class PatientDocuments(BaseModel):
+    __tablename__ = "patient_documents"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    num_document = Column(String, nullable=False)  # Carpeta del paciente
+    kind = Column(String, nullable=False)  # "history", "orders" o "results"
+    filename = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)  # Bytes
+    checksum = Column(String(64), nullable=False)  # SHA-256 del contenido
+    uploaded_by = Column(String, nullable=True)  # None si se creó automáticamente
+    created_at = Column(DateTime, default=datetime.datetime.now, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(
+            num_document, kind, filename, name="uq_patient_documents_file"
+        ),
+        # Listado de las historias clínicas de todos los pacientes
+        Index("ix_patient_documents_kind_num_document", kind, num_document),
+    )
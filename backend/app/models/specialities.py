@@ -18,3 +18,10 @@ class Specialities(BaseModel):
         passive_deletes=True,
         passive_updates=True,
     )
+    hospitalizations = relationship(
+        "Hospitalizations",
+        uselist=True,
+        back_populates="speciality",
+        passive_deletes=True,
+        passive_updates=True,
+    )
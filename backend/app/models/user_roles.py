@@ -5,6 +5,7 @@ from sqlalchemy import (
     String,
     Boolean,
     ForeignKey,
+    Index,
     UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
@@ -22,7 +23,17 @@ class UserRoles(BaseModel):
     is_active = Column(Boolean, default=True, nullable=False)
     inactivity = Column(Date, default=None, nullable=True)
 
-    __table_args__ = (UniqueConstraint("num_document", "rol", name="unique_users_rol"),)
+    __table_args__ = (
+        UniqueConstraint("num_document", "rol", name="unique_users_rol"),
+        # Listados de usuarios activos paginados por número de documento
+        Index(
+            "ix_user_roles_active_num_document",
+            num_document,
+            postgresql_where=is_active,
+        ),
+        # Listados de usuarios por rol (pacientes, doctores, ...)
+        Index("ix_user_roles_rol_num_document", rol, num_document),
+    )
 
     users_info = relationship(
         "UsersInfo",
@@ -0,0 +1,27 @@
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.crud import crud_document
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def init() -> int:
+    session: Session = SessionLocal()
+    try:
+        return crud_document.reconcile(session)
+    finally:
+        session.close()
+
+
+def main() -> None:
+    logger.info("Reconstruyendo el índice de documentos de los pacientes")
+    changes = init()
+    logger.info(f"Índice de documentos reconstruido: {changes} cambios")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,18 +16,44 @@ from app.schemas.doctors import SpecialityBase, Speciality, DoctorAll
 
 from app.schemas.patient import ResponsablesInfo, PatientAll
 
-from app.schemas.beds import BedBase, BedAll, UseBed, VacateBed
+from app.schemas.beds import (
+    BedBase,
+    BedAll,
+    BedEvent,
+    KindBedEvent,
+    UseBed,
+    VacateBed,
+)
 
 from app.schemas.consults import (
     BaseAppointment,
     Consultation,
     RegisterHospitalization,
+    ImportHospitalization,
     DischargeHospitalization,
     Hospitalization,
 )
 
 import app.schemas.models as models
 
-from app.schemas.documents import AllFiles, Files, KindFiles
+from app.schemas.documents import (
+    AllFiles,
+    Files,
+    KindFiles,
+    KindDocument,
+    KindVersion,
+    HistoryVersion,
+)
 
-from app.schemas.api import ApiResponse, ApiHistorial, Stats
+from app.schemas.api import (
+    ApiResponse,
+    ApiHistorial,
+    Stats,
+    ServiceStats,
+    Pagination,
+    Page,
+    ImportRowError,
+    ImportResult,
+    PoolStatus,
+    DatabaseHealth,
+)
@@ -1,7 +1,12 @@
-from typing import Any
-from pydantic import BaseModel
+from typing import Any, Generic, Literal, TypeVar
+from pydantic import BaseModel, model_validator
 from datetime import datetime
 
+from app.core.audit import LOG_FIELDS
+
+
+T = TypeVar("T")
+
 
 class ApiResponse(BaseModel):
     """
@@ -16,7 +21,8 @@ class ApiResponse(BaseModel):
 
 class ApiHistorial(BaseModel):
     """
-    Clase base para obtener el historial de la API.
+    Clase base para obtener el historial de la API. Se puede crear a partir de un registro guardado en mongodb,
+    que usa nombres de campo cortos (ver `app.core.audit.compact_log`).
 
     Attributes:
         username (str): Nombre del usuario que realizó la operación.
@@ -24,9 +30,15 @@ class ApiHistorial(BaseModel):
         timestamp (datetime.datetime): Fecha y hora de la operación.
         method (str): Método de la operación.
         url (str): URL de la operación.
-        headers (dict): Cabeceras de la petición de la operación.
+        route (str | None): Plantilla de la ruta de la operación, p. ej. `/api/v1/patients/{num_document}`.
+        headers (dict): Cabeceras permitidas de la petición de la operación.
         body (dict[str, Any] | None): Cuerpo de la petición de la operación.
-        process_time_ms (float): Tiempo de procesamiento de la operación en milisegundos.
+        process_time_ms (float): Tiempo de procesamiento de la operación en milisegundos, desde que se recibe
+            la petición hasta que se termina de enviar la respuesta.
+        auth_ms (float | None): Tiempo validando el token y obteniendo el usuario, en milisegundos.
+        handler_ms (float | None): Tiempo de la función de la ruta en milisegundos.
+        serialization_ms (float | None): Tiempo convirtiendo el resultado de la ruta en la respuesta, en
+            milisegundos.
         status_code (int): Código de estado de la respuesta de la operación.
     """
 
@@ -35,11 +47,27 @@ class ApiHistorial(BaseModel):
     timestamp: datetime
     method: str
     url: str
-    headers: dict[str, Any]
-    body: dict[str, Any] | None
+    route: str | None = None
+    headers: dict[str, Any] = {}
+    body: dict[str, Any] | None = None
     process_time_ms: float
+    auth_ms: float | None = None
+    handler_ms: float | None = None
+    serialization_ms: float | None = None
     status_code: int
 
+    @model_validator(mode="before")
+    @classmethod
+    def expand(cls, data: Any) -> Any:
+        if not isinstance(data, dict) or LOG_FIELDS["timestamp"] not in data:
+            return data
+
+        log = {field: data.get(key) for field, key in LOG_FIELDS.items()}
+        route, path_params = log.pop("route"), log.pop("path_params") or {}
+        log["url"] = route.format_map(path_params)
+        log["route"] = route
+        return {key: value for key, value in log.items() if value is not None}
+
 
 class Stats(BaseModel):
     """
@@ -56,3 +84,117 @@ class Stats(BaseModel):
     avg_stay: float
     admissions: float
     discharges: float
+
+
+class ServiceStats(BaseModel):
+    """
+    Clase para obtener los indicadores estadísticos de un servicio (especialidad) del hospital.
+
+    Attributes:
+        speciality (str | None): Nombre del servicio. Es `None` para las hospitalizaciones sin servicio.
+        admissions (int): Cantidad de admisiones en el rango de fechas.
+        discharges (int): Cantidad de altas en el rango de fechas.
+        avg_stay (float): Promedio de estancia de los pacientes dados de alta en el rango de fechas.
+    """
+
+    speciality: str | None
+    admissions: int
+    discharges: int
+    avg_stay: float
+
+
+class Pagination(BaseModel):
+    """
+    Clase con los parámetros de la paginación por cursor (keyset) de los listados.
+
+    Attributes:
+        limit (int | None): Cantidad máxima de elementos de la página. Si es `None`, se obtienen todos los elementos.
+        after (str | int | None): Llave del último elemento de la página anterior, ya decodificada del cursor.
+            Si es `None`, se obtiene la primera página.
+    """
+
+    limit: int | None = None
+    after: str | int | None = None
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    Clase para las respuestas paginadas por cursor.
+
+    Attributes:
+        items (list[T]): Elementos de la página.
+        next_cursor (str | None): Cursor para obtener la siguiente página, el cual se envía en el parámetro `after`.
+            Es `None` cuando no hay más elementos.
+    """
+
+    items: list[T]
+    next_cursor: str | None = None
+
+
+class ImportRowError(BaseModel):
+    """
+    Clase para los errores de una fila en la importación de un archivo.
+
+    Attributes:
+        line (int): Línea del archivo donde se encuentra la fila.
+        detail (str): Motivo por el cual la fila no es válida.
+    """
+
+    line: int
+    detail: str
+
+
+class ImportResult(BaseModel):
+    """
+    Clase para el resultado de la importación de un archivo. Las filas se guardan todas o ninguna, por lo que
+    si hay algún error no se guarda ninguna fila.
+
+    Attributes:
+        inserted (int): Cantidad de filas guardadas.
+        errors (list[ImportRowError]): Errores de las filas no válidas, en el orden del archivo.
+    """
+
+    inserted: int
+    errors: list[ImportRowError]
+
+
+class PoolStatus(BaseModel):
+    """
+    Clase para obtener el estado de un pool de conexiones a la base de datos.
+
+    Attributes:
+        size (int): Tamaño del pool (`POSTGRES_POOL_SIZE`).
+        checked_out (int): Conexiones en uso.
+        overflow (int): Conexiones abiertas por encima del tamaño del pool (hasta `POSTGRES_MAX_OVERFLOW`).
+        checked_in (int): Conexiones libres dentro del pool.
+        checkouts (int): Cantidad de conexiones entregadas.
+        timeouts (int): Veces que se esperó más de `POSTGRES_POOL_TIMEOUT` por una conexión.
+        avg_wait_ms (float): Tiempo promedio para obtener una conexión en milisegundos.
+        max_wait_ms (float): Tiempo máximo para obtener una conexión en milisegundos.
+    """
+
+    size: int
+    checked_out: int
+    overflow: int
+    checked_in: int
+    checkouts: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+
+class DatabaseHealth(BaseModel):
+    """
+    Clase para obtener el estado de la conexión con la base de datos.
+
+    Attributes:
+        status (str): `ok` si la base de datos responde, `unavailable` en caso contrario.
+        latency_ms (float): Tiempo de respuesta de la base de datos en milisegundos.
+        api_pool (PoolStatus): Pool de conexiones asíncrono que usan las rutas de la API.
+        sync_pool (PoolStatus): Pool de conexiones síncrono.
+    """
+
+    status: Literal["ok", "unavailable"]
+    latency_ms: float
+    api_pool: PoolStatus
+    sync_pool: PoolStatus
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel
 
 
@@ -31,6 +33,23 @@ class BedAll(BedBase):
     num_doc_doctor: str | None = None
 
 
+KindBedEvent = Literal["added", "deleted", "occupied", "vacated"]
+
+
+class BedEvent(BaseModel):
+    """
+    Cambio en el estado de una cama, enviado a los clientes suscritos al tablero de camas.
+
+    Attributes:
+        kind (KindBedEvent): Tipo de cambio. `added` y `deleted` cuando se agrega o elimina la cama,
+            `occupied` y `vacated` cuando se hospitaliza o se da de alta al paciente que la ocupa.
+        bed (BedAll): Estado de la cama después del cambio.
+    """
+
+    kind: KindBedEvent
+    bed: BedAll
+
+
 class UseBed(BedBase):
     """
     Modelo para registrar el uso de una cama por un paciente y un doctor.
@@ -41,10 +41,28 @@ class RegisterHospitalization(BaseAppointment):
     Attributes:
         room (str): Cuarto donde estará el paciente hospitalizado
         entry_day (datetime.date): Fecha de ingreso al hospital, por defecto la fecha actual.
+        speciality (str | None): Servicio (especialidad del doctor) al que se atribuye la hospitalización. Por
+            defecto, se toma la primera especialidad registrada del doctor.
     """
 
     room: str
     entry_day: date = date.today()
+    speciality: str | None = None
+
+
+class ImportHospitalization(RegisterHospitalization):
+    """
+    Modelo de datos para importar una hospitalización desde un archivo.
+
+    Inherits from:
+        RegisterHospitalization: Contiene la información para registrar la hospitalización
+
+    Attributes:
+        last_day (datetime.date | None): Día en que se le dio de alta al paciente. Si `last_day=None`, el
+            paciente sigue hospitalizado y ocupa la cama.
+    """
+
+    last_day: date | None = None
 
 
 class DischargeHospitalization(BaseModel):
@@ -1,8 +1,12 @@
 from pydantic import BaseModel
 from typing import Literal
 
+from datetime import datetime
+
 
 KindFiles = Literal["orders", "results"]
+KindDocument = Literal["history", "orders", "results"]
+KindVersion = Literal["snapshot", "delta"]
 
 
 class AllFiles(BaseModel):
@@ -35,3 +39,26 @@ class Files(BaseModel):
     num_document: str
     filenames: list[str]
     kind: KindFiles
+
+
+class HistoryVersion(BaseModel):
+    """
+    Versión anterior de la historia clínica de un paciente
+
+    Attributes:
+        version (int): Número de la versión, empezando desde 0 para la más antigua
+        kind (Literal["snapshot", "delta"]): Indica cómo está guardada la versión:
+            - "snapshot": Copia completa comprimida.
+            - "delta": Diferencia comprimida respecto a la versión anterior.
+        created_at (datetime): Fecha en la que la versión fue reemplazada
+        size (int): Tamaño en bytes de la versión
+        stored_size (int): Tamaño en bytes que ocupa la versión en el disco
+        checksum (str): Hash SHA-256 del contenido de la versión
+    """
+
+    version: int
+    kind: KindVersion
+    created_at: datetime
+    size: int
+    stored_size: int
+    checksum: str
@@ -99,6 +99,19 @@ class Hospitalizations(BaseModel):
     id_doctor: int
     entry_day: datetime.date = datetime.date.today()
     last_day: datetime.date | None = None
+    id_speciality: int | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class DailyHospitalStats(BaseModel):
+    day: datetime.date
+    admissions: int = 0
+    discharges: int = 0
+    beds_in_use: int = 0
+    total_beds: int = 0
+    patient_days: int = 0
 
     class Config:
         from_attributes = True
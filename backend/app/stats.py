@@ -1,97 +1,155 @@
+import datetime
+from typing import Any
+
+from sqlalchemy import ColumnElement, Select, and_, func, or_, select
 from sqlalchemy.orm import Session
 
-from app import models
+from app import models, schemas
 
 
-def get_percent_occupation(db: Session) -> float:
+def stats_query() -> Select:
     """
-    Obtiene el porcentaje de las camas ocupadas en el hospital.
+    Construye la consulta que calcula todos los indicadores del hospital en una sola ida a la base de datos,
+    leyendo únicamente la tabla de resumen diario `daily_hospital_stats` (un registro por día).
 
-    Args:
-        db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+    El promedio de admisiones (o altas) por día es la cantidad total de admisiones dividida entre la cantidad
+    de días en los que hubo admisiones, y el promedio de estancia son los días de estancia de los pacientes
+    dados de alta dividido entre la cantidad de altas.
 
     Returns:
-        float: Porcentaje de ocupación hospitalaria.
+        sqlalchemy.Select: Consulta cuyas columnas son, en orden: cantidad de camas, cantidad de camas ocupadas,
+        días de estancia, cantidad de admisiones, días con admisiones, cantidad de altas y días con altas.
     """
-    n_beds: int = db.query(models.Beds).count()
-    n_occupied: int = db.query(models.BedsUsed).count()
+    stats = models.DailyHospitalStats
+
+    # La ocupación actual es la del último día registrado hasta hoy
+    latest = (
+        select(stats)
+        .where(stats.day <= datetime.date.today())
+        .order_by(stats.day.desc())
+        .limit(1)
+    )
+    n_beds = latest.with_only_columns(stats.total_beds).scalar_subquery()
+    n_occupied = latest.with_only_columns(stats.beds_in_use).scalar_subquery()
+
+    return select(
+        n_beds,
+        n_occupied,
+        func.coalesce(func.sum(stats.patient_days), 0),
+        func.coalesce(func.sum(stats.admissions), 0),
+        func.count().filter(stats.admissions > 0),
+        func.coalesce(func.sum(stats.discharges), 0),
+        func.count().filter(stats.discharges > 0),
+    ).select_from(stats)
+
 
-    return n_occupied / n_beds if n_beds else 0
+def _ratio(numerator: Any, denominator: Any) -> float:
+    return float(numerator) / float(denominator) if denominator else 0.0
 
 
-def get_avg_stay(db: Session) -> float:
+def get_stats(db: Session) -> schemas.Stats:
     """
-    Obtiene el promedio de las estancias de los pacientes hospitalizados en el hospital.
+    Obtiene todos los indicadores estadísticos del hospital con una única consulta a la base de datos.
 
     Args:
         db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
 
     Returns:
-        float: Promedio de estancia de los pacientes en el hospital.
+        schemas.Stats: Indicadores estadísticos del hospital.
     """
-    hospitalizations: list[models.Hospitalizations] = (
-        db.query(models.Hospitalizations)
-        .filter(models.Hospitalizations.last_day.is_not(None))
-        .all()
+    (
+        n_beds,
+        n_occupied,
+        patient_days,
+        n_admissions,
+        admission_days,
+        n_discharges,
+        discharge_days,
+    ) = db.execute(stats_query()).one()
+
+    return schemas.Stats(
+        percent_occupation=_ratio(n_occupied, n_beds),
+        avg_stay=_ratio(patient_days, n_discharges),
+        admissions=_ratio(n_admissions, admission_days),
+        discharges=_ratio(n_discharges, discharge_days),
     )
 
-    n: int = len(hospitalizations)
-    if n == 0:
-        return 0.0
 
-    days_sum: int = sum(
-        [
-            (hospitalization.last_day - hospitalization.entry_day).days
-            for hospitalization in hospitalizations
-        ]
-    )
+def _in_range(
+    column: Any, start_date: datetime.date | None, end_date: datetime.date | None
+) -> ColumnElement[bool]:
+    conditions = [column.is_not(None)]
+    if start_date is not None:
+        conditions.append(column >= start_date)
+    if end_date is not None:
+        conditions.append(column <= end_date)
 
-    return days_sum / n
+    return and_(*conditions)
 
 
-def get_avg_admission(db: Session) -> float:
+def service_stats_query(
+    start_date: datetime.date | None = None, end_date: datetime.date | None = None
+) -> Select:
     """
-    Obtiene el promedio de las admisiones de los pacientes hospitalizados en el hospital por día.
+    Construye la consulta agrupada por servicio (especialidad) con las admisiones, altas y promedio de estancia
+    en un rango de fechas. Las admisiones se cuentan por su día de ingreso y las altas (junto a su estancia) por
+    su día de alta.
 
     Args:
-        db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+        start_date (datetime.date | None): Fecha inicial del rango (incluída). Si es `None`, no hay límite inferior.
+        end_date (datetime.date | None): Fecha final del rango (incluída). Si es `None`, no hay límite superior.
 
     Returns:
-        float: Promedio de admisiones de los pacientes en el hospital.
+        sqlalchemy.Select: Consulta cuyas columnas son el nombre del servicio, las admisiones, las altas y el
+        promedio de estancia.
     """
-    query = db.query(models.Hospitalizations.entry_day)
-    admissions: list[int] = []
-    for day in query.distinct().all():
-        admissions.append(
-            query.filter(models.Hospitalizations.entry_day == day[0]).count()
+    hospitalizations = models.Hospitalizations
+
+    admitted = _in_range(hospitalizations.entry_day, start_date, end_date)
+    discharged = _in_range(hospitalizations.last_day, start_date, end_date)
+
+    return (
+        select(
+            models.Specialities.name,
+            func.count().filter(admitted),
+            func.count().filter(discharged),
+            func.avg(hospitalizations.last_day - hospitalizations.entry_day).filter(
+                discharged
+            ),
         )
-
-    try:
-        return sum(admissions) / len(admissions)
-    except ZeroDivisionError:
-        return 0.0
+        .select_from(hospitalizations)
+        .join(models.Specialities, isouter=True)
+        .where(or_(admitted, discharged))
+        .group_by(models.Specialities.name)
+        .order_by(models.Specialities.name)
+    )
 
 
-def get_avg_discharge(db: Session) -> float:
+def get_service_stats(
+    db: Session,
+    start_date: datetime.date | None = None,
+    end_date: datetime.date | None = None,
+) -> list[schemas.ServiceStats]:
     """
-    Obtiene el promedio de altas a los pacientes hospitalizados en el hospital por día.
+    Obtiene las admisiones, altas y promedio de estancia de cada servicio (especialidad) del hospital en un
+    rango de fechas, con una única consulta agrupada.
 
     Args:
         db (sqlalchemy.orm.Session): Sesión de la base de datos para hacer las consultas a la base de datos en Postgresql.
+        start_date (datetime.date | None): Fecha inicial del rango (incluída). Por defecto, sin límite.
+        end_date (datetime.date | None): Fecha final del rango (incluída). Por defecto, sin límite.
 
     Returns:
-        float: Promedio de dadas de altas a los pacientes en el hospital por día.
+        list[schemas.ServiceStats]: Indicadores de cada servicio con movimientos en el rango de fechas.
     """
-    query = db.query(models.Hospitalizations.last_day)
-    discharges: list[int] = []
-    for day in (
-        query.filter(models.Hospitalizations.last_day.is_not(None)).distinct().all()
-    ):
-        discharges.append(
-            query.filter(models.Hospitalizations.last_day == day[0]).count()
+    results = db.execute(service_stats_query(start_date, end_date)).all()
+
+    return [
+        schemas.ServiceStats(
+            speciality=speciality,
+            admissions=admissions,
+            discharges=discharges,
+            avg_stay=float(avg_stay) if avg_stay is not None else 0.0,
         )
-
-    try:
-        return sum(discharges) / len(discharges)
-    except ZeroDivisionError:
-        return 0.0
+        for speciality, admissions, discharges, avg_stay in results
+    ]
@@ -1,7 +1,13 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.api.deps import collection
 from app.core.config import settings
+from app.crud.base import encode_cursor
 
 endpoint = settings.API_V1_STR
 
@@ -27,7 +33,9 @@ def test_get_api_historial(
     client: TestClient, non_superuser_token: dict[str, str]
 ) -> None:
     response = client.get(
-        f"{endpoint}/api-historial", headers=non_superuser_token
+        f"{endpoint}/api-historial",
+        headers=non_superuser_token,
+        params={"paginate": False},
     )
 
     assert response.status_code == 200
@@ -49,4 +57,85 @@ def test_get_api_historial(
     assert "headers" in example
     assert "body" in example
     assert "process_time_ms" in example
+    assert "auth_ms" in example
+    assert "handler_ms" in example
+    assert "serialization_ms" in example
     assert "status_code" in example
+
+
+def test_get_api_historial_paginated(
+    client: TestClient, non_superuser_token: dict[str, str]
+) -> None:
+    username = uuid.uuid4().hex
+    timestamp = datetime(2024, 1, 1).replace(microsecond=0)
+    collection.insert_many(
+        [
+            {
+                "u": username,
+                "r": "admin",
+                "t": timestamp + timedelta(minutes=minutes),
+                "m": "GET",
+                "p": f"/api/v1/{minutes}",
+                "d": 1.0,
+                "s": 200,
+            }
+            # Dos registros con la misma fecha para probar el desempate por `_id`
+            for minutes in (0, 1, 1)
+        ]
+    )
+
+    params = {"username": username, "limit": 2}
+    response = client.get(
+        f"{endpoint}/api-historial", headers=non_superuser_token, params=params
+    )
+    assert response.status_code == 200
+
+    content = response.json()
+    assert [x["url"] for x in content["items"]] == ["/api/v1/1", "/api/v1/1"]
+    assert content["next_cursor"] is not None
+
+    params["after"] = content["next_cursor"]
+    response = client.get(
+        f"{endpoint}/api-historial", headers=non_superuser_token, params=params
+    )
+    content = response.json()
+    assert [x["url"] for x in content["items"]] == ["/api/v1/0"]
+    assert content["next_cursor"] is None
+
+    params = {"username": username, "format": "ndjson"}
+    response = client.get(
+        f"{endpoint}/api-historial", headers=non_superuser_token, params=params
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [x["url"] for x in lines] == ["/api/v1/1", "/api/v1/1", "/api/v1/0"]
+
+    # Cursor válido de otro listado
+    params = {"after": encode_cursor("no_existe")}
+    response = client.get(
+        f"{endpoint}/api-historial", headers=non_superuser_token, params=params
+    )
+    assert response.status_code == 400
+
+
+def test_get_stats_by_service(
+    client: TestClient, non_superuser_token: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{endpoint}/stats/services",
+        headers=non_superuser_token,
+        params={"start_date": "2024-01-01"},
+    )
+
+    assert response.status_code == 200
+
+    content = response.json()
+    assert isinstance(content, list)
+
+    for service in content:
+        assert "speciality" in service
+        assert "admissions" in service
+        assert "discharges" in service
+        assert "avg_stay" in service
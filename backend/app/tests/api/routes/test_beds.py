@@ -13,7 +13,7 @@ endpoint = f"{settings.API_V1_STR}/beds"
 
 def test_get_bed(client: TestClient, superuser_token: dict[str, str]) -> None:
     response = client.get(
-        f"{endpoint}/", headers=superuser_token, params={"all": False}
+        f"{endpoint}/", headers=superuser_token, params={"all": False, "paginate": False}
     )
 
     assert response.status_code == 200
@@ -33,7 +33,7 @@ def test_get_bed(client: TestClient, superuser_token: dict[str, str]) -> None:
 
 def test_get_bed_all(client: TestClient, superuser_token: dict[str, str]) -> None:
     response = client.get(
-        f"{endpoint}/", headers=superuser_token, params={"all": True}
+        f"{endpoint}/", headers=superuser_token, params={"all": True, "paginate": False}
     )
 
     assert response.status_code == 200
@@ -52,6 +52,39 @@ def test_get_bed_all(client: TestClient, superuser_token: dict[str, str]) -> Non
     assert "num_doc_doctor" in bed_example
 
 
+def test_get_bed_paginated(
+    client: TestClient, superuser_token: dict[str, str], db: Session
+) -> None:
+    beds = [create_random_bed(db).room for _ in range(3)]
+
+    rooms: list[str] = []
+    params = {"limit": 2}
+    while True:
+        response = client.get(f"{endpoint}/", headers=superuser_token, params=params)
+        assert response.status_code == 200
+
+        content = response.json()
+        assert len(content["items"]) <= 2
+        rooms.extend(bed["room"] for bed in content["items"])
+
+        if content["next_cursor"] is None:
+            break
+        params["after"] = content["next_cursor"]
+
+    assert len(rooms) == len(set(rooms))
+    assert set(beds) <= set(rooms)
+
+
+def test_get_bed_invalid_cursor(
+    client: TestClient, superuser_token: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{endpoint}/", headers=superuser_token, params={"after": "%%%"}
+    )
+
+    assert response.status_code == 400
+
+
 def test_add_bed(client: TestClient, superuser_token: dict[str, str]) -> None:
     bed = random_bed()
     response = client.post(
@@ -15,7 +15,7 @@ endpoint = f"{settings.API_V1_STR}/consultations"
 
 def test_get_consultation(client: TestClient, superuser_token: dict[str, str]) -> None:
     response = client.get(
-        f"{endpoint}/", headers=superuser_token
+        f"{endpoint}/", headers=superuser_token, params={"paginate": False}
     )
 
     assert response.status_code == 200
@@ -117,3 +117,41 @@ def test_add_consultation_patient_doctor_same_document(
     response = client.post(f"{endpoint}/", headers=doctor_token, json=json)
 
     assert response.status_code == 409
+
+
+def test_import_consultations(
+    client: TestClient, superuser_token: dict[str, str], db: Session
+) -> None:
+    patient = create_random_patient(db)
+    doctor = create_doctor_info(db)
+
+    content = (
+        "num_doc_patient,num_doc_doctor,area,day\n"
+        f"{patient.num_document},{doctor.num_document},area1,2024-01-01\n"
+        f"{patient.num_document},{non_existent_document},area1,\n"
+        f"{patient.num_document},{doctor.num_document},,2024-01-01\n"
+    )
+    files = {"file": ("consultas.csv", content.encode())}
+
+    response = client.post(f"{endpoint}/import", headers=superuser_token, files=files)
+    assert response.status_code == 200
+
+    content = response.json()
+    assert content["inserted"] == 0
+    assert [error["line"] for error in content["errors"]] == [3, 4]
+    assert content["errors"][0]["detail"] == "Doctor no encontrado"
+
+    consultation = schemas.Consultation(
+        num_doc_doctor=doctor.num_document,
+        num_doc_patient=patient.num_document,
+        area="area1",
+    )
+    files = {"file": ("consultas.jsonl", consultation.model_dump_json().encode())}
+
+    response = client.post(f"{endpoint}/import", headers=superuser_token, files=files)
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 1, "errors": []}
+
+    files = {"file": ("consultas.txt", b"")}
+    response = client.post(f"{endpoint}/import", headers=superuser_token, files=files)
+    assert response.status_code == 400
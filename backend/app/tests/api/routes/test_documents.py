@@ -1,7 +1,12 @@
+import io
+import zipfile
+
+import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.crud import crud_history
 
 from app.tests.utils.patient import create_random_patient
 
@@ -27,11 +32,9 @@ def test_get_all_documents(
     assert "results" in content
 
 
-def test_get_all(
-    client: TestClient, non_superuser_token: dict[str, str]
-) -> None:
+def test_get_all(client: TestClient, non_superuser_token: dict[str, str]) -> None:
     response = client.get(
-        f"{endpoint}/all", headers=non_superuser_token
+        f"{endpoint}/all", headers=non_superuser_token, params={"paginate": False}
     )
 
     assert response.status_code == 200
@@ -48,11 +51,9 @@ def test_get_all(
     assert "results" in example
 
 
-def test_get_histories(
-    client: TestClient, non_superuser_token: dict[str, str]
-) -> None:
+def test_get_histories(client: TestClient, non_superuser_token: dict[str, str]) -> None:
     response = client.get(
-        f"{endpoint}/histories", headers=non_superuser_token
+        f"{endpoint}/histories", headers=non_superuser_token, params={"paginate": False}
     )
 
     assert response.status_code == 200
@@ -95,3 +96,140 @@ def test_get_results(
     assert "filenames" in content
     assert "kind" in content
 
+
+def test_history_versions(
+    client: TestClient,
+    doctor_token: dict[str, str],
+    non_superuser_token: dict[str, str],
+    db: Session,
+) -> None:
+    patient = create_random_patient(db)
+    for content in [b"primera version\n", b"segunda version\n"]:
+        response = client.put(
+            f"{endpoint}/histories/{patient.num_document}",
+            headers=doctor_token,
+            files={"history": ("history.txt", content)},
+        )
+        assert response.status_code == 200
+
+    response = client.get(
+        f"{endpoint}/histories/{patient.num_document}/versions",
+        headers=non_superuser_token,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [x["version"] for x in content] == [0, 1]
+
+    response = client.get(
+        f"{endpoint}/histories/{patient.num_document}/versions/1",
+        headers=non_superuser_token,
+    )
+    assert response.status_code == 200
+    assert response.content == b"primera version\n"
+
+    response = client.get(
+        f"{endpoint}/histories/{patient.num_document}/versions/2",
+        headers=non_superuser_token,
+    )
+    assert response.status_code == 404
+
+
+def test_get_histories_paginated(
+    client: TestClient, non_superuser_token: dict[str, str], db: Session
+) -> None:
+    create_random_patient(db)
+    create_random_patient(db)
+
+    response = client.get(
+        f"{endpoint}/histories", headers=non_superuser_token, params={"limit": 1}
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert len(content["items"]) == 1
+    assert content["next_cursor"] is not None
+
+    response = client.get(
+        f"{endpoint}/histories",
+        headers=non_superuser_token,
+        params={"limit": 1, "after": content["next_cursor"]},
+    )
+    assert response.status_code == 200
+    assert response.json()["items"] != content["items"]
+
+
+def test_update_history_too_large(
+    client: TestClient,
+    doctor_token: dict[str, str],
+    db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "MAX_SIZE_HISTORY", 6)
+    patient = create_random_patient(db)
+
+    response = client.put(
+        f"{endpoint}/histories/{patient.num_document}",
+        headers=doctor_token,
+        files={"history": ("history.txt", b"0" * 10)},
+    )
+    assert response.status_code == 413
+    assert crud_history.get_versions(patient.num_document) == []
+
+
+def test_export_documents(
+    client: TestClient, non_superuser_token: dict[str, str], db: Session
+) -> None:
+    patient = create_random_patient(db)
+
+    response = client.get(
+        f"{endpoint}/export",
+        headers=non_superuser_token,
+        params={"num_document": patient.num_document},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == [f"{patient.num_document}/{settings.HISTORY_FILENAME}"]
+
+
+def test_download_history_conditional(
+    client: TestClient,
+    doctor_token: dict[str, str],
+    non_superuser_token: dict[str, str],
+    db: Session,
+) -> None:
+    patient = create_random_patient(db)
+    content = b"historia clinica del paciente\n"
+    response = client.put(
+        f"{endpoint}/histories/{patient.num_document}",
+        headers=doctor_token,
+        files={"history": ("history.txt", content)},
+    )
+    assert response.status_code == 200
+
+    url = f"{endpoint}/histories/{patient.num_document}"
+    response = client.get(url, headers=non_superuser_token)
+    assert response.status_code == 200
+    assert response.content == content
+    etag = response.headers["etag"]
+
+    headers = non_superuser_token | {"If-None-Match": etag}
+    response = client.get(url, headers=headers)
+    assert response.status_code == 304
+
+    headers = non_superuser_token | {"Range": "bytes=0-7"}
+    response = client.get(url, headers=headers)
+    assert response.status_code == 206
+    assert response.content == content[:8]
+
+
+def test_download_missing_order(
+    client: TestClient, non_superuser_token: dict[str, str], db: Session
+) -> None:
+    patient = create_random_patient(db)
+    response = client.get(
+        f"{endpoint}/orders/{patient.num_document}/no_existe.pdf",
+        headers=non_superuser_token,
+    )
+    assert response.status_code == 404
@@ -0,0 +1,17 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+endpoint = f"{settings.API_V1_STR}/health"
+
+
+def test_get_db_health(client: TestClient) -> None:
+    response = client.get(f"{endpoint}/db")
+
+    assert response.status_code == 200
+
+    content = response.json()
+    assert content["status"] == "ok"
+    assert content["api_pool"]["size"] == settings.POSTGRES_POOL_SIZE
+    assert content["api_pool"]["checkouts"] >= 1
+    assert "max_wait_ms" in content["sync_pool"]
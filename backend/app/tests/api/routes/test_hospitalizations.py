@@ -20,7 +20,7 @@ endpoint = f"{settings.API_V1_STR}/hospitalizations"
 
 def test_get_hospitalization(client: TestClient, superuser_token: dict[str, str]) -> None:
     response = client.get(
-        f"{endpoint}/", headers=superuser_token
+        f"{endpoint}/", headers=superuser_token, params={"paginate": False}
     )
 
     assert response.status_code == 200
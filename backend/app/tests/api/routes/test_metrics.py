@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+def test_get_metrics(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/health/db")
+    assert response.status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    lines = response.text.splitlines()
+    route = f"{settings.API_V1_STR}/health/db"
+    labels = f'method="GET",route="{route}",status="200"'
+    assert any(
+        line.startswith(f"http_request_duration_seconds_count{{{labels}}}")
+        for line in lines
+    )
+    assert any(line.startswith("http_request_db_queries_bucket") for line in lines)
+    assert any(line.startswith("audit_log_queue_size ") for line in lines)
+    assert any(line.startswith('db_pool_connections{pool="api"') for line in lines)
@@ -35,7 +35,7 @@ def test_get_clients(
     client: TestClient, nonpatient_token: dict[str, str]
 ) -> None:
     response= client.get(
-        f"{endpoint}/", headers=nonpatient_token
+        f"{endpoint}/", headers=nonpatient_token, params={"paginate": False}
     )
 
     assert response.status_code == 200
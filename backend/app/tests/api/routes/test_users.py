@@ -217,6 +217,53 @@ def test_update_patient_document(
     )
 
 
+def test_update_patient_document_keeps_files(
+    client: TestClient,
+    superuser_token: dict[str, str],
+    doctor_token: dict[str, str],
+    db: Session,
+) -> None:
+    patient = schemas.UserCreate(
+        num_document=random_document(), password=random_password(10), rol="patient"
+    )
+    response = client.post(
+        f"{endpoint}/", headers=superuser_token, json=patient.model_dump()
+    )
+    assert response.status_code == 201
+
+    documents = f"{settings.API_V1_STR}/documents"
+    filename = f"orden{settings.ALLOWED_EXTENSIONS_ORDERS[0]}"
+    content = b"orden medica del paciente\n"
+    response = client.post(
+        f"{documents}/{patient.num_document}",
+        headers=doctor_token,
+        params={"kind": "orders"},
+        files={"file": (filename, content)},
+    )
+    assert response.status_code == 201
+
+    new_document = f"{patient.num_document}new"
+    response = client.put(
+        f"{endpoint}/{patient.num_document}/{patient.rol}",
+        headers=superuser_token,
+        json=schemas.UserUpdateAll(num_document=new_document).model_dump(),
+    )
+    assert response.status_code == 200
+
+    # El índice de los documentos apunta al nuevo número de documento
+    response = client.get(
+        f"{documents}/orders/{new_document}/{filename}", headers=superuser_token
+    )
+    assert response.status_code == 200
+    assert response.content == content
+
+    response = client.get(
+        f"{documents}/orders/{patient.num_document}/{filename}",
+        headers=superuser_token,
+    )
+    assert response.status_code == 404
+
+
 def test_update_user_non_superuser(
     client: TestClient, non_superuser_token: dict[str, str], db: Session
 ) -> None:
@@ -379,3 +426,33 @@ def test_get_user_user_not_found(
     )
 
     assert response.status_code == 404
+
+
+def test_deleted_user_token_rejected(
+    client: TestClient, superuser_token: dict[str, str], db: Session
+) -> None:
+    new_user = schemas.UserCreate(
+        num_document=random_document(), password=random_password(10), rol="doctor"
+    )
+    assert crud_admin.create_user(new_user, db) == 0
+
+    login_data = {
+        "username": new_user.num_document,
+        "password": new_user.password,
+        "rol": new_user.rol,
+    }
+    response = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # La segunda petición usa el usuario guardado en la caché
+    for _ in range(2):
+        response = client.get(f"{endpoint}/info", headers=headers)
+        assert response.status_code == 200
+
+    response = client.delete(
+        f"{endpoint}/{new_user.num_document}/doctor", headers=superuser_token
+    )
+    assert response.status_code == 200
+
+    response = client.get(f"{endpoint}/info", headers=headers)
+    assert response.status_code == 403
@@ -0,0 +1,56 @@
+from collections.abc import Iterator
+
+from fastapi import APIRouter, FastAPI, UploadFile
+from fastapi.testclient import TestClient
+
+from app.api.deps import MULTIPART_OVERHEAD, UploadRoute, max_upload_size
+
+
+def upload_client(received: list[int]) -> TestClient:
+    router = APIRouter(route_class=UploadRoute)
+
+    @router.post("/limited")
+    @max_upload_size(1024)
+    async def limited(file: UploadFile) -> int:
+        received.append(len(await file.read()))
+        return received[-1]
+
+    @router.post("/unlimited")
+    async def unlimited(file: UploadFile) -> int:
+        return len(await file.read())
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_upload_route_rejects_large_bodies() -> None:
+    received: list[int] = []
+    client = upload_client(received)
+    content = b"x" * (MULTIPART_OVERHEAD + 2048)
+
+    response = client.post("/limited", files={"file": ("a.txt", b"x" * 1024)})
+    assert response.status_code == 200
+    assert response.json() == 1024
+
+    # Se rechaza según Content-Length, sin leer el cuerpo
+    response = client.post("/limited", files={"file": ("a.txt", content)})
+    assert response.status_code == 413
+
+    # Sin Content-Length (chunked) se rechaza mientras se recibe
+    def chunks() -> Iterator[bytes]:
+        for i in range(0, len(content), 4096):
+            yield content[i : i + 4096]
+
+    response = client.post(
+        "/limited",
+        content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=limite"},
+    )
+    assert response.status_code == 413
+
+    # La función de la ruta nunca recibió los archivos grandes
+    assert received == [1024]
+
+    response = client.post("/unlimited", files={"file": ("a.txt", content)})
+    assert response.status_code == 200
@@ -0,0 +1,295 @@
+import asyncio
+import re
+import threading
+from datetime import datetime
+from typing import Any
+
+import bson
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app import schemas
+from app.core.audit import (
+    REDACTED,
+    AuditLogWriter,
+    PartitionedCollection,
+    compact_log,
+    filter_headers,
+)
+
+
+class FakeCollection:
+    def __init__(
+        self,
+        fail: bool = False,
+        block: threading.Event | None = None,
+        rejected: int = 0,
+    ):
+        self.fail = fail
+        self.block = block
+        self.rejected = rejected
+        self.batches: list[list[dict[str, Any]]] = []
+
+    def insert_many(self, documents: list[dict[str, Any]], ordered: bool = True):
+        if self.block is not None:
+            self.block.wait()
+        # Como pymongo, los registros se codifican antes de enviarse
+        for document in documents:
+            bson.encode(document)
+        if self.fail:
+            raise PyMongoError("mongo caído")
+        if self.rejected:
+            # Sin orden mongodb guarda los demás registros y solo reporta los rechazados
+            self.batches.append(list(documents[self.rejected :]))
+            errors = [{"index": i, "code": 11000} for i in range(self.rejected)]
+            raise BulkWriteError(
+                {"writeErrors": errors, "nInserted": len(documents) - self.rejected}
+            )
+        self.batches.append(list(documents))
+
+    def create_indexes(self, indexes: list[Any]) -> None:
+        self.indexes = indexes
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections: dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        return self.collections.setdefault(name, FakeCollection())
+
+    def list_collection_names(self, filter: dict[str, Any]) -> list[str]:
+        pattern = filter["name"]["$regex"]
+        return [name for name in self.collections if re.match(pattern, name)]
+
+
+def test_audit_log_batches_by_size() -> None:
+    collection = FakeCollection()
+    writer = AuditLogWriter(collection, batch_size=10, flush_interval=60)
+
+    async def run() -> None:
+        writer.start()
+        for i in range(25):
+            assert await writer.log({"i": i})
+        await writer.stop()
+
+    asyncio.run(run())
+
+    assert [len(batch) for batch in collection.batches] == [10, 10, 5]
+    assert writer.enqueued == writer.written == 25
+    assert writer.dropped == writer.failed == 0
+
+
+def test_audit_log_flushes_by_time() -> None:
+    collection = FakeCollection()
+    writer = AuditLogWriter(collection, batch_size=100, flush_interval=0.05)
+
+    async def run() -> None:
+        writer.start()
+        await writer.log({"i": 0})
+        await asyncio.sleep(0.3)
+        assert writer.written == 1
+        await writer.stop()
+
+    asyncio.run(run())
+
+    assert collection.batches == [[{"i": 0}]]
+
+
+def test_audit_log_drops_when_full() -> None:
+    block = threading.Event()
+    collection = FakeCollection(block=block)
+    writer = AuditLogWriter(
+        collection, max_queue_size=5, batch_size=1, flush_interval=60
+    )
+
+    async def run() -> None:
+        writer.start()
+        # El primer registro deja al proceso de escritura bloqueado en mongodb
+        await writer.log({"i": -1})
+        await asyncio.sleep(0.05)
+
+        results = [await writer.log({"i": i}) for i in range(10)]
+        assert results.count(True) == 5
+        assert writer.dropped == 5
+
+        block.set()
+        await writer.stop()
+
+    asyncio.run(run())
+
+    assert writer.written == 6
+
+
+def test_audit_log_counts_failures() -> None:
+    writer = AuditLogWriter(FakeCollection(fail=True), batch_size=2)
+
+    async def run() -> None:
+        writer.start()
+        for i in range(3):
+            await writer.log({"i": i})
+        await writer.stop()
+
+    asyncio.run(run())
+
+    assert writer.failed == 3
+    assert writer.written == 0
+
+
+def test_audit_log_survives_unexpected_errors() -> None:
+    collection = FakeCollection()
+    writer = AuditLogWriter(collection, batch_size=1, flush_interval=60)
+
+    async def run() -> None:
+        writer.start()
+        await writer.log({"b": object()})
+        await writer.log({"i": 1})
+        await asyncio.sleep(0.05)
+        assert writer.running
+        await writer.log({"i": 2})
+        await writer.stop()
+
+    asyncio.run(run())
+
+    assert writer.failed == 1
+    assert writer.written == 2
+    assert collection.batches == [[{"i": 1}], [{"i": 2}]]
+
+
+def test_audit_log_counts_partial_failures() -> None:
+    database = FakeDatabase()
+    database.collections["api_logs_202401"] = FakeCollection(rejected=1)
+    writer = AuditLogWriter(
+        PartitionedCollection(database, "api_logs"), batch_size=10, flush_interval=60
+    )
+
+    async def run() -> None:
+        writer.start()
+        for day in [(2024, 1, 1), (2024, 1, 2), (2024, 2, 1)]:
+            await writer.log({"t": datetime(*day)})
+        await writer.stop()
+
+    asyncio.run(run())
+
+    assert writer.failed == 1
+    assert writer.written == 2
+    assert database["api_logs_202402"].batches == [[{"t": datetime(2024, 2, 1)}]]
+
+
+def test_partitioned_collection_counts_inserted_per_partition() -> None:
+    database = FakeDatabase()
+    database.collections["api_logs_202402"] = FakeCollection(rejected=1)
+    database.collections["api_logs_202403"] = FakeCollection(fail=True)
+    collection = PartitionedCollection(database, "api_logs")
+    days = [(2024, 1, 1), (2024, 2, 1), (2024, 3, 1), (2024, 2, 2), (2024, 1, 2)]
+
+    try:
+        collection.insert_many([{"t": datetime(*day)} for day in days], ordered=False)
+    except BulkWriteError as e:
+        details = e.details
+    else:
+        raise AssertionError("Se esperaba un BulkWriteError")
+
+    # Los índices son posiciones en la lista original, no dentro de cada partición
+    assert details["nInserted"] == 3
+    assert [error["index"] for error in details["writeErrors"]] == [1, 2]
+
+    writer = AuditLogWriter(collection, batch_size=10, flush_interval=60)
+
+    async def run() -> None:
+        writer.start()
+        for day in days:
+            await writer.log({"t": datetime(*day)})
+        await writer.stop()
+
+    asyncio.run(run())
+
+    assert writer.written == 3
+    assert writer.failed == 2
+
+
+def test_partitioned_collection_by_month() -> None:
+    database = FakeDatabase()
+    database["api_logs"]
+    collection = PartitionedCollection(database, "api_logs")
+    writer = AuditLogWriter(collection, batch_size=10, flush_interval=60)
+
+    async def run() -> None:
+        writer.start()
+        for day in [(2024, 1, 31), (2024, 2, 1), (2024, 1, 1), (2023, 12, 5)]:
+            await writer.log({"t": datetime(*day)})
+        await writer.stop()
+
+    asyncio.run(run())
+
+    partitions = {
+        name: [len(batch) for batch in partition.batches]
+        for name, partition in database.collections.items()
+    }
+    assert partitions == {
+        "api_logs": [],
+        "api_logs_202401": [2],
+        "api_logs_202402": [1],
+        "api_logs_202312": [1],
+    }
+    assert database["api_logs_202401"].indexes == collection.indexes
+
+    assert collection.partitions() == [
+        database["api_logs_202402"],
+        database["api_logs_202401"],
+        database["api_logs_202312"],
+    ]
+    assert collection.partitions(datetime(2024, 1, 15), datetime(2024, 1, 20)) == [
+        database["api_logs_202401"]
+    ]
+    assert collection.partitions(end=datetime(2023, 12, 31)) == [
+        database["api_logs_202312"]
+    ]
+
+
+def test_compact_log() -> None:
+    headers = filter_headers(
+        {
+            "Authorization": "Bearer eyJhbGciOi",
+            "Cookie": "session=abc",
+            "User-Agent": "Mozilla/5.0",
+            "Content-Type": "application/json",
+        },
+        ["authorization", "cookie", "content-type"],
+    )
+    assert headers == {
+        "authorization": f"Bearer {REDACTED}",
+        "cookie": REDACTED,
+        "content-type": "application/json",
+    }
+
+    log = {
+        "username": "123",
+        "rol": "admin",
+        "timestamp": datetime(2024, 1, 1),
+        "method": "PUT",
+        "route": "/api/v1/users/{num_document}",
+        "path_params": {"num_document": "456"},
+        "headers": {},
+        "body": {"password": "secreto", "name": "Ana"},
+        "process_time_ms": 1.5,
+        "status_code": 200,
+    }
+    document = compact_log(log)
+    assert document == {
+        "u": "123",
+        "r": "admin",
+        "t": datetime(2024, 1, 1),
+        "m": "PUT",
+        "p": "/api/v1/users/{num_document}",
+        "a": {"num_document": "456"},
+        "b": {"password": REDACTED, "name": "Ana"},
+        "d": 1.5,
+        "s": 200,
+    }
+
+    historial = schemas.ApiHistorial(**document)
+    assert historial.url == "/api/v1/users/456"
+    assert historial.route == "/api/v1/users/{num_document}"
+    assert historial.headers == {}
+    assert historial.body == {"password": REDACTED, "name": "Ana"}
+    assert historial.status_code == 200
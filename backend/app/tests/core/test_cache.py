@@ -0,0 +1,52 @@
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_cache_hits_and_misses() -> None:
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_cache_ttl() -> None:
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("a", 1)
+    time.sleep(0.06)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_lru() -> None:
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" queda como la menos usada
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_invalidate() -> None:
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set(("1", "doctor"), 1)
+    cache.set(("1", "patient"), 2)
+
+    cache.invalidate(("1", "doctor"), ("2", "admin"))
+
+    assert cache.get(("1", "doctor")) is None
+    assert cache.get(("1", "patient")) == 2
+
+
+def test_cache_disabled() -> None:
+    cache = TTLCache(maxsize=10, ttl=0)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
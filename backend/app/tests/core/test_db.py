@@ -0,0 +1,34 @@
+import pytest
+import sqlalchemy.exc
+from sqlalchemy import create_engine
+
+from app.core.db import MonitoredQueuePool
+
+
+def test_monitored_pool_stats() -> None:
+    engine = create_engine(
+        "sqlite://",
+        poolclass=MonitoredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+    connection = engine.connect()
+    stats = engine.pool.stats()
+    assert stats["checked_out"] == 1
+    assert stats["checkouts"] == 1
+
+    # El pool está agotado
+    with pytest.raises(sqlalchemy.exc.TimeoutError):
+        engine.connect()
+
+    stats = engine.pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["checkouts"] == 1
+
+    connection.close()
+    stats = engine.pool.stats()
+    assert stats["checked_out"] == 0
+    assert stats["checked_in"] == 1
+    assert stats["max_wait_ms"] >= stats["avg_wait_ms"] >= 0
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+
+import psycopg
+import pytest
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.core.events import BedBoard, STAGED_KEY
+
+
+def bed_event(room: str, kind: schemas.KindBedEvent = "added") -> schemas.BedEvent:
+    return schemas.BedEvent(kind=kind, bed=schemas.BedAll(room=room))
+
+
+def test_stream_snapshot_and_events() -> None:
+    async def run() -> list[str]:
+        board = BedBoard(keepalive=0.01)
+        queue = board.subscribe()
+        stream = board.stream(queue, [schemas.BedAll(room="101")])
+
+        messages = [await stream.__anext__()]
+        board.publish([bed_event("102")])
+        messages.append(await stream.__anext__())
+        messages.append(await stream.__anext__())
+
+        await board.stop()
+        assert [message async for message in stream] == []
+        assert board.subscribers() == 0
+        return messages
+
+    snapshot, added, keepalive = asyncio.run(run())
+    assert snapshot.startswith("event: snapshot\n")
+    assert '"room":"101"' in snapshot
+    assert added.startswith("event: added\n")
+    assert '"room":"102"' in added
+    assert keepalive == ": keepalive\n\n"
+
+
+def test_slow_subscriber_is_disconnected() -> None:
+    async def run() -> None:
+        board = BedBoard(max_queue_size=2)
+        slow = board.subscribe()
+        fast = board.subscribe()
+
+        board.publish([bed_event("101"), bed_event("102")])
+        assert fast.get_nowait().bed.room == "101"
+        assert fast.get_nowait().bed.room == "102"
+
+        board.publish([bed_event("103")])
+        assert board.subscribers() == 1
+        assert board.disconnected == 1
+        assert slow.get_nowait() is None
+        assert fast.get_nowait().bed.room == "103"
+
+    asyncio.run(run())
+
+
+def test_publish_from_thread() -> None:
+    async def run() -> schemas.BedEvent:
+        board = BedBoard()
+        queue = board.subscribe()
+        thread = threading.Thread(target=board.publish, args=([bed_event("101")],))
+        thread.start()
+        thread.join()
+        return await asyncio.wait_for(queue.get(), 1)
+
+    assert asyncio.run(run()).bed.room == "101"
+
+
+def test_events_published_on_commit() -> None:
+    async def run() -> None:
+        board = BedBoard()
+        queue = board.subscribe()
+        db = Session()
+
+        board.stage(db, bed_event("101", "occupied"))
+        board.after_rollback(db)
+        assert STAGED_KEY not in db.info
+
+        board.stage(db, bed_event("102", "vacated"))
+        board.before_commit(db)
+        assert queue.empty()
+        board.after_commit(db)
+        assert queue.get_nowait().kind == "vacated"
+        assert STAGED_KEY not in db.info
+
+    asyncio.run(run())
+
+
+def test_invalid_notification_is_skipped() -> None:
+    async def run() -> None:
+        board = BedBoard(backend="postgres")
+        queue = board.subscribe()
+
+        board._notify('{"kind": "moved", "bed": {}}')
+        board._notify("no es json")
+        assert queue.empty()
+        assert board.subscribers() == 1
+
+        board._notify(bed_event("101", "occupied").model_dump_json())
+        assert queue.get_nowait().bed.room == "101"
+
+    asyncio.run(run())
+
+
+def test_listener_survives_unexpected_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    attempts: list[int] = []
+
+    async def connect(*args, **kwargs):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("error inesperado")
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(psycopg.AsyncConnection, "connect", connect)
+
+    async def run() -> None:
+        board = BedBoard(backend="postgres")
+        with pytest.raises(asyncio.CancelledError):
+            await board._listen()
+
+    asyncio.run(run())
+    assert len(attempts) == 2
@@ -0,0 +1,128 @@
+import asyncio
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from starlette.types import Scope
+
+from app.core.metrics import (
+    CallbackMetric,
+    Histogram,
+    MetricsMiddleware,
+    MetricsRegistry,
+    RequestStats,
+    TimedRoute,
+    request_db_time,
+    request_latency,
+    request_queries,
+    request_stats,
+)
+
+
+def test_histogram_render() -> None:
+    registry = MetricsRegistry()
+    histogram = registry.register(
+        Histogram("latency_seconds", "Latencia.", ("route",), (0.1, 1.0))
+    )
+    registry.register(
+        CallbackMetric("queue_size", "Cola.", lambda: {(): 3}),
+    )
+
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(2.0, "/a")
+    histogram.observe(0.5, 'r"b')
+
+    lines = registry.render().splitlines()
+    assert lines[:7] == [
+        "# HELP latency_seconds Latencia.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1.0"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 2.55',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+    assert 'latency_seconds_count{route="r\\"b"} 1' in lines
+    assert lines[-3:] == [
+        "# HELP queue_size Cola.",
+        "# TYPE queue_size gauge",
+        "queue_size 3",
+    ]
+
+
+def count(histogram: Histogram, *labels: str) -> int:
+    return sum(histogram._counts.get(labels, []))
+
+
+def test_middleware_by_route_template() -> None:
+    engine = create_engine("sqlite://")
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int) -> int:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+        return item_id
+
+    route = "/items/{item_id}"
+    before = count(request_latency, "GET", route, "200")
+    queries = request_queries._sums.get(("GET", route), 0)
+
+    client = TestClient(app)
+    assert client.get("/items/1").status_code == 200
+    assert client.get("/items/2").status_code == 200
+    assert client.get("/items/abc").status_code == 422
+    assert client.get("/missing").status_code == 404
+
+    assert count(request_latency, "GET", route, "200") == before + 2
+    assert count(request_latency, "GET", route, "422") >= 1
+    assert count(request_latency, "GET", "unmatched", "404") >= 1
+    assert request_queries._sums[("GET", route)] == queries + 4
+    assert request_db_time._sums[("GET", route)] > 0
+
+
+def test_middleware_phases() -> None:
+    logged: list[tuple[RequestStats, int]] = []
+
+    async def log_request(scope: Scope, stats: RequestStats, status_code: int) -> None:
+        logged.append((stats, status_code))
+
+    def current_user() -> str:
+        stats = request_stats.get()
+        stats.username, stats.rol = "123", "admin"
+        stats.auth_time = 0.01
+        return "123"
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, log_request=log_request)
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get("/slow")
+    async def slow(user: Annotated[str, Depends(current_user)]) -> list[int]:
+        await asyncio.sleep(0.02)
+        return list(range(1000))
+
+    @router.get("/anonymous")
+    def anonymous() -> None:
+        raise HTTPException(status_code=404)
+
+    app.include_router(router)
+    client = TestClient(app)
+    assert client.get("/slow").status_code == 200
+    assert client.get("/anonymous").status_code == 404
+
+    (stats, status_code), (anonymous_stats, anonymous_status) = logged
+    assert status_code == 200
+    assert stats.username == "123"
+    assert stats.auth_time == 0.01
+    assert stats.handler_time >= 0.02
+    assert stats.serialization_time is not None
+    assert stats.process_time >= stats.handler_time + stats.serialization_time
+
+    assert anonymous_status == 404
+    assert anonymous_stats.username is None
+    assert anonymous_stats.handler_time is not None
@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime, timedelta
+from email.utils import formatdate
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.responses import DocumentResponse
+
+
+CONTENT = b"0123456789" * 10
+CREATED_AT = datetime(2024, 1, 1, 12, 0, 0)
+ETAG = f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+
+
+@pytest.fixture
+def client(tmp_path: Path) -> TestClient:
+    path = tmp_path / "file.pdf"
+    path.write_bytes(CONTENT)
+
+    app = FastAPI()
+
+    @app.get("/file")
+    def download() -> DocumentResponse:
+        checksum = hashlib.sha256(CONTENT).hexdigest()
+        return DocumentResponse(str(path), "file.pdf", checksum, CREATED_AT)
+
+    return TestClient(app)
+
+
+def test_full_download(client: TestClient) -> None:
+    response = client.get("/file")
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["etag"] == ETAG
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_conditional_get(client: TestClient) -> None:
+    response = client.get("/file", headers={"If-None-Match": ETAG})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == ETAG
+
+    response = client.get("/file", headers={"If-None-Match": '"otro"'})
+    assert response.status_code == 200
+
+    since = formatdate((CREATED_AT + timedelta(days=1)).timestamp(), usegmt=True)
+    response = client.get("/file", headers={"If-Modified-Since": since})
+    assert response.status_code == 304
+
+    since = formatdate((CREATED_AT - timedelta(days=1)).timestamp(), usegmt=True)
+    response = client.get("/file", headers={"If-Modified-Since": since})
+    assert response.status_code == 200
+
+
+def test_range(client: TestClient) -> None:
+    response = client.get("/file", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+
+    response = client.get("/file", headers={"Range": "bytes=-5"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-5:]
+
+    response = client.get("/file", headers={"Range": "bytes=95-"})
+    assert response.content == CONTENT[95:]
+
+    response = client.get("/file", headers={"Range": "bytes=1000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    # El archivo cambió, por lo que se envía completo
+    response = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"otro"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
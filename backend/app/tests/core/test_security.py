@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.util import greenlet_spawn
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import (
+    get_password_hash_async,
+    get_password_hash_run_sync,
+    verify_password,
+    verify_password_async,
+)
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.max_pending = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self.lock:
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+
+        future = super().submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda _: self.done())
+        return future
+
+    def done(self) -> None:
+        with self.lock:
+            self.pending -= 1
+
+
+def test_password_hash_async() -> None:
+    async def run() -> tuple[str, bool, bool]:
+        hashed_password = await get_password_hash_async("contraseña")
+        valid = await verify_password_async("contraseña", hashed_password)
+        invalid = await verify_password_async("otra", hashed_password)
+        return hashed_password, valid, invalid
+
+    hashed_password, valid, invalid = asyncio.run(run())
+
+    assert valid and not invalid
+    assert verify_password("contraseña", hashed_password)
+    # El factor de trabajo se toma de la configuración
+    assert hashed_password.split("$")[2] == f"{settings.BCRYPT_ROUNDS:02d}"
+
+
+def test_password_hash_does_not_block_event_loop() -> None:
+    async def run() -> int:
+        ticks = 0
+        task = asyncio.ensure_future(get_password_hash_async("contraseña"))
+        while not task.done():
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+        return ticks
+
+    # El ciclo de eventos sigue atendiendo otras tareas mientras se calcula el hash
+    assert asyncio.run(run()) > 1
+
+
+def test_password_jobs_are_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    executor = CountingExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+    monkeypatch.setattr(security, "password_executor", executor)
+    monkeypatch.setattr(
+        security, "get_password_hash", lambda password: time.sleep(0.01) or password
+    )
+
+    async def run() -> list[str]:
+        return await asyncio.gather(
+            *(get_password_hash_async(str(i)) for i in range(20))
+        )
+
+    # Las peticiones de más esperan su turno en vez de encolar trabajo en el pool
+    assert asyncio.run(run()) == [str(i) for i in range(20)]
+    assert executor.max_pending == settings.PASSWORD_HASH_WORKERS
+    executor.shutdown()
+
+
+def test_password_hash_run_sync() -> None:
+    # Como lo llaman las operaciones CRUD dentro de `AsyncSession.run_sync`
+    async def run() -> str:
+        return await greenlet_spawn(get_password_hash_run_sync, "contraseña")
+
+    assert verify_password("contraseña", asyncio.run(run()))
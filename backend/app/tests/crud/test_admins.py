@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.security import verify_password
+from app.core.security import get_password_hash, verify_password
 
 from app.tests.utils.utils import random_document, random_password
 from app.tests.utils.user import create_random_user
@@ -10,6 +10,7 @@ from app.tests.utils.user import non_existent_document
 
 from app import schemas
 from app.crud import crud_admin
+from app.crud.base import decode_cursor
 
 
 def test_create_user(db: Session) -> None:
@@ -64,6 +65,40 @@ def test_create_user(db: Session) -> None:
     assert user_rol_in.is_active == True
 
 
+def test_hash_password_after_validation(db: Session) -> None:
+    hashed: list[str] = []
+
+    def hash_password(password: str) -> str:
+        hashed.append(password)
+        return get_password_hash(password)
+
+    # El superusuario ya existe, así que no se calcula el hash de la contraseña
+    new_user = schemas.UserCreate(
+        num_document=settings.FIRST_SUPERUSER,
+        rol="admin",
+        password=random_password(10),
+    )
+    assert crud_admin.create_user(new_user, db, True, hash_password) == 2
+
+    # Con un email repetido tampoco
+    rol = "doctor"
+    email = f"{random_password(10)}@ejemplo.com"
+    other = create_random_user(rol, db, 10)
+    other_search = schemas.UserSearch(num_document=other.num_document, rol=rol)
+    out = crud_admin.update_basic_info(
+        other_search, schemas.UserUpdate(email=email), db
+    )
+    assert out == 0
+
+    user = create_random_user(rol, db, 10)
+    user_search = schemas.UserSearch(num_document=user.num_document, rol=rol)
+    updated_info = schemas.UserUpdate(password=random_password(10), email=email)
+    out = crud_admin.update_basic_info(user_search, updated_info, db, hash_password)
+    assert out == 2
+
+    assert hashed == []
+
+
 def test_update_basic_info(db: Session) -> None:
     rol = "admin"
     num_document = create_random_user(rol, db, 10).num_document
@@ -202,3 +237,22 @@ def test_delete_user(db: Session) -> None:
     user_search = schemas.UserSearch(num_document=num_document, rol=rol)
     out = crud_admin.delete_user(user_search, db, True)
     assert out == 0
+
+
+def test_get_users_pagination(db: Session) -> None:
+    create_random_user("admin", db, 10)
+    create_random_user("doctor", db, 10)
+
+    users = crud_admin.get_users(db, rol=True).items
+
+    paginated: list[schemas.UserAll] = []
+    pagination = schemas.Pagination(limit=3)
+    while True:
+        page = crud_admin.get_users(db, rol=True, pagination=pagination)
+        assert len(page.items) <= 3
+        paginated.extend(page.items)
+        if page.next_cursor is None:
+            break
+        pagination = schemas.Pagination(limit=3, after=decode_cursor(page.next_cursor))
+
+    assert paginated == users
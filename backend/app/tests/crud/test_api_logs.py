@@ -0,0 +1,74 @@
+import gzip
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+
+from bson import json_util
+
+from app.api.deps import db
+from app.core.audit import PartitionedCollection
+from app.crud import crud_api_log
+
+
+def log(timestamp: datetime) -> dict:
+    # Forma de los registros de las versiones anteriores, antes de `compact_log`
+    return {
+        "username": "123",
+        "rol": "admin",
+        "timestamp": timestamp,
+        "method": "GET",
+        "url": "/api/v1/beds",
+        "headers": {"authorization": "Bearer token", "user-agent": "pytest"},
+        "body": None,
+        "process_time_ms": 1.0,
+        "status_code": 200,
+    }
+
+
+def test_partitions_migrate_and_archive(tmp_path: Path) -> None:
+    prefix = f"test_logs_{uuid.uuid4().hex}"
+    collection = PartitionedCollection(db, prefix)
+    timestamps = [
+        datetime(2023, 12, 31, 23),
+        datetime(2024, 1, 1),
+        datetime(2024, 2, 1),
+    ]
+
+    # Historial sin particionar de versiones anteriores; la migración se puede repetir
+    db[prefix].insert_many([log(x) for x in timestamps])
+    legacy = db[prefix].find_one({"timestamp": timestamps[0]})
+    collection.insert_many([crud_api_log.compact_legacy(legacy)])
+    assert crud_api_log.migrate(collection, prefix) == 2
+    assert prefix not in db.list_collection_names()
+    assert collection.months() == [
+        date(2024, 2, 1),
+        date(2024, 1, 1),
+        date(2023, 12, 1),
+    ]
+
+    query = crud_api_log.build_query(date(2024, 1, 1), date(2024, 2, 1))
+    logs = list(crud_api_log.find(collection, query))
+    assert [x["t"] for x in logs] == timestamps[:0:-1]
+
+    logs = list(crud_api_log.find(collection, {}, limit=2))
+    assert [x["t"] for x in logs] == timestamps[:0:-1]
+    assert logs[0]["p"] == "/api/v1/beds"
+    assert "h" not in logs[0]
+
+    after = f"{logs[0]['t'].isoformat()}|{logs[0]['_id']}"
+    logs = list(crud_api_log.find(collection, {}, after=after))
+    assert [x["t"] for x in logs] == timestamps[1::-1]
+
+    files = crud_api_log.archive(collection, str(tmp_path), 1, today=date(2024, 2, 15))
+    assert files == [
+        f"{tmp_path}/{prefix}_202401.jsonl.gz",
+        f"{tmp_path}/{prefix}_202312.jsonl.gz",
+    ]
+    assert collection.months() == [date(2024, 2, 1)]
+
+    with gzip.open(files[1], "rt", encoding="utf-8") as f:
+        archived = [json_util.loads(line) for line in f]
+    assert [x["t"] for x in archived] == timestamps[:1]
+
+    assert crud_api_log.archive(collection, str(tmp_path), 0) == []
+    db.drop_collection(f"{prefix}_202402")
@@ -1,12 +1,14 @@
+import asyncio
 import random
 
 from sqlalchemy.orm import Session
 
 from app import schemas
-from app.crud import crud_bed
+from app.crud import crud_bed, crud_hospitalization
+from app.core.events import bed_board
 
 from app.tests.utils.hospitalizations import create_random_hospitalization
-from app.tests.utils.bed import create_random_bed, non_existent_bed
+from app.tests.utils.bed import create_random_bed, non_existent_bed, random_bed
 
 
 def test_add_bed(db: Session) -> None:
@@ -33,3 +35,37 @@ def test_delete_bed(db: Session) -> None:
 
     out = crud_bed.delete_bed(bed.room, db)
     assert out == 0
+
+
+def test_bed_events(db: Session) -> None:
+    async def run() -> list[schemas.BedEvent]:
+        queue = bed_board.subscribe()
+        try:
+            bed = random_bed()
+            assert crud_bed.add_bed(bed, db) == 0
+            assert crud_bed.add_bed(bed, db) == 1
+            assert crud_bed.delete_bed(bed.room, db) == 0
+
+            hospitalization = create_random_hospitalization(db)
+            discharge_info = schemas.DischargeHospitalization()
+            out = crud_hospitalization.discharge_hospitalization(
+                hospitalization.num_doc_patient, discharge_info, db
+            )
+            assert out == 0
+
+            events = []
+            while not queue.empty():
+                events.append(queue.get_nowait())
+            return events
+        finally:
+            bed_board.unsubscribe(queue)
+
+    events = asyncio.run(run())
+    kinds = [event.kind for event in events]
+    assert kinds[:2] == ["added", "deleted"]
+    assert kinds[-2:] == ["occupied", "vacated"]
+
+    occupied, vacated = events[-2:]
+    assert occupied.bed.room == vacated.bed.room
+    assert occupied.bed.num_doc_patient is not None
+    assert vacated.bed.num_doc_patient is None
@@ -58,3 +58,41 @@ def test_add_consultation(db: Session) -> None:
 
     out = crud_consultation.add_consultation(new_consultation, db)
     assert out == 3
+
+
+def test_import_consultations(db: Session) -> None:
+    patient = create_random_patient(db)
+    doctor = create_doctor_info(db)
+
+    consultation = schemas.Consultation(
+        num_doc_doctor=doctor.num_document,
+        num_doc_patient=patient.num_document,
+        area="area1",
+    )
+    unknown_doctor = consultation.model_copy(
+        update={"num_doc_doctor": non_existent_document}
+    )
+
+    out = crud_consultation.import_consultations(
+        [(2, consultation), (3, unknown_doctor)], db
+    )
+    assert out == {3: 2}
+
+    out = crud_consultation.import_consultations([(2, consultation)], db, dry_run=True)
+    assert out == {}
+
+    # Ninguna de las importaciones anteriores guardó la consulta
+    consultations = crud_consultation.get_consultations(
+        db, num_doc_patient=patient.num_document
+    ).items
+    assert consultations == []
+
+    out = crud_consultation.import_consultations(
+        [(2, consultation), (3, consultation)], db
+    )
+    assert out == {}
+
+    consultations = crud_consultation.get_consultations(
+        db, num_doc_patient=patient.num_document
+    ).items
+    assert consultations == [consultation, consultation]
@@ -0,0 +1,89 @@
+import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.crud import crud_bed, crud_daily_stats, crud_hospitalization
+from app.stats import get_stats
+
+from app.tests.utils.bed import create_random_bed
+from app.tests.utils.hospitalizations import create_random_hospitalization
+
+
+def get_day(day: datetime.date, db: Session) -> dict[str, int]:
+    stats = models.DailyHospitalStats
+    row = db.execute(
+        select(
+            stats.admissions,
+            stats.discharges,
+            stats.beds_in_use,
+            stats.total_beds,
+            stats.patient_days,
+        ).where(stats.day == day)
+    ).first()
+
+    if row is None:
+        return dict(
+            admissions=0, discharges=0, beds_in_use=0, total_beds=0, patient_days=0
+        )
+
+    return row._asdict()
+
+
+def test_daily_stats_incremental(db: Session) -> None:
+    today = datetime.date.today()
+
+    before = get_day(today, db)
+    bed = create_random_bed(db)
+    after = get_day(today, db)
+    assert after["total_beds"] == before["total_beds"] + 1
+
+    before = after
+    hospitalization = create_random_hospitalization(db)
+    after = get_day(today, db)
+    assert after["admissions"] == before["admissions"] + 1
+    assert after["beds_in_use"] == before["beds_in_use"] + 1
+    assert after["total_beds"] == before["total_beds"] + 1
+
+    before = after
+    discharge_info = schemas.DischargeHospitalization(last_day=today)
+    out = crud_hospitalization.discharge_hospitalization(
+        hospitalization.num_doc_patient, discharge_info, db
+    )
+    assert out == 0
+    after = get_day(today, db)
+    assert after["discharges"] == before["discharges"] + 1
+    assert after["beds_in_use"] == before["beds_in_use"] - 1
+    assert after["patient_days"] == before["patient_days"]
+
+    before = after
+    assert crud_bed.delete_bed(bed.room, db) == 0
+    after = get_day(today, db)
+    assert after["total_beds"] == before["total_beds"] - 1
+
+
+def test_daily_stats_backfill(db: Session) -> None:
+    create_random_hospitalization(db)
+
+    stats = models.DailyHospitalStats
+    columns = (
+        stats.day,
+        stats.admissions,
+        stats.discharges,
+        stats.beds_in_use,
+        stats.patient_days,
+    )
+    # Los días que solo tuvieron cambios en las camas no se reconstruyen
+    stmt = (
+        select(*columns)
+        .where((stats.admissions > 0) | (stats.discharges > 0))
+        .order_by(stats.day)
+    )
+    incremental = db.execute(stmt).all()
+    incremental_stats = get_stats(db)
+
+    assert crud_daily_stats.backfill(db) >= len(incremental)
+
+    assert db.execute(stmt).all() == incremental
+    assert get_stats(db) == incremental_stats
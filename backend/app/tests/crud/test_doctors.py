@@ -7,6 +7,7 @@ from app.tests.utils.doctor import (
     create_new_speciality,
 )
 from app.tests.utils.user import non_existent_document
+from app.tests.utils.utils import count_queries
 
 from app import schemas
 from app.crud import crud_doctor
@@ -22,6 +23,54 @@ def test_get_doctor(db: Session) -> None:
     assert doctor.specialities == doctor_in.specialities
 
 
+def test_get_doctors(db: Session) -> None:
+    doctor = create_random_user("doctor", db, 10)
+    specialities = [create_new_speciality(db) for _ in range(2)]
+    for speciality in specialities:
+        out = crud_doctor.add_doctor_speciality(doctor.num_document, db, speciality)
+        assert out == 0
+
+    doctors = crud_doctor.get_doctors(db)
+    num_documents = [x.num_document for x in doctors]
+    assert len(num_documents) == len(set(num_documents))
+
+    doctor_in = next(x for x in doctors if x.num_document == doctor.num_document)
+    assert sorted(x.name for x in doctor_in.specialities) == sorted(
+        x.name for x in specialities
+    )
+
+
+def test_get_speciality_doctor(db: Session) -> None:
+    speciality = create_new_speciality(db)
+    other_speciality = create_new_speciality(db)
+
+    doctor = create_random_user("doctor", db, 10)
+    assert crud_doctor.add_doctor_speciality(doctor.num_document, db, speciality) == 0
+    out = crud_doctor.add_doctor_speciality(doctor.num_document, db, other_speciality)
+    assert out == 0
+
+    with count_queries(db) as statements:
+        doctors = crud_doctor.get_speciality_doctor(speciality.name, db)
+    n_statements = len(statements)
+
+    assert [x.num_document for x in doctors] == [doctor.num_document]
+    # Se incluyen todas las especialidades del doctor, no solo la filtrada
+    assert sorted(x.name for x in doctors[0].specialities) == sorted(
+        [speciality.name, other_speciality.name]
+    )
+
+    for _ in range(3):
+        doctor = create_random_user("doctor", db, 10)
+        out = crud_doctor.add_doctor_speciality(doctor.num_document, db, speciality)
+        assert out == 0
+
+    with count_queries(db) as statements:
+        doctors = crud_doctor.get_speciality_doctor(speciality.name, db)
+
+    assert len(doctors) == 4
+    assert len(statements) == n_statements
+
+
 def test_add_doctor_speciality(db: Session) -> None:
     speciality = schemas.Speciality(name="")
     out = crud_doctor.add_doctor_speciality(non_existent_document, db, speciality)
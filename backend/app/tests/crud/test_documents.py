@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import io
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+from app.crud import crud_document
+
+from app.tests.utils.patient import create_random_patient
+
+
+def create_upload(content: bytes, filename: str = "file.pdf") -> UploadFile:
+    return UploadFile(file=io.BytesIO(content), filename=filename)
+
+
+@pytest.fixture
+def small_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 4)
+
+
+def test_save_upload(tmp_path: Path, small_chunks: None) -> None:
+    path = f"{tmp_path}/file.pdf"
+    content = b"contenido del archivo"
+
+    saved = asyncio.run(crud_document.save_upload(create_upload(content), path, 1024))
+    assert saved == (len(content), hashlib.sha256(content).hexdigest())
+    assert Path(path).read_bytes() == content
+    assert os.listdir(tmp_path) == ["file.pdf"]
+
+
+def test_save_upload_too_large(tmp_path: Path, small_chunks: None) -> None:
+    path = f"{tmp_path}/file.pdf"
+    Path(path).write_bytes(b"anterior")
+
+    upload = create_upload(b"0123456789")
+    assert asyncio.run(crud_document.save_upload(upload, path, 6)) is None
+
+    # El archivo anterior no se modifica y no quedan archivos temporales
+    assert Path(path).read_bytes() == b"anterior"
+    assert os.listdir(tmp_path) == ["file.pdf"]
+
+
+def test_document_index(db: Session) -> None:
+    patient = create_random_patient(db)
+    num_document = patient.num_document
+
+    content = b"orden medica"
+    Path(f"{settings.PATIENT_DOCS_PATH}/{num_document}/orders/orden.pdf").write_bytes(
+        content
+    )
+    checksum = hashlib.sha256(content).hexdigest()
+    crud_document.index_file(num_document, "orders", "orden.pdf", 12, checksum, db)
+
+    documents = crud_document.get_documents(num_document, db)
+    assert documents.orders == ["orden.pdf"]
+    assert documents.results == []
+    assert crud_document.get_files(num_document, "orders", db).filenames == [
+        "orden.pdf"
+    ]
+    assert crud_document.get_files(num_document, "results", db).filenames == []
+    assert crud_document.get_files("no_existe", "orders", db) is None
+
+    histories = crud_document.get_histories(db)
+    assert crud_document.get_history(num_document) in histories.items
+
+    assert crud_document.delete_file(num_document, "orden.pdf", "orders", db) == 0
+    assert crud_document.get_documents(num_document, db).orders == []
+
+
+def test_reconcile(db: Session) -> None:
+    patient = create_random_patient(db)
+    num_document = patient.num_document
+    patient_path = f"{settings.PATIENT_DOCS_PATH}/{num_document}"
+
+    # Archivo guardado sin pasar por el índice y registro sin archivo
+    Path(f"{patient_path}/results/examen.pdf").write_bytes(b"resultado")
+    crud_document.index_file(num_document, "results", "borrado.pdf", 1, "0" * 64, db)
+    documents = models.PatientDocuments
+    db.execute(
+        delete(documents)
+        .where(documents.num_document == num_document)
+        .where(documents.kind == "history")
+    )
+    db.commit()
+
+    assert crud_document.reconcile(db) >= 3
+
+    files = crud_document.get_documents(num_document, db)
+    assert files.results == ["examen.pdf"]
+    assert crud_document.get_files(num_document, "orders", db) is not None
+
+
+def test_export_zip(db: Session, small_chunks: None) -> None:
+    patient = create_random_patient(db)
+    num_document = patient.num_document
+
+    content = b"resultado del examen" * 10
+    Path(f"{settings.PATIENT_DOCS_PATH}/{num_document}/results/examen.pdf").write_bytes(
+        content
+    )
+    checksum = hashlib.sha256(content).hexdigest()
+    size = len(content)
+    crud_document.index_file(num_document, "results", "examen.pdf", size, checksum, db)
+
+    parts = list(crud_document.export_zip(db, [num_document]))
+    assert len(parts) > 1
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(parts)))
+    assert sorted(archive.namelist()) == [
+        f"{num_document}/{settings.HISTORY_FILENAME}",
+        f"{num_document}/results/examen.pdf",
+    ]
+    assert archive.read(f"{num_document}/results/examen.pdf") == content
+
+    parts = crud_document.export_zip(db, [num_document], "history")
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(parts)))
+    assert archive.namelist() == [f"{num_document}/{settings.HISTORY_FILENAME}"]
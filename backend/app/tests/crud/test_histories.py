@@ -0,0 +1,69 @@
+import os
+import random
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.crud import crud_history
+from app.crud.histories import apply_delta, make_delta
+
+
+@pytest.fixture
+def patient(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setattr(settings, "PATIENT_DOCS_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "HISTORY_SNAPSHOT_INTERVAL", 5)
+    os.makedirs(f"{tmp_path}/123/histories")
+    return "123"
+
+
+def create_versions(n: int) -> list[bytes]:
+    lines = [f"Línea {i} de la historia clínica\n".encode() for i in range(200)]
+    versions: list[bytes] = []
+    for _ in range(n):
+        lines.insert(random.randint(0, len(lines)), b"Nueva anotacion\n")
+        lines.pop(random.randint(0, len(lines) - 1))
+        versions.append(b"".join(lines))
+
+    return versions
+
+
+def test_delta() -> None:
+    old = b"a\nb\nc\n"
+    for new in [b"a\nx\nc\n", b"", b"c\nb\na", b"\xff\xfe\n" + old]:
+        assert apply_delta(old, make_delta(old, new)) == new
+
+
+def test_archive_and_reconstruct(patient: str) -> None:
+    contents = create_versions(12)
+    for content in contents:
+        crud_history.archive(patient, content)
+
+    versions = crud_history.get_versions(patient)
+    assert [x.version for x in versions] == list(range(12))
+    assert [x.kind for x in versions if x.version % 5 == 0] == ["snapshot"] * 3
+    assert versions[1].kind == "delta"
+    assert versions[1].stored_size < versions[0].stored_size
+
+    for i, content in enumerate(contents):
+        assert crud_history.get_version(patient, i) == content
+
+    assert crud_history.get_version(patient, 12) is None
+    assert crud_history.get_versions("456") is None
+
+
+def test_migrate(patient: str, tmp_path: Path) -> None:
+    contents = create_versions(3)
+    history_path = f"{tmp_path}/{patient}/histories"
+    for i, content in enumerate(contents):
+        Path(f"{history_path}/2024-01-0{i + 1}_10-00-00.txt").write_bytes(content)
+
+    assert crud_history.migrate_all() == 3
+    assert not [x for x in os.listdir(history_path) if x.endswith(".txt")]
+
+    versions = crud_history.get_versions(patient)
+    assert [x.created_at.day for x in versions] == [1, 2, 3]
+    for i, content in enumerate(contents):
+        assert crud_history.get_version(patient, i) == content
+
+    assert crud_history.migrate_all() == 0
@@ -1,14 +1,19 @@
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from sqlalchemy.orm import Session
 
 from app.tests.utils.hospitalizations import create_random_hospitalization
 from app.tests.utils.patient import create_random_patient
-from app.tests.utils.doctor import create_doctor_info
+from app.tests.utils.doctor import create_doctor_info, create_new_speciality
 from app.tests.utils.bed import create_random_bed, non_existent_bed
 from app.tests.utils.user import non_existent_document, random_document, random_password
 
 from app import schemas
 from app.crud import crud_hospitalization, crud_admin
+from app.crud.base import decode_cursor
+from app.core.db import engine
 
 
 def test_add_hospitalization(db: Session) -> None:
@@ -89,6 +94,104 @@ def test_add_hospitalization(db: Session) -> None:
     assert out == 0
 
 
+def add_simultaneously(
+    hospitalizations: list[schemas.RegisterHospitalization],
+) -> list[int]:
+    """Registra las hospitalizaciones al mismo tiempo, cada una en su propia sesión"""
+    barrier = threading.Barrier(len(hospitalizations))
+
+    def add(hospitalization: schemas.RegisterHospitalization) -> int:
+        with Session(engine) as session:
+            barrier.wait()
+            return crud_hospitalization.add_hospitalization(hospitalization, session)
+
+    with ThreadPoolExecutor(len(hospitalizations)) as executor:
+        return sorted(executor.map(add, hospitalizations))
+
+
+def test_add_hospitalization_concurrent(db: Session) -> None:
+    doctor = create_doctor_info(db)
+    bed = create_random_bed(db)
+    patients = [create_random_patient(db) for _ in range(2)]
+
+    # Dos pacientes en la misma cama: solo uno queda hospitalizado
+    out = add_simultaneously(
+        [
+            schemas.RegisterHospitalization(
+                num_doc_doctor=doctor.num_document,
+                num_doc_patient=patient.num_document,
+                room=bed.room,
+            )
+            for patient in patients
+        ]
+    )
+    assert out == [0, 5]
+
+    # El mismo paciente en dos camas distintas: solo ocupa una
+    patient = create_random_patient(db)
+    beds = [create_random_bed(db) for _ in range(2)]
+    out = add_simultaneously(
+        [
+            schemas.RegisterHospitalization(
+                num_doc_doctor=doctor.num_document,
+                num_doc_patient=patient.num_document,
+                room=bed.room,
+            )
+            for bed in beds
+        ]
+    )
+    assert out == [0, 6]
+
+    hospitalizations = crud_hospitalization.get_hospitalizations(
+        db, num_doc_patient=patient.num_document, active=True
+    ).items
+    assert len(hospitalizations) == 1
+
+
+def test_import_hospitalizations(db: Session) -> None:
+    doctor = create_doctor_info(db)
+    patients = [create_random_patient(db) for _ in range(3)]
+    beds = [create_random_bed(db) for _ in range(2)]
+    today = datetime.date.today()
+
+    def row(patient: int, bed: int, **kwargs) -> schemas.ImportHospitalization:
+        return schemas.ImportHospitalization(
+            num_doc_doctor=doctor.num_document,
+            num_doc_patient=patients[patient].num_document,
+            room=beds[bed].room,
+            **kwargs,
+        )
+
+    rows = [
+        (1, row(0, 0)),
+        (2, row(1, 0)),  # Cama ocupada por la fila anterior
+        (3, row(0, 1)),  # Paciente hospitalizado en la primera fila
+        (4, row(1, 1, speciality="no_existe")),
+        (5, row(2, 1, entry_day=today, last_day=today - datetime.timedelta(days=1))),
+        (6, row(2, 1, last_day=today)),
+    ]
+    out = crud_hospitalization.import_hospitalizations(rows, db)
+    assert out == {2: 5, 3: 6, 4: 7, 5: 8}
+
+    active = crud_hospitalization.get_hospitalizations(
+        db, num_doc_patient=patients[0].num_document
+    ).items
+    assert active == []
+
+    # Una hospitalización con alta no ocupa la cama
+    rows = [(1, row(0, 0)), (2, row(2, 1, last_day=today)), (3, row(1, 1))]
+    assert crud_hospitalization.import_hospitalizations(rows, db) == {}
+
+    for patient, active in ((0, True), (1, True), (2, False)):
+        hospitalizations = crud_hospitalization.get_hospitalizations(
+            db, num_doc_patient=patients[patient].num_document, active=active
+        ).items
+        assert len(hospitalizations) == 1
+
+    out = crud_hospitalization.import_hospitalizations([(1, row(2, 0))], db)
+    assert out == {1: 5}
+
+
 def test_discharge_hospitalization(db: Session) -> None:
     hospitalization: schemas.RegisterHospitalization = create_random_hospitalization(db)
     patient = create_random_patient(db)
@@ -139,3 +242,57 @@ def test_discharge_hospitalization(db: Session) -> None:
         db=db,
     )
     assert out == 1
+
+
+def test_add_hospitalization_unknown_speciality(db: Session) -> None:
+    patient = create_random_patient(db)
+    doctor = create_doctor_info(db)
+    bed = create_random_bed(db)
+
+    hospitalization = schemas.RegisterHospitalization(
+        num_doc_patient=patient.num_document,
+        num_doc_doctor=doctor.num_document,
+        room=bed.room,
+        speciality=create_new_speciality(db).name,
+    )
+    assert crud_hospitalization.add_hospitalization(hospitalization, db) == 7
+
+
+def test_get_hospitalizations_filters(db: Session) -> None:
+    hospitalization = create_random_hospitalization(db)
+
+    page = crud_hospitalization.get_hospitalizations(
+        db, num_doc_patient=hospitalization.num_doc_patient
+    )
+    assert len(page.items) == 1
+    assert page.items[0].num_doc_doctor == hospitalization.num_doc_doctor
+    assert page.next_cursor is None
+
+    page = crud_hospitalization.get_hospitalizations(
+        db, num_doc_patient=hospitalization.num_doc_patient, active=False
+    )
+    assert page.items == []
+
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    page = crud_hospitalization.get_hospitalizations(
+        db, start_date=tomorrow, num_doc_doctor=hospitalization.num_doc_doctor
+    )
+    assert page.items == []
+
+
+def test_get_hospitalizations_pagination(db: Session) -> None:
+    for _ in range(3):
+        create_random_hospitalization(db)
+
+    hospitalizations = crud_hospitalization.get_hospitalizations(db).items
+
+    paginated: list[schemas.Hospitalization] = []
+    pagination = schemas.Pagination(limit=2)
+    while True:
+        page = crud_hospitalization.get_hospitalizations(db, pagination=pagination)
+        paginated.extend(page.items)
+        if page.next_cursor is None:
+            break
+        pagination = schemas.Pagination(limit=2, after=decode_cursor(page.next_cursor))
+
+    assert paginated == hospitalizations
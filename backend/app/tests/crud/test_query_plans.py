@@ -0,0 +1,67 @@
+import datetime
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.core.config import settings
+from app.crud import (
+    crud_consultation,
+    crud_document,
+    crud_hospitalization,
+    crud_patient,
+    crud_user,
+)
+
+from app.tests.utils.utils import capture_queries, random_document, seq_scans
+
+
+today = datetime.date.today()
+page = schemas.Pagination(limit=settings.PAGE_SIZE, after=None)
+num_document = random_document()
+
+# Operaciones CRUD frecuentes; se explican las consultas que emiten al ejecutarse
+OPERATIONS: dict[str, Callable[[Session], Any]] = {
+    "get_user_rol": lambda db: crud_user.get_user_rol(
+        schemas.UserSearch(num_document=num_document, rol="doctor"), db
+    ),
+    "get_users": lambda db: crud_user.get_users(db, pagination=page),
+    "get_patients": lambda db: crud_patient.get_patients(db, pagination=page),
+    "valid_email": lambda db: crud_user.valid_email("correo@ejemplo.com", db),
+    "valid_phone": lambda db: crud_user.valid_phone("3000000000", db),
+    "bed_conflict": lambda db: crud_hospitalization.bed_conflict(1, 1, db),
+    "hospitalizations_active_patient": lambda db: (
+        crud_hospitalization.get_hospitalizations(
+            db, num_doc_patient=num_document, active=True, pagination=page
+        )
+    ),
+    "hospitalizations_entry_day": lambda db: (
+        crud_hospitalization.get_hospitalizations(
+            db, start_date=today, end_date=today, pagination=page
+        )
+    ),
+    "consultations_day": lambda db: crud_consultation.get_consultations(
+        db, start_date=today, end_date=today, pagination=page
+    ),
+    "consultations_doctor": lambda db: crud_consultation.get_consultations(
+        db, num_doc_doctor=num_document, pagination=page
+    ),
+    "consultations_patient": lambda db: crud_consultation.get_consultations(
+        db, num_doc_patient=num_document, pagination=page
+    ),
+    "get_documents": lambda db: crud_document.get_documents(num_document, db),
+    "get_histories": lambda db: crud_document.get_histories(db, pagination=page),
+}
+
+
+@pytest.mark.parametrize("name", OPERATIONS)
+def test_query_uses_index(name: str, db: Session) -> None:
+    with capture_queries(db) as queries:
+        OPERATIONS[name](db)
+
+    selects = [query for query in queries if query[0].lstrip().startswith("SELECT")]
+    assert selects
+    for statement, parameters in selects:
+        assert seq_scans(db, statement, parameters) == [], statement
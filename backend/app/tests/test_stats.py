@@ -0,0 +1,123 @@
+import datetime
+import random
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.crud import crud_doctor, crud_hospitalization
+from app.stats import get_stats, get_service_stats
+
+from app.tests.utils.bed import create_random_bed
+from app.tests.utils.doctor import create_doctor_info, create_new_speciality
+from app.tests.utils.patient import create_random_patient
+from app.tests.utils.user import create_random_user
+
+
+# Implementación anterior de los indicadores, calculados en Python, para comparar resultados
+
+
+def python_percent_occupation(db: Session) -> float:
+    n_beds: int = db.query(models.Beds).count()
+    n_occupied: int = db.query(models.BedsUsed).count()
+
+    return n_occupied / n_beds if n_beds else 0
+
+
+def python_avg_stay(db: Session) -> float:
+    hospitalizations = (
+        db.query(models.Hospitalizations)
+        .filter(models.Hospitalizations.last_day.is_not(None))
+        .all()
+    )
+    if not hospitalizations:
+        return 0.0
+
+    days = [(h.last_day - h.entry_day).days for h in hospitalizations]
+    return sum(days) / len(days)
+
+
+def python_avg_per_day(db: Session, column) -> float:
+    query = db.query(column).filter(column.is_not(None))
+    counts = [query.filter(column == day[0]).count() for day in query.distinct()]
+
+    return sum(counts) / len(counts) if counts else 0.0
+
+
+def create_past_hospitalization(db: Session, doctor: schemas.DoctorAll) -> None:
+    patient = create_random_patient(db)
+    bed = create_random_bed(db)
+    entry_day = datetime.date.today() - datetime.timedelta(days=random.randint(0, 20))
+
+    hospitalization = schemas.RegisterHospitalization(
+        num_doc_patient=patient.num_document,
+        num_doc_doctor=doctor.num_document,
+        room=bed.room,
+        entry_day=entry_day,
+    )
+    assert crud_hospitalization.add_hospitalization(hospitalization, db) == 0
+
+    if random.random() < 0.6:
+        stay = random.randint(0, (datetime.date.today() - entry_day).days)
+        discharge = schemas.DischargeHospitalization(
+            last_day=entry_day + datetime.timedelta(days=stay)
+        )
+        out = crud_hospitalization.discharge_hospitalization(
+            patient.num_document, discharge, db
+        )
+        assert out == 0
+
+
+def test_get_stats_matches_python_implementation(db: Session) -> None:
+    doctor = create_doctor_info(db)
+    for _ in range(30):
+        create_past_hospitalization(db, doctor)
+
+    stats = get_stats(db)
+
+    assert stats.percent_occupation == pytest.approx(python_percent_occupation(db))
+    assert stats.avg_stay == pytest.approx(python_avg_stay(db))
+    assert stats.admissions == pytest.approx(
+        python_avg_per_day(db, models.Hospitalizations.entry_day)
+    )
+    assert stats.discharges == pytest.approx(
+        python_avg_per_day(db, models.Hospitalizations.last_day)
+    )
+
+
+def test_get_service_stats(db: Session) -> None:
+    doctor = create_random_user("doctor", db, 10)
+    speciality = create_new_speciality(db)
+    assert crud_doctor.add_doctor_speciality(doctor.num_document, db, speciality) == 0
+
+    today = datetime.date.today()
+    stays = [0, 1, 4]
+    for stay in stays:
+        patient = create_random_patient(db)
+        bed = create_random_bed(db)
+        entry_day = today - datetime.timedelta(days=stay)
+        hospitalization = schemas.RegisterHospitalization(
+            num_doc_patient=patient.num_document,
+            num_doc_doctor=doctor.num_document,
+            room=bed.room,
+            entry_day=entry_day,
+            speciality=speciality.name,
+        )
+        assert crud_hospitalization.add_hospitalization(hospitalization, db) == 0
+
+        discharge = schemas.DischargeHospitalization(last_day=today)
+        out = crud_hospitalization.discharge_hospitalization(
+            patient.num_document, discharge, db
+        )
+        assert out == 0
+
+    services = get_service_stats(db, today - datetime.timedelta(days=1), today)
+    service = next(x for x in services if x.speciality == speciality.name)
+
+    # La hospitalización de hace 4 días no ingresó en el rango, pero sí fue dada de alta
+    assert service.admissions == 2
+    assert service.discharges == 3
+    assert service.avg_stay == pytest.approx(sum(stays) / len(stays))
+
+    services = get_service_stats(db, end_date=today - datetime.timedelta(days=5))
+    assert speciality.name not in [x.speciality for x in services]
@@ -22,7 +22,7 @@ def create_random_patient(db: Session, k: int = 10) -> PatientAll:
         responsable = create_random_responsable()
         out = crud_patient.add_responsable(user.num_document, responsable, db)
 
-    crud_document.add_history(user.num_document)
+    crud_document.add_history(user.num_document, db)
     return crud_patient.get_patient(user.num_document, db)
 
 
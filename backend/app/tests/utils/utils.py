@@ -1,7 +1,12 @@
 import random
 import string
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
 
 from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
 
@@ -27,3 +32,60 @@ def get_superuser_token(client: TestClient) -> dict[str, str]:
     access_token = tokens["access_token"]
     headers = {"Authorization": f"Bearer {access_token}"}
     return headers
+
+
+@contextmanager
+def count_queries(db: Session) -> Generator[list[str], None, None]:
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@contextmanager
+def capture_queries(db: Session) -> Generator[list[tuple[str, Any]], None, None]:
+    queries: list[tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args) -> None:
+        queries.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def seq_scans(db: Session, statement: str, parameters: Any = None) -> list[str]:
+    """
+    Obtiene las tablas que se recorren completamente (Seq Scan) en el plan de ejecución de una consulta
+    tal como la envió el driver, por ejemplo, una capturada con `capture_queries`.
+    Las lecturas secuenciales se deshabilitan mientras se planea la consulta, por lo que el planeador
+    solo las usa cuando ningún índice sirve para la consulta, sin importar el tamaño de las tablas.
+    """
+    connection = db.connection()
+    db.execute(text("SET enable_seqscan = off"))
+    try:
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        ).scalar_one()
+    finally:
+        db.execute(text("RESET enable_seqscan"))
+
+    tables: list[str] = []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            tables.append(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+
+    return tables
@@ -9,3 +9,12 @@ python3 -m alembic upgrade head
 
 # Crear la información inicial a la DB
 python3 -m app.initial_data
+
+# Convertir los historiales antiguos de las historias clínicas
+python3 -m app.migrate_histories
+
+# Sincronizar el índice de documentos con los archivos en disco
+python3 -m app.reconcile_documents
+
+# Particionar y archivar el historial de la API (también se puede programar, p. ej. mensualmente con cron)
+python3 -m app.archive_api_logs